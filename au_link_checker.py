@@ -2,16 +2,19 @@ import requests
 from bs4 import BeautifulSoup
 import logging
 from urllib.parse import urljoin
-from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import ThreadPoolExecutor, wait
 import queue
 import time
 import threading
 from datetime import datetime
 import pandas as pd
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from typing import Union
 import argparse
+from recheck import load_broken_urls
+from http_transport import (build_session, Http2Session, format_connection_metrics,
+                            MAX_CONNECTIONS, REQUEST_TIMEOUT, MAX_RETRIES, RATE_LIMIT)
+from url_checker import check_urls, RateLimiter
+from crawl_budget import CrawlBudget, parse_section_budget
+from robots_rules import RobotsCache
 
 STOP_EVENT = threading.Event()
 
@@ -25,25 +28,24 @@ logging.basicConfig(level=logging.INFO,
                     ])
 logging.getLogger("urllib3").setLevel(logging.ERROR)
 
-MAX_CONNECTIONS = 100
-REQUEST_TIMEOUT = 3
-MAX_RETRIES = 2
-RATE_LIMIT = 0.1
 MAX_PATH_LENGTH = 255  # Max characters for the Path string in CSV
+RECHECK_CONCURRENCY = 50  # Worker threads used by --recheck-from
 # MAX_URLS_TO_CHECK = 5000 # Limit removed for full crawl
 START_URL = 'https://www.kmart.com.au/'
 
 results_queue = queue.Queue()
 
-session = requests.Session()
 # Custom User-Agent to reduce chances of being blocked by Akamai. Include 'kmart' as requested.
 # You can customize this string if needed, or set the KMART_USER_AGENT environment variable to override.
 KMART_USER_AGENT = 'kmart-linkchecker/1.0 (+https://www.kmart.com.au/)'
-session.headers.update({'User-Agent': KMART_USER_AGENT})
-retry_strategy = Retry(total=MAX_RETRIES, backoff_factor=0.1, status_forcelist=[500, 502, 503, 504])
-adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=MAX_CONNECTIONS, pool_maxsize=MAX_CONNECTIONS)
-session.mount("http://", adapter)
-session.mount("https://", adapter)
+session = build_session(KMART_USER_AGENT, MAX_CONNECTIONS, MAX_RETRIES)
+
+def use_http2():
+    """Swap the shared HTTP/1.1 session for a multiplexed HTTP/2 one (requires httpx)."""
+    global session
+    session = Http2Session(KMART_USER_AGENT, MAX_CONNECTIONS, MAX_RETRIES, max_redirects=MAX_REDIRECTS)
+
+rate_limiter = RateLimiter(RATE_LIMIT)
 
 checked_links = set()
 checked_links_lock = threading.Lock()
@@ -54,6 +56,7 @@ REDIRECT_STATUS_CODES = {301, 302, 303, 307, 308}
 MAX_REDIRECTS = 5
 
 def check_link(url, retries=MAX_RETRIES):
+    rate_limiter.wait(url)
     try:
         response = session.get(url, timeout=REQUEST_TIMEOUT, allow_redirects=True)
         return response.status_code
@@ -61,9 +64,10 @@ def check_link(url, retries=MAX_RETRIES):
         logging.error(f"Error checking {url}: {e}")
         return None
     finally:
-        time.sleep(RATE_LIMIT)
+        rate_limiter.pause(url)
 
 def get_links(url):
+    rate_limiter.wait(url)
     try:
         response = session.get(url, timeout=REQUEST_TIMEOUT)
         if response.status_code != 200:
@@ -87,6 +91,7 @@ def verify_link_in_ui(path, target_url):
     if len(pages) < 2:
         return "N/A"
     parent_url = pages[-2]
+    rate_limiter.wait(parent_url)
     try:
         response = session.get(parent_url, timeout=REQUEST_TIMEOUT)
         return "Yes" if target_url in response.text else "No"
@@ -119,23 +124,32 @@ def worker(url, path):
         return get_links(url), path
     return [], path
 
-def main(start_url=None, max_urls: int | None = None):
+def main(start_url=None, max_urls: int | None = None, budget: CrawlBudget | None = None, respect_robots: bool = True):
     if start_url is None:
         start_url = START_URL
+    if budget is None:
+        budget = CrawlBudget()
+    robots = RobotsCache(session, KMART_USER_AGENT, rate_limiter=rate_limiter) if respect_robots else None
     start_time = time.time()
-    futures_to_urls = {}
+    futures_to_urls = {}  # future -> (url, depth)
 
     with ThreadPoolExecutor(max_workers=20) as executor:
-        future = executor.submit(worker, start_url, start_url)
-        futures_to_urls[future] = start_url
+        if robots is not None and not robots.allowed(start_url):
+            logging.warning(f"robots.txt disallows the start URL {start_url}; nothing to crawl")
+        else:
+            future = executor.submit(worker, start_url, start_url)
+            futures_to_urls[future] = (start_url, 0)
 
         while futures_to_urls:
             done, _ = wait(futures_to_urls, timeout=1, return_when='FIRST_COMPLETED')
             for future in done:
                 try:
                     new_links, path = future.result()
+                    depth = futures_to_urls[future][1] + 1
                     for link in new_links:
-                        if link not in checked_links: # MAX_URLS_TO_CHECK limit removed
+                        if (link not in checked_links # MAX_URLS_TO_CHECK limit removed
+                                and (robots is None or robots.allowed(link))
+                                and budget.admit(link, depth)):
                             new_path = f"{path} -> {link}"
                             new_path_full = f"{path} -> {link}"
                             if len(new_path_full) > MAX_PATH_LENGTH:
@@ -171,7 +185,7 @@ def main(start_url=None, max_urls: int | None = None):
                             
                             if not STOP_EVENT.is_set():
                                 new_future = executor.submit(worker, link, new_path)
-                                futures_to_urls[new_future] = link
+                                futures_to_urls[new_future] = (link, depth)
                 except Exception as e:
                     logging.error(f"Error processing future: {e}")
                 del futures_to_urls[future]
@@ -199,11 +213,71 @@ def main(start_url=None, max_urls: int | None = None):
     csv_path = 'au_link_check_results.csv'
     df.to_csv(csv_path, index=False)
     print(f"✅ AU CSV report saved to {csv_path}")
+    logging.info(format_connection_metrics(session))
+    logging.info(budget.summary())
+    if robots is not None:
+        logging.info(f"robots.txt: skipped {robots.disallowed} disallowed URLs")
+
+def recheck(db_path, concurrency=RECHECK_CONCURRENCY, csv_path='au_recheck_results.csv', respect_robots=True):
+    """Revalidate only the AU URLs from the latest broken links snapshot in db_path."""
+    urls = load_broken_urls(db_path, 'AU')
+    if respect_robots:
+        robots = RobotsCache(session, KMART_USER_AGENT, rate_limiter=rate_limiter)
+        urls = [url for url in urls if robots.allowed(url)]
+        if robots.disallowed:
+            logging.info(f"robots.txt: skipped {robots.disallowed} disallowed URLs")
+    start_time = time.time()
+    results = []
+
+    for count, (url, status, elapsed, error) in enumerate(
+            check_urls(urls, concurrency=concurrency, method='GET', session=session,
+                       timeout=REQUEST_TIMEOUT, rate_limiter=rate_limiter), 1):
+        if error:
+            logging.error(f"Error checking {url}: {error}")
+        results.append({
+            'Timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'URL': url,
+            'Status': status,
+            'Path': url,
+            'Visible': 'N/A'
+        })
+        if count % 100 == 0:
+            logging.info(f"Rechecked {count}/{len(urls)} links in {time.time() - start_time:.2f} seconds")
+
+    df = pd.DataFrame(results, columns=['Timestamp', 'URL', 'Status', 'Path', 'Visible'])
+    df['Status'] = pd.to_numeric(df['Status'], errors='coerce')
+    df.to_csv(csv_path, index=False)
+    still_broken = int((df['Status'].fillna(0) >= 400).sum() + df['Status'].isna().sum())
+    print(f"✅ AU recheck of {len(df)} URLs finished in {time.time() - start_time:.2f}s "
+          f"({still_broken} still broken); saved to {csv_path}")
+    logging.info(format_connection_metrics(session))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Kmart AU link checker")
     parser.add_argument("--start-url", default=START_URL, help="Starting URL for crawl")
     parser.add_argument("--max-urls", type=int, default=None, help="Optional limit of URLs to check (for testing)")
+    parser.add_argument("--recheck-from", metavar="DB", default=None,
+                        help="Only revalidate the URLs in the latest broken_links snapshot of this SQLite DB")
+    parser.add_argument("--recheck-concurrency", type=int, default=RECHECK_CONCURRENCY,
+                        help="Worker threads used in --recheck-from mode")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help="Do not follow links more than this many hops from the start URL")
+    parser.add_argument("--section-budget", type=parse_section_budget, action="append", default=[],
+                        metavar="PREFIX=N", help="Max URLs under a path prefix, e.g. '/category/*=2000' (repeatable)")
+    parser.add_argument("--max-query-variants", type=int, default=None,
+                        help="Max distinct query strings crawled per path (caps faceted filter permutations)")
+    parser.add_argument("--ignore-robots", action="store_true",
+                        help="Do not fetch robots.txt, filter disallowed URLs or apply its Crawl-delay")
+    parser.add_argument("--http2", action="store_true",
+                        help="Multiplex requests over HTTP/2 connections (requires httpx[http2])")
     args = parser.parse_args()
 
-    main(start_url=args.start_url, max_urls=args.max_urls)
\ No newline at end of file
+    if args.http2:
+        use_http2()
+    if args.recheck_from:
+        recheck(args.recheck_from, concurrency=args.recheck_concurrency, respect_robots=not args.ignore_robots)
+    else:
+        budget = CrawlBudget(max_depth=args.max_depth,
+                             section_budgets=dict(args.section_budget),
+                             max_query_variants=args.max_query_variants)
+        main(start_url=args.start_url, max_urls=args.max_urls, budget=budget, respect_robots=not args.ignore_robots)
\ No newline at end of file
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+SQLite store for the daily broken-link snapshots in broken_links.db.
+
+Every snapshot lives in one broken_links table keyed by (run_date, region, url_id),
+so multi-day questions (trend counts, day-to-day diffs, retention) are single
+indexed statements instead of one query per broken_links_YYYY_MM_DD table.
+URLs are stored once in the urls dictionary (url_dictionary.py) and referenced
+by integer id. connect() creates the schema and migrates per-day tables and
+text-URL broken_links tables left by older runs the first time an old
+database is opened.
+
+daily_summary is a rollup of broken_links with one row per run_date, region,
+status class and error type. store_snapshot() refreshes the stored day's
+rows in the same transaction, so trend charts read a few hundred rows
+instead of scanning every snapshot. snapshot_runs records every stored
+run_date, including runs that found no broken links, and is where the list
+of snapshot dates comes from. store_meta holds a revision counter bumped
+whenever stored rows change, since upserts can change rows without changing
+any row count; data_revision() reads it for cache keys. Retention (old snapshots, summary rows, runs
+and unreferenced urls) is handled by retention.py.
+
+Usage:
+  from broken_links_db import connect, store_snapshot, snapshot_dates
+  conn = connect('broken_links.db')
+  store_snapshot(conn, date.today(), broken_df)
+"""
+
+import sqlite3
+from datetime import date, datetime
+
+import pandas as pd
+
+import url_dictionary
+from db_connection import connect as open_connection
+
+BROKEN_LINKS_TABLE = 'broken_links'
+SUMMARY_TABLE = 'daily_summary'
+RUNS_TABLE = 'snapshot_runs'
+META_TABLE = 'store_meta'
+ARTIFACTS_TABLE = 'broken_links_artifacts'  # Row-per-CSV-line table the old fetch_and_merge script named broken_links
+LEGACY_TABLE_PREFIX = 'broken_links_'  # One broken_links_YYYY_MM_DD table per day before the single-table schema
+SNAPSHOT_COLUMNS = ['Region', 'URL', 'Status', 'Response_Time', 'Error_Message', 'Timestamp']
+
+BROKEN_LINKS_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS broken_links (
+        run_date TEXT NOT NULL,
+        region TEXT NOT NULL,
+        url_id INTEGER NOT NULL REFERENCES urls (id),
+        status INTEGER,
+        response_time REAL,
+        error_message TEXT,
+        timestamp TEXT,
+        PRIMARY KEY (run_date, region, url_id)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_broken_links_url_id ON broken_links (url_id, run_date)",
+)
+SUMMARY_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS daily_summary (
+        run_date TEXT NOT NULL,
+        region TEXT NOT NULL,
+        status_class TEXT NOT NULL,
+        error_type TEXT NOT NULL,
+        link_count INTEGER NOT NULL,
+        PRIMARY KEY (run_date, region, status_class, error_type)
+    ) WITHOUT ROWID""",
+)
+RUNS_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS snapshot_runs (run_date TEXT PRIMARY KEY) WITHOUT ROWID",
+)
+META_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID",
+)
+SCHEMA = BROKEN_LINKS_SCHEMA + SUMMARY_SCHEMA + RUNS_SCHEMA + META_SCHEMA
+
+# status_class is '4xx', '5xx' or 'error' (no HTTP response, stored as status 0/NULL);
+# error_type is 'HTTP <status>' for HTTP errors and 'Request error' otherwise.
+_SUMMARY_SELECT = """
+    SELECT run_date, region,
+           CASE WHEN status BETWEEN 400 AND 499 THEN '4xx' WHEN status >= 500 THEN '5xx' ELSE 'error' END,
+           CASE WHEN status >= 400 THEN 'HTTP ' || CAST(status AS INTEGER) ELSE 'Request error' END,
+           COUNT(*)
+    FROM broken_links
+"""
+_SUMMARY_GROUP_BY = " GROUP BY 1, 2, 3, 4"
+
+
+def _date_key(day) -> str:
+    """run_date values are ISO 'YYYY-MM-DD' strings, so they sort and range-compare as dates."""
+    return day.isoformat() if isinstance(day, date) else str(day)
+
+
+def _legacy_tables(conn: sqlite3.Connection):
+    """Yield (table_name, date) for every broken_links_YYYY_MM_DD table."""
+    cur = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'broken\\_links\\_%' ESCAPE '\\'")
+    for (name,) in cur.fetchall():
+        try:
+            yield name, datetime.strptime(name[len(LEGACY_TABLE_PREFIX):], '%Y_%m_%d').date()
+        except ValueError:
+            continue
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name = ?", (name,)).fetchone() is not None
+
+
+def _bump_revision(conn: sqlite3.Connection):
+    """Advance the store_meta revision (caller holds the transaction)."""
+    conn.execute("""INSERT INTO store_meta (key, value) VALUES ('revision', 1)
+                    ON CONFLICT (key) DO UPDATE SET value = value + 1""")
+
+
+def data_revision(conn: sqlite3.Connection) -> int:
+    """Counter that advances whenever snapshot rows are written, including in-place upserts."""
+    row = conn.execute("SELECT value FROM store_meta WHERE key = 'revision'").fetchone()
+    return row[0] if row else 0
+
+
+def _refresh_summary(conn: sqlite3.Connection, day: str, changed: bool = True):
+    """Recompute daily_summary for one run_date from its broken_links rows, record the run and,
+    if its rows changed, bump the revision (caller holds the transaction)."""
+    conn.execute("INSERT OR IGNORE INTO snapshot_runs (run_date) VALUES (?)", (day,))
+    if changed:
+        _bump_revision(conn)
+    conn.execute("DELETE FROM daily_summary WHERE run_date = ?", (day,))
+    conn.execute("INSERT INTO daily_summary " + _SUMMARY_SELECT + " WHERE run_date = ?" + _SUMMARY_GROUP_BY, (day,))
+
+
+def rebuild_daily_summary(conn: sqlite3.Connection) -> int:
+    """Recompute daily_summary for every stored snapshot in one pass; returns the number of rollup rows.
+
+    Every run_date with broken_links rows is also recorded in snapshot_runs.
+    """
+    with conn:
+        conn.execute("DELETE FROM daily_summary")
+        conn.execute("INSERT INTO daily_summary " + _SUMMARY_SELECT + _SUMMARY_GROUP_BY)
+        conn.execute("INSERT OR IGNORE INTO snapshot_runs (run_date) SELECT DISTINCT run_date FROM daily_summary")
+        _bump_revision(conn)
+    return conn.execute("SELECT COUNT(*) FROM daily_summary").fetchone()[0]
+
+
+def migrate_daily_tables(conn: sqlite3.Connection) -> int:
+    """Copy every broken_links_YYYY_MM_DD table into broken_links and drop it; returns the number migrated.
+
+    Columns missing from older table layouts are stored as NULL, and empty tables
+    still record their day in snapshot_runs. Runs in a single transaction.
+    """
+    legacy = sorted(_legacy_tables(conn), key=lambda item: item[1])
+    if not legacy:
+        return 0
+    with conn:
+        for table, day in legacy:
+            columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+            selected = ', '.join(f'legacy.{column}' if column in columns else 'NULL' for column in SNAPSHOT_COLUMNS[2:])
+            conn.execute(
+                f"""INSERT OR IGNORE INTO urls (url, region, path_hash)
+                    SELECT DISTINCT URL, url_region(URL), url_path_hash(URL) FROM "{table}" WHERE URL IS NOT NULL"""
+            )
+            conn.execute(
+                f"""INSERT OR REPLACE INTO broken_links (run_date, region, url_id, status, response_time, error_message, timestamp)
+                    SELECT ?, legacy.Region, urls.id, {selected}
+                    FROM "{table}" AS legacy JOIN urls ON urls.url = legacy.URL
+                    WHERE legacy.Region IS NOT NULL""",
+                (_date_key(day),)
+            )
+            conn.execute(f'DROP TABLE "{table}"')
+            _refresh_summary(conn, _date_key(day))
+    print(f"🗃️ Migrated {len(legacy)} daily broken_links_YYYY_MM_DD tables into {BROKEN_LINKS_TABLE}")
+    return len(legacy)
+
+
+def rename_artifacts_table(conn: sqlite3.Connection) -> bool:
+    """Move the old fetch_and_merge broken_links(Timestamp, URL, Status, Path, Visible) table out of the way.
+
+    It is renamed to broken_links_artifacts so the snapshot schema can be created.
+    Returns True if a rename ran.
+    """
+    columns = {row[1].lower() for row in conn.execute("PRAGMA table_info(broken_links)")}
+    if not columns or 'run_date' in columns:
+        return False
+    with conn:
+        conn.execute("BEGIN")
+        if _table_exists(conn, ARTIFACTS_TABLE):
+            conn.execute(f"INSERT INTO {ARTIFACTS_TABLE} SELECT * FROM broken_links")
+            conn.execute("DROP TABLE broken_links")
+        else:
+            conn.execute(f"ALTER TABLE broken_links RENAME TO {ARTIFACTS_TABLE}")
+    print(f"🗃️ Renamed the legacy artifact {BROKEN_LINKS_TABLE} table to {ARTIFACTS_TABLE}")
+    return True
+
+
+def migrate_text_urls(conn: sqlite3.Connection) -> bool:
+    """Rebuild a broken_links table that stores URL text (before the urls dictionary) with url ids.
+
+    Returns True if a migration ran. Runs in a single transaction.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(broken_links)")}
+    if 'url' not in columns:
+        return False
+    with conn:
+        conn.execute("BEGIN")
+        conn.execute("DROP INDEX IF EXISTS idx_broken_links_region_url")
+        conn.execute("ALTER TABLE broken_links RENAME TO broken_links_text_urls")
+        for statement in BROKEN_LINKS_SCHEMA:
+            conn.execute(statement)
+        conn.execute("""INSERT OR IGNORE INTO urls (url, region, path_hash)
+                        SELECT DISTINCT url, url_region(url), url_path_hash(url) FROM broken_links_text_urls""")
+        conn.execute("""INSERT INTO broken_links (run_date, region, url_id, status, response_time, error_message, timestamp)
+                        SELECT old.run_date, old.region, urls.id, old.status, old.response_time, old.error_message, old.timestamp
+                        FROM broken_links_text_urls AS old JOIN urls ON urls.url = old.url""")
+        conn.execute("DROP TABLE broken_links_text_urls")
+    print(f"🗃️ Moved {BROKEN_LINKS_TABLE} URLs into the {url_dictionary.URLS_TABLE} dictionary")
+    return True
+
+
+def connect(db_path: str = 'broken_links.db') -> sqlite3.Connection:
+    """Open broken_links.db, creating the schema and migrating older layouts if needed.
+
+    Databases written before daily_summary or snapshot_runs existed get them backfilled once here.
+    """
+    conn = open_connection(db_path)
+    url_dictionary.ensure_url_table(conn)
+    has_summary = _table_exists(conn, SUMMARY_TABLE)
+    has_runs = _table_exists(conn, RUNS_TABLE)
+    rename_artifacts_table(conn)
+    migrate_text_urls(conn)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    if not has_summary and conn.execute("SELECT 1 FROM broken_links LIMIT 1").fetchone():
+        print(f"🗃️ Built {SUMMARY_TABLE} with {rebuild_daily_summary(conn)} rows from existing snapshots")
+    elif not has_runs:
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO snapshot_runs (run_date) SELECT DISTINCT run_date FROM daily_summary")
+    migrate_daily_tables(conn)
+    return conn
+
+
+# New rows for store_snapshot() are staged here so the change test and the replace are single statements
+_STAGING_SCHEMA = """CREATE TEMP TABLE IF NOT EXISTS snapshot_staging (
+    region TEXT NOT NULL,
+    url_id INTEGER NOT NULL,
+    status INTEGER,
+    response_time REAL,
+    error_message TEXT,
+    timestamp TEXT,
+    PRIMARY KEY (region, url_id)
+) WITHOUT ROWID"""
+# Whether the columns the report shows differ between the stored day and the staged rows, compared
+# both ways with EXCEPT inside SQLite (timestamps and timings change on every run and are ignored)
+_STAGED_CHANGED_SQL = """
+    SELECT EXISTS (SELECT region, url_id, status, error_message FROM broken_links WHERE run_date = ?
+                   EXCEPT SELECT region, url_id, status, error_message FROM temp.snapshot_staging)
+        OR EXISTS (SELECT region, url_id, status, error_message FROM temp.snapshot_staging
+                   EXCEPT SELECT region, url_id, status, error_message FROM broken_links WHERE run_date = ?)
+"""
+
+
+def store_snapshot(conn: sqlite3.Connection, run_date, df: pd.DataFrame) -> int:
+    """Replace the snapshot for run_date with the rows of df (SNAPSHOT_COLUMNS); returns the rows stored.
+
+    Re-storing the same links for a day leaves data_revision() unchanged.
+    """
+    frame = df.reindex(columns=SNAPSHOT_COLUMNS)
+    frame = frame[frame['Region'].notna() & frame['URL'].notna()]
+    frame = frame.astype(object).where(frame.notna(), None)
+    frame['URL'] = frame['URL'].astype(str)
+    day = _date_key(run_date)
+    with conn:
+        url_ids = url_dictionary.resolve_url_ids(conn, frame['URL'])
+        conn.execute(_STAGING_SCHEMA)
+        conn.execute("DELETE FROM temp.snapshot_staging")
+        conn.executemany(
+            """INSERT OR REPLACE INTO temp.snapshot_staging (region, url_id, status, response_time, error_message, timestamp)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            ((region, url_ids[url], *rest) for region, url, *rest in frame.itertuples(index=False, name=None))
+        )
+        changed = conn.execute(_STAGED_CHANGED_SQL, (day, day)).fetchone()[0]
+        conn.execute("DELETE FROM broken_links WHERE run_date = ?", (day,))
+        conn.execute(
+            """INSERT INTO broken_links (run_date, region, url_id, status, response_time, error_message, timestamp)
+               SELECT ?, region, url_id, status, response_time, error_message, timestamp FROM temp.snapshot_staging""",
+            (day,)
+        )
+        conn.execute("DELETE FROM temp.snapshot_staging")
+        _refresh_summary(conn, day, changed=bool(changed))
+    return len(frame)
+
+
+def merge_rows(conn: sqlite3.Connection, batches) -> int:
+    """Upsert batches of (run_date, region, url, status, response_time, error_message, timestamp) tuples.
+
+    Unlike store_snapshot() this adds to the stored days instead of replacing
+    them; a row for an existing (run_date, region, url) replaces it. Each batch
+    resolves its URL ids at once, everything runs in one transaction, and
+    daily_summary is refreshed once per touched day. Returns the rows merged.
+    """
+    merged = 0
+    days = set()
+    with conn:
+        for batch in batches:
+            url_ids = url_dictionary.resolve_url_ids(conn, (row[2] for row in batch))
+            day_keys = {day: _date_key(day) for day in {row[0] for row in batch}}
+            conn.executemany(
+                """INSERT OR REPLACE INTO broken_links (run_date, region, url_id, status, response_time, error_message, timestamp)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                ((day_keys[day], region, url_ids[url], *rest) for day, region, url, *rest in batch)
+            )
+            days.update(day_keys.values())
+            merged += len(batch)
+        for day in sorted(days):
+            _refresh_summary(conn, day)
+    return merged
+
+
+def snapshot_dates(conn: sqlite3.Connection) -> list[date]:
+    """Dates that have a stored snapshot (including runs with no broken links), oldest first."""
+    cur = conn.execute("SELECT run_date FROM snapshot_runs ORDER BY run_date")
+    return [date.fromisoformat(row[0]) for row in cur.fetchall()]
+
+
+def latest_snapshot_date(conn: sqlite3.Connection):
+    """Date of the newest snapshot, or None if nothing has been stored."""
+    row = conn.execute("SELECT MAX(run_date) FROM snapshot_runs").fetchone()
+    return date.fromisoformat(row[0]) if row and row[0] else None
+
+
+def load_snapshot_urls(conn: sqlite3.Connection, run_date, region: str) -> list[str]:
+    """Distinct URLs for one region on run_date, sorted."""
+    cur = conn.execute(
+        """SELECT urls.url FROM broken_links JOIN urls ON urls.id = broken_links.url_id
+           WHERE broken_links.run_date = ? AND broken_links.region = ? ORDER BY urls.url""",
+        (_date_key(run_date), region)
+    )
+    return [row[0] for row in cur.fetchall() if row[0]]
+
+
+def daily_counts(conn: sqlite3.Connection, days: int = 7) -> pd.DataFrame:
+    """Broken-link counts per region for the latest `days` snapshots: columns date, au_count, nz_count, total.
+
+    Read from the daily_summary rollup, so the cost does not grow with the snapshot sizes.
+    Runs that found no broken links are included with zero counts.
+    """
+    cur = conn.execute(
+        """SELECT runs.run_date,
+                  SUM(CASE WHEN summary.region = 'AU' THEN summary.link_count ELSE 0 END) AS au_count,
+                  SUM(CASE WHEN summary.region = 'NZ' THEN summary.link_count ELSE 0 END) AS nz_count
+           FROM (SELECT run_date FROM snapshot_runs ORDER BY run_date DESC LIMIT ?) AS runs
+           LEFT JOIN daily_summary AS summary ON summary.run_date = runs.run_date
+           GROUP BY runs.run_date
+           ORDER BY runs.run_date""",
+        (days,)
+    )
+    results = [
+        {'date': date.fromisoformat(run_date), 'au_count': au_count or 0, 'nz_count': nz_count or 0,
+         'total': (au_count or 0) + (nz_count or 0)}
+        for run_date, au_count, nz_count in cur.fetchall()
+    ]
+    return pd.DataFrame(results, columns=['date', 'au_count', 'nz_count', 'total'])
+
+
+def snapshot_size(conn: sqlite3.Connection, run_date) -> int:
+    """Number of broken links stored for run_date."""
+    return conn.execute("SELECT COUNT(*) FROM broken_links WHERE run_date = ?", (_date_key(run_date),)).fetchone()[0]
+
+
+# Rows of one snapshot with no matching (region, url_id) in another: an anti-join probing the
+# primary key with integer ids. Only the diff rows are joined to urls and sorted.
+_DIFF_SQL = """
+    SELECT present.region, present.url_id FROM broken_links AS present
+    WHERE present.run_date = ?
+      AND NOT EXISTS (SELECT 1 FROM broken_links AS other
+                      WHERE other.run_date = ? AND other.region = present.region AND other.url_id = present.url_id)
+"""
+
+
+def _diff_dates(newer, older, change):
+    if change not in ('added', 'removed'):
+        raise ValueError(f"change must be 'added' or 'removed', got {change!r}")
+    present, other = (newer, older) if change == 'added' else (older, newer)
+    return _date_key(present), _date_key(other)
+
+
+def iter_snapshot_diff(conn: sqlite3.Connection, newer, older, change: str = 'added', limit: int = None, offset: int = 0):
+    """Yield (region, url) pairs sorted by region then URL that are broken on newer but not older
+    (change='added') or on older but not newer (change='removed').
+
+    Rows are streamed from the cursor; pass limit/offset to read one page.
+    """
+    params = _diff_dates(newer, older, change) + (-1 if limit is None else limit, offset)
+    yield from conn.execute(
+        f"""SELECT diff.region, urls.url FROM ({_DIFF_SQL}) AS diff JOIN urls ON urls.id = diff.url_id
+            ORDER BY diff.region, urls.url LIMIT ? OFFSET ?""",
+        params
+    )
+
+
+def snapshot_diff(conn: sqlite3.Connection, newer, older, change: str = 'added', limit: int = None, offset: int = 0):
+    """List form of iter_snapshot_diff()."""
+    return list(iter_snapshot_diff(conn, newer, older, change, limit, offset))
+
+
+def count_snapshot_diff(conn: sqlite3.Connection, newer, older, change: str = 'added') -> int:
+    """Number of rows iter_snapshot_diff() would yield, counted inside SQLite."""
+    return conn.execute(f"SELECT COUNT(*) FROM ({_DIFF_SQL})", _diff_dates(newer, older, change)).fetchone()[0]
+
+
+def snapshot_details(conn: sqlite3.Connection, run_date) -> list[dict]:
+    """All rows of one snapshot ordered by region, status and URL."""
+    cur = conn.execute(
+        """SELECT broken_links.region, urls.url, broken_links.status, broken_links.error_message
+           FROM broken_links JOIN urls ON urls.id = broken_links.url_id
+           WHERE broken_links.run_date = ? ORDER BY broken_links.region, broken_links.status, urls.url""",
+        (_date_key(run_date),)
+    )
+    return [{'Region': region, 'URL': url, 'Status': status, 'Error_Message': error}
+            for region, url, status, error in cur.fetchall()]
+
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Parquet archive of full crawl results, for long-range link-health analysis.
+
+broken_links.db keeps only 60 days of broken rows so that the copy published to
+gh-pages stays small. This archive keeps every night's full crawl result (all
+links, not only broken ones) as one zstd-compressed Parquet file per region and
+day, in a hive-partitioned directory tree:
+
+  crawl_archive/region=AU/date=2026-10-18/part-0.parquet
+
+Reads go through a pyarrow dataset, so a date-range filter only opens the
+partitions in range and only the requested columns are decoded. Requires
+pyarrow (optional: the crawlers and the report do not need it).
+
+Usage:
+  python crawl_archive.py write --csv au_link_check_results.csv --region AU
+  python crawl_archive.py health --start 2025-10-01 --end 2026-10-18
+"""
+
+import argparse
+import os
+from datetime import date
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    ds = None
+
+ARCHIVE_DIR = 'crawl_archive'
+PART_FILE = 'part-0.parquet'
+COMPRESSION = 'zstd'
+REGIONS = ('AU', 'NZ')
+# Crawler CSV column -> archive column
+CSV_COLUMNS = {
+    'Timestamp': 'timestamp',
+    'URL': 'url',
+    'Status': 'status',
+    'Response_Time': 'response_time',
+    'Error_Message': 'error_message',
+    'Path': 'path',
+    'Visible': 'visible',
+}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The crawl archive requires pyarrow: pip install pyarrow")
+
+
+def _date_key(day) -> str:
+    return day.isoformat() if isinstance(day, date) else str(day)
+
+
+def partition_dir(region: str, run_date, archive_dir: str = ARCHIVE_DIR) -> str:
+    return os.path.join(archive_dir, f"region={region.upper()}", f"date={_date_key(run_date)}")
+
+
+def archived_dates(archive_dir: str = ARCHIVE_DIR, region: str | None = None) -> list[date]:
+    """Dates that have a partition (for any region, or for one), oldest first. Does not need pyarrow."""
+    regions = [region.upper()] if region else REGIONS
+    dates = set()
+    for name in regions:
+        region_dir = os.path.join(archive_dir, f"region={name}")
+        if not os.path.isdir(region_dir):
+            continue
+        for entry in os.listdir(region_dir):
+            if entry.startswith('date=') and os.path.exists(os.path.join(region_dir, entry, PART_FILE)):
+                try:
+                    dates.add(date.fromisoformat(entry[len('date='):]))
+                except ValueError:
+                    continue
+    return sorted(dates)
+
+
+def to_archive_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Typed archive columns from a crawler results frame.
+
+    Every partition gets the same columns (null where the CSV lacks one) so the dataset schema is uniform.
+    """
+    frame = df.reindex(columns=list(CSV_COLUMNS)).rename(columns=CSV_COLUMNS)
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'], errors='coerce')
+    frame['url'] = frame['url'].astype('string')
+    frame['status'] = pd.to_numeric(frame['status'], errors='coerce').round().astype('Int16')
+    frame['response_time'] = pd.to_numeric(frame['response_time'], errors='coerce').astype('float32')
+    # Few distinct values per day: dictionary-encoded in Parquet
+    for column in ('error_message', 'path', 'visible'):
+        frame[column] = frame[column].astype('string').astype('category')
+    return frame
+
+
+def write_partition(df: pd.DataFrame, region: str, run_date, archive_dir: str = ARCHIVE_DIR) -> str:
+    """Write one region's crawl results for run_date, replacing that partition; returns the file path."""
+    _require_pyarrow()
+    directory = partition_dir(region, run_date, archive_dir)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, PART_FILE)
+    tmp_path = os.path.join(directory, f".{PART_FILE}.tmp")  # Dot-prefixed files are skipped by dataset discovery
+    to_archive_frame(df).to_parquet(tmp_path, engine='pyarrow', compression=COMPRESSION, index=False)
+    os.replace(tmp_path, path)  # Readers never see a half-written partition
+    return path
+
+
+def archive_csv(csv_path: str, region: str, run_date=None, archive_dir: str = ARCHIVE_DIR) -> str:
+    """Archive a crawler results CSV. run_date defaults to the date of its first Timestamp, else today."""
+    df = pd.read_csv(csv_path, encoding='utf-8', encoding_errors='replace', low_memory=False)
+    if run_date is None:
+        first = pd.to_datetime(df['Timestamp'].dropna().head(1), errors='coerce') if 'Timestamp' in df else pd.Series(dtype='datetime64[ns]')
+        run_date = first.iloc[0].date() if len(first) and pd.notna(first.iloc[0]) else date.today()
+    return write_partition(df, region, run_date, archive_dir)
+
+
+def _dataset(archive_dir: str):
+    _require_pyarrow()
+    partitioning = ds.partitioning(pa.schema([('region', pa.string()), ('date', pa.string())]), flavor='hive')
+    return ds.dataset(archive_dir, format='parquet', partitioning=partitioning)
+
+
+def _filter(start=None, end=None, regions=None):
+    """Dataset filter on the partition keys; ISO date strings compare in date order."""
+    conditions = []
+    if start is not None:
+        conditions.append(ds.field('date') >= _date_key(start))
+    if end is not None:
+        conditions.append(ds.field('date') <= _date_key(end))
+    if regions:
+        conditions.append(ds.field('region').isin([region.upper() for region in regions]))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_archive(start=None, end=None, regions=None, columns=None, archive_dir: str = ARCHIVE_DIR) -> pd.DataFrame:
+    """Archived rows for start..end (inclusive) and the given regions, with region and date columns.
+
+    Only partitions in range are opened and only `columns` (default: all) are read.
+    """
+    if not os.path.isdir(archive_dir):
+        return pd.DataFrame(columns=['region', 'date'] + list(columns or CSV_COLUMNS.values()))
+    wanted = None if columns is None else list(dict.fromkeys(['region', 'date', *columns]))
+    table = _dataset(archive_dir).to_table(columns=wanted, filter=_filter(start, end, regions))
+    return table.to_pandas()
+
+
+def daily_health(start=None, end=None, regions=None, archive_dir: str = ARCHIVE_DIR) -> pd.DataFrame:
+    """Per region and day: links checked, broken (status >= 400) and errors (no status).
+
+    Reads only the status column, one partition at a time, so a year of crawls
+    never has to fit in memory at once.
+    """
+    results = []
+    if os.path.isdir(archive_dir):
+        for fragment in _dataset(archive_dir).get_fragments(filter=_filter(start, end, regions)):
+            keys = ds.get_partition_keys(fragment.partition_expression)
+            status = fragment.to_table(columns=['status']).column('status').to_pandas()
+            results.append({
+                'date': date.fromisoformat(keys['date']),
+                'region': keys['region'],
+                'checked': len(status),
+                'broken': int((status >= 400).sum()),
+                'errors': int(status.isna().sum()),
+            })
+    frame = pd.DataFrame(results, columns=['date', 'region', 'checked', 'broken', 'errors'])
+    frame['broken_pct'] = (frame['broken'] / frame['checked'].where(frame['checked'] > 0) * 100).round(2)
+    return frame.sort_values(['date', 'region']).reset_index(drop=True)
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--archive-dir', default=ARCHIVE_DIR, help=f"Archive root directory (default: {ARCHIVE_DIR})")
+    parser = argparse.ArgumentParser(description="Parquet archive of full crawl results")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    write_parser = subparsers.add_parser('write', parents=[common],
+                                         help="Archive a crawler results CSV as one region/day partition")
+    write_parser.add_argument('--csv', required=True, help="Crawler results CSV (e.g. au_link_check_results.csv)")
+    write_parser.add_argument('--region', required=True, choices=REGIONS, type=str.upper)
+    write_parser.add_argument('--date', type=date.fromisoformat, default=None,
+                              help="Partition date (YYYY-MM-DD); default: the date of the first Timestamp")
+
+    health_parser = subparsers.add_parser('health', parents=[common],
+                                          help="Daily checked/broken/error counts for a date range")
+    health_parser.add_argument('--start', type=date.fromisoformat, default=None)
+    health_parser.add_argument('--end', type=date.fromisoformat, default=None)
+    health_parser.add_argument('--region', action='append', choices=REGIONS, type=str.upper, default=None)
+    health_parser.add_argument('--output', default=None, help="Write the table to this CSV instead of printing it")
+
+    args = parser.parse_args()
+    if args.command == 'write':
+        path = archive_csv(args.csv, args.region, args.date, args.archive_dir)
+        print(f"🗄️ Archived {args.csv} to {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+    else:
+        health = daily_health(args.start, args.end, args.region, args.archive_dir)
+        if args.output:
+            health.to_csv(args.output, index=False)
+            print(f"✅ Wrote {len(health)} rows to {args.output}")
+        else:
+            print(health.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
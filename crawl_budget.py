@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Crawl depth and fan-out controls for the AU/NZ link checkers.
+
+CrawlBudget decides whether a discovered link is enqueued, based on:
+- max_depth: number of hops from the start URL
+- section budgets: max URLs under a path prefix, e.g. '/category/*=2000'
+- max_query_variants: max distinct query strings per path, which stops
+  faceted pages with endless filter-parameter combinations from taking
+  over the crawl
+"""
+
+import argparse
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+
+def parse_section_budget(spec: str):
+    """Parse a PREFIX=N budget (e.g. '/category/*=2000') for argparse."""
+    prefix, sep, limit = spec.rpartition('=')
+    if not sep or not prefix:
+        raise argparse.ArgumentTypeError(f"Expected PREFIX=N, got '{spec}'")
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Budget for '{prefix}' must be an integer, got '{limit}'")
+    prefix = prefix.rstrip('*')
+    if not prefix.startswith('/'):
+        prefix = '/' + prefix
+    return prefix, limit
+
+
+class CrawlBudget:
+    def __init__(self, max_depth=None, section_budgets=None, max_query_variants=None):
+        self.max_depth = max_depth
+        # Longest prefix first so '/category/kids/' wins over '/category/'
+        self.section_budgets = sorted((section_budgets or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.max_query_variants = max_query_variants
+        self._lock = threading.Lock()
+        self._admitted = set()
+        self._section_counts = defaultdict(int)
+        self._query_variants = defaultdict(set)
+        self.skipped = defaultdict(int)
+
+    @property
+    def enabled(self):
+        return self.max_depth is not None or bool(self.section_budgets) or self.max_query_variants is not None
+
+    def _section_for(self, path):
+        for prefix, limit in self.section_budgets:
+            if path.startswith(prefix):
+                return prefix, limit
+        return None, None
+
+    def admit(self, url: str, depth: int) -> bool:
+        """Return True if url may be enqueued at the given depth, recording it against the budgets."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            if url in self._admitted:
+                return True
+            if self.max_depth is not None and depth > self.max_depth:
+                self.skipped['depth'] += 1
+                return False
+
+            parts = urlsplit(url)
+            path = parts.path or '/'
+            page_key = (parts.netloc, path)
+            if parts.query and self.max_query_variants is not None:
+                variants = self._query_variants[page_key]
+                if parts.query not in variants and len(variants) >= self.max_query_variants:
+                    self.skipped['query_variants'] += 1
+                    return False
+
+            prefix, limit = self._section_for(path)
+            if prefix is not None and self._section_counts[prefix] >= limit:
+                self.skipped[f'section {prefix}'] += 1
+                return False
+
+            if parts.query and self.max_query_variants is not None:
+                self._query_variants[page_key].add(parts.query)
+            if prefix is not None:
+                self._section_counts[prefix] += 1
+            self._admitted.add(url)
+            return True
+
+    def summary(self) -> str:
+        with self._lock:
+            if not self.skipped:
+                return "Crawl budget: no URLs skipped"
+            details = ', '.join(f"{reason}: {count}" for reason, count in sorted(self.skipped.items()))
+            return f"Crawl budget skipped {sum(self.skipped.values())} URLs ({details})"
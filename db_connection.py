@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite connection layer.
+
+Every store (broken_links.db, product_availability.db, page_views_daily.db,
+screenshots.db, optimizely_flags.db) opens its database through here so
+they all get the same settings: WAL journaling, synchronous=NORMAL (safe
+with WAL and no fsync per commit), a larger page cache and memory-mapped
+reads, and auto_vacuum=INCREMENTAL so retention.py can give freed pages
+back to the filesystem. shared_connection() keeps one long-lived connection
+per thread and database file instead of connecting for every call (held in
+thread-local storage and closed when the thread exits, or at interpreter
+exit for the main thread), and transaction() wraps a batch of writes in a
+single explicit transaction.
+
+Usage:
+  conn = shared_connection('screenshots.db')
+  with transaction(conn):
+      conn.executemany('INSERT ...', rows)
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+PRAGMAS = {
+    'auto_vacuum': 'INCREMENTAL',  # Only affects new files; retention.py converts existing ones
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -65536,     # KiB (negative), i.e. a 64 MiB page cache
+    'mmap_size': 268435456,   # 256 MiB of the file memory-mapped for reads
+    'temp_store': 'MEMORY',
+}
+BUSY_TIMEOUT = 30  # Seconds to wait for another writer before failing with "database is locked"
+
+
+class _ThreadConnections:
+    """One thread's shared connections; closed when the thread's local storage is released."""
+
+    def __init__(self):
+        self.connections = {}  # absolute db path -> connection
+
+    def close(self):
+        connections = list(self.connections.values())
+        self.connections.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def __del__(self):
+        self.close()
+
+
+_local = threading.local()
+
+
+def _thread_connections() -> _ThreadConnections:
+    holder = getattr(_local, 'holder', None)
+    if holder is None:
+        holder = _local.holder = _ThreadConnections()
+    return holder
+
+
+def configure(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Apply PRAGMAS to a connection. journal_mode=WAL persists in the file; the rest are per connection."""
+    for name, value in PRAGMAS.items():
+        try:
+            conn.execute(f"PRAGMA {name} = {value}")
+        except sqlite3.DatabaseError as e:  # e.g. WAL on a read-only or network filesystem
+            print(f"⚠️ Could not set PRAGMA {name}={value}: {e}")
+    return conn
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """A new configured connection owned (and closed) by the caller."""
+    return configure(sqlite3.connect(db_path, timeout=BUSY_TIMEOUT))
+
+
+def shared_connection(db_path: str) -> sqlite3.Connection:
+    """The calling thread's long-lived configured connection to db_path.
+
+    Do not close it; a thread's shared connections are closed when the thread
+    exits, the main thread's at interpreter exit (which also checkpoints the
+    WAL back into the database file), or explicitly with close_shared_connections().
+    """
+    key = db_path if db_path == ':memory:' else os.path.abspath(db_path)
+    connections = _thread_connections().connections
+    conn = connections.get(key)
+    if conn is None:
+        # check_same_thread=False only because thread-local storage may be released from another thread
+        conn = configure(sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, check_same_thread=False))
+        connections[key] = conn
+    return conn
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection, immediate: bool = True):
+    """One explicit transaction around a batch of statements: commit on success, roll back on error.
+
+    BEGIN IMMEDIATE takes the write lock up front so a batch never fails half way
+    on a lock upgrade. Nested use joins the outer transaction.
+    """
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def close_shared_connections():
+    """Close the calling thread's shared connections; the next shared_connection() call reopens them."""
+    holder = getattr(_local, 'holder', None)
+    if holder is not None:
+        holder.close()
+
+
+atexit.register(close_shared_connections)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Compact, read-only snapshots of broken_links.db for publishing to gh-pages.
+
+The working database carries things only the nightly writer needs: the
+response_time and timestamp columns, the urls region/path_hash columns and
+their indexes, the UNIQUE index on urls.url, idx_broken_links_url_id, the
+daily_summary rollup and free pages. export_snapshot() builds a fresh
+single-file database with only what the report reads back:
+
+  broken_links(run_date, region, url_id, status, error_message)  -- keyed as in the working DB
+  urls(id, url)                                                  -- only URLs some snapshot references
+  snapshot_runs(run_date)                                        -- every run, including ones with no broken links
+
+The file is written in rollback-journal mode (no -wal/-shm side files), has
+no free pages because it is built from scratch, is marked with
+PRAGMA user_version = SNAPSHOT_FORMAT, and can be gzip or xz compressed.
+restore_snapshot() turns it back into a working broken_links.db, recomputing
+the derived columns, indexes and daily_summary. Snapshot files are only meant
+to be opened through restore_snapshot(), not with broken_links_db.connect().
+
+Usage:
+  python db_snapshot.py export --db broken_links.db --output data/broken_links.snapshot.db.gz
+  python db_snapshot.py restore data/broken_links.snapshot.db.gz --db broken_links.db
+"""
+
+import argparse
+import gzip
+import lzma
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import broken_links_db
+
+SNAPSHOT_FORMAT = 1  # PRAGMA user_version of export files; working databases have 0
+COMPRESSORS = {'.gz': gzip.open, '.xz': lzma.open}
+COPY_CHUNK = 1024 * 1024
+
+SNAPSHOT_SCHEMA = (
+    "CREATE TABLE urls (id INTEGER PRIMARY KEY, url TEXT NOT NULL)",
+    """CREATE TABLE broken_links (
+        run_date TEXT NOT NULL,
+        region TEXT NOT NULL,
+        url_id INTEGER NOT NULL,
+        status INTEGER,
+        error_message TEXT,
+        PRIMARY KEY (run_date, region, url_id)
+    ) WITHOUT ROWID""",
+    "CREATE TABLE snapshot_runs (run_date TEXT PRIMARY KEY) WITHOUT ROWID",
+)
+
+
+def _compressor(path: str):
+    return COMPRESSORS.get(os.path.splitext(path)[1].lower())
+
+
+def export_snapshot(db_path: str, output_path: str) -> dict:
+    """Write the compact snapshot of db_path to output_path (.gz/.xz compress it); returns row counts and size."""
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database not found: {db_path}")
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    fd, build_path = tempfile.mkstemp(suffix='.db', dir=output_dir)
+    os.close(fd)
+    try:
+        # Through broken_links_db.connect() first so older layouts are migrated before copying
+        broken_links_db.connect(db_path).close()
+        conn = sqlite3.connect(build_path)
+        try:
+            conn.execute("PRAGMA journal_mode = DELETE")
+            conn.execute("PRAGMA page_size = 4096")
+            conn.execute("ATTACH DATABASE ? AS source", (os.path.abspath(db_path),))
+            with conn:
+                for statement in SNAPSHOT_SCHEMA:
+                    conn.execute(statement)
+                # Primary-key order fills the B-trees sequentially, leaving pages full
+                conn.execute("""INSERT INTO broken_links
+                                SELECT run_date, region, url_id, status, error_message FROM source.broken_links
+                                ORDER BY run_date, region, url_id""")
+                conn.execute("""INSERT INTO urls
+                                SELECT id, url FROM source.urls
+                                WHERE EXISTS (SELECT 1 FROM source.broken_links WHERE source.broken_links.url_id = urls.id)
+                                ORDER BY id""")
+                conn.execute("INSERT INTO snapshot_runs SELECT run_date FROM source.snapshot_runs ORDER BY run_date")
+            conn.execute("DETACH DATABASE source")
+            conn.execute(f"PRAGMA user_version = {SNAPSHOT_FORMAT}")
+            counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in ('broken_links', 'urls', 'snapshot_runs')}
+        finally:
+            conn.close()
+
+        compressor = _compressor(output_path)
+        if compressor:
+            tmp_output = build_path + os.path.splitext(output_path)[1]
+            with open(build_path, 'rb') as source, compressor(tmp_output, 'wb') as target:
+                shutil.copyfileobj(source, target, COPY_CHUNK)
+            os.replace(tmp_output, output_path)
+        else:
+            os.replace(build_path, output_path)
+        os.chmod(output_path, 0o444)  # Published copy is read-only
+    finally:
+        if os.path.exists(build_path):
+            os.remove(build_path)
+    counts['bytes'] = os.path.getsize(output_path)
+    return counts
+
+
+def _is_snapshot(path: str) -> bool:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0] == SNAPSHOT_FORMAT
+    finally:
+        conn.close()
+
+
+def _replace_database(source: str, db_path: str):
+    """Move source over db_path, dropping db_path's WAL side files so they are not replayed onto it."""
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    os.replace(source, db_path)
+
+
+def restore_snapshot(snapshot_path: str, db_path: str) -> dict:
+    """Rebuild a working broken_links.db at db_path from an export (compressed or not); returns row counts.
+
+    Full database files (e.g. copies published before snapshots existed) are copied as they are.
+    """
+    target_dir = os.path.dirname(os.path.abspath(db_path))
+    fd, plain_path = tempfile.mkstemp(suffix='.db', dir=target_dir)
+    os.close(fd)
+    build_path = plain_path + '.restore'
+    try:
+        compressor = _compressor(snapshot_path)
+        with (compressor(snapshot_path, 'rb') if compressor else open(snapshot_path, 'rb')) as source, \
+                open(plain_path, 'wb') as target:
+            shutil.copyfileobj(source, target, COPY_CHUNK)
+        os.chmod(plain_path, 0o644)
+
+        if not _is_snapshot(plain_path):
+            _replace_database(plain_path, db_path)
+            conn = broken_links_db.connect(db_path)  # Migrates older layouts
+        else:
+            conn = broken_links_db.connect(build_path)  # Full working schema, indexes included
+            conn.execute("ATTACH DATABASE ? AS snapshot", (plain_path,))
+            with conn:
+                conn.execute("""INSERT INTO urls (id, url, region, path_hash)
+                                SELECT id, url, url_region(url), url_path_hash(url) FROM snapshot.urls""")
+                conn.execute("""INSERT INTO broken_links (run_date, region, url_id, status, error_message)
+                                SELECT run_date, region, url_id, status, error_message FROM snapshot.broken_links""")
+                # Snapshots exported before snapshot_runs was added get it from broken_links in rebuild_daily_summary()
+                if conn.execute("SELECT 1 FROM snapshot.sqlite_master WHERE type='table' AND name = 'snapshot_runs'").fetchone():
+                    conn.execute("INSERT INTO snapshot_runs (run_date) SELECT run_date FROM snapshot.snapshot_runs")
+            conn.execute("DETACH DATABASE snapshot")
+            broken_links_db.rebuild_daily_summary(conn)
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ('broken_links', 'urls', 'daily_summary', 'snapshot_runs')}
+        conn.close()
+        if os.path.exists(build_path):
+            _replace_database(build_path, db_path)
+    finally:
+        for path in (plain_path, build_path, build_path + '-wal', build_path + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or restore compact broken_links.db snapshots")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Write a compact read-only snapshot")
+    export_parser.add_argument('--db', default='broken_links.db', help="Working database (default: broken_links.db)")
+    export_parser.add_argument('--output', required=True,
+                               help="Snapshot path; a .gz or .xz suffix compresses it")
+
+    restore_parser = subparsers.add_parser('restore', help="Rebuild a working database from a snapshot")
+    restore_parser.add_argument('snapshot', help="Snapshot written by export (or a full database copy)")
+    restore_parser.add_argument('--db', default='broken_links.db', help="Database to create (default: broken_links.db)")
+
+    args = parser.parse_args()
+    if args.command == 'export':
+        source_bytes = os.path.getsize(args.db) if os.path.exists(args.db) else 0
+        result = export_snapshot(args.db, args.output)
+        print(f"📦 Exported {result['broken_links']} broken links and {result['urls']} URLs to {args.output}: "
+              f"{result['bytes'] / 1024 / 1024:.1f} MiB (working DB {source_bytes / 1024 / 1024:.1f} MiB)")
+    else:
+        result = restore_snapshot(args.snapshot, args.db)
+        print(f"♻️ Restored {args.db} from {args.snapshot}: {result['broken_links']} broken links, "
+              f"{result['urls']} URLs, {result['daily_summary']} summary rows, {result['snapshot_runs']} runs")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,10 @@
 #!/usr/bin/env python3
-"""Enforce 60-day retention policy on broken_links.db historical tables."""
+"""Enforce the 60-day retention policy on broken_links.db (see retention.py for every store)."""
 
-import os
-import sqlite3
-from datetime import date, timedelta, datetime
+from retention import POLICIES, enforce_store
 
-db_path = 'broken_links.db'
-if not os.path.exists(db_path):
+result = enforce_store('broken_links')
+if result is None:
     raise SystemExit('broken_links.db not found; skipping retention enforcement')
-
-conn = sqlite3.connect(db_path)
-cur = conn.cursor()
-cutoff = date.today() - timedelta(days=60)
-
-cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'broken_links_%'")
-tables = [row[0] for row in cur.fetchall()]
-
-dropped = 0
-for table in tables:
-    suffix = table.replace('broken_links_', '')
-    try:
-        table_date = datetime.strptime(suffix, '%Y_%m_%d').date()
-    except ValueError:
-        continue
-    if table_date < cutoff:
-        print(f"Dropping historical table {table} older than 60 days")
-        cur.execute(f"DROP TABLE IF EXISTS {table}")
-        dropped += 1
-
-conn.commit()
-conn.close()
-print(f"Retention enforcement complete; dropped {dropped} tables")
+print(f"Retention enforcement complete; deleted {result.deleted.get('broken_links', 0)} rows older than "
+      f"{POLICIES['broken_links'].keep_days} days, reclaimed {result.freed_bytes / 1024 / 1024:.1f} MiB")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+HTTP transports for the AU/NZ link checkers.
+
+The default transport is a requests.Session over HTTP/1.1, where every
+in-flight request to the CDN needs its own TCP+TLS connection. Http2Session
+is an optional drop-in replacement built on httpx that multiplexes many
+concurrent requests over a handful of HTTP/2 connections.
+
+Both transports expose connection-setup metrics via connection_metrics() so
+the saving in TCP connects and TLS handshakes can be verified per run.
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Request settings shared by au_link_checker.py, nz_link_checker.py and url_checker.py
+MAX_CONNECTIONS = 100
+REQUEST_TIMEOUT = 3
+MAX_RETRIES = 2
+RATE_LIMIT = 0.1
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+KEEPALIVE_EXPIRY = 30  # Seconds an idle HTTP/2 connection is kept open for reuse
+
+
+def build_session(user_agent, max_connections, max_retries, backoff_factor=0.1):
+    """Build the HTTP/1.1 requests.Session used by the crawlers."""
+    session = requests.Session()
+    session.headers.update({'User-Agent': user_agent})
+    retry_strategy = Retry(total=max_retries, backoff_factor=backoff_factor, status_forcelist=list(RETRY_STATUS_CODES))
+    adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=max_connections, pool_maxsize=max_connections)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class ConnectionMetrics:
+    """Thread-safe counters fed by httpcore's per-request trace callback."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+        self.requests = 0
+        self.tcp_connects = 0
+        self.tls_handshakes = 0
+        self.connect_seconds = 0.0
+        self.tls_seconds = 0.0
+
+    def trace(self, event_name, info):
+        key = (threading.get_ident(), event_name.rsplit('.', 1)[0])
+        if event_name.endswith('.started'):
+            self._started[key] = time.perf_counter()
+            return
+        if not event_name.endswith('.complete'):
+            return
+        elapsed = time.perf_counter() - self._started.pop(key, time.perf_counter())
+        with self._lock:
+            if event_name == 'connection.connect_tcp.complete':
+                self.tcp_connects += 1
+                self.connect_seconds += elapsed
+            elif event_name == 'connection.start_tls.complete':
+                self.tls_handshakes += 1
+                self.tls_seconds += elapsed
+            elif event_name in ('http11.send_request_headers.complete', 'http2.send_request_headers.complete'):
+                self.requests += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'transport': 'http2',
+                'requests': self.requests,
+                'connections': self.tcp_connects,
+                'tls_handshakes': self.tls_handshakes,
+                'connect_seconds': round(self.connect_seconds, 3),
+                'tls_seconds': round(self.tls_seconds, 3),
+            }
+
+
+class Http2Session:
+    """Minimal requests.Session look-alike backed by an HTTP/2 httpx.Client.
+
+    Only the subset used by the crawlers is implemented: get()/head() returning
+    a response with status_code/text, raising requests exceptions on failure,
+    and retrying RETRY_STATUS_CODES with the same backoff as the urllib3 Retry.
+    """
+
+    def __init__(self, user_agent, max_connections, max_retries, backoff_factor=0.1, max_redirects=20):
+        if httpx is None:
+            raise ImportError("HTTP/2 transport requires httpx: pip install 'httpx[http2]'")
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.metrics = ConnectionMetrics()
+        limits = httpx.Limits(max_connections=max_connections,
+                              max_keepalive_connections=max_connections,
+                              keepalive_expiry=KEEPALIVE_EXPIRY)
+        # Connection limits and HTTP/2 are set on the transport; httpx.Client ignores its own when transport= is given
+        self.client = httpx.Client(
+            headers={'User-Agent': user_agent},
+            max_redirects=max_redirects,
+            transport=httpx.HTTPTransport(http2=True, limits=limits, retries=max_retries),
+            event_hooks={'request': [self._attach_trace]},
+        )
+        self.headers = self.client.headers
+
+    def _attach_trace(self, request):
+        request.extensions['trace'] = self.metrics.trace
+
+    def get(self, url, timeout=None, allow_redirects=True):
+        return self.request('GET', url, timeout=timeout, allow_redirects=allow_redirects)
+
+    def head(self, url, timeout=None, allow_redirects=False):
+        return self.request('HEAD', url, timeout=timeout, allow_redirects=allow_redirects)
+
+    def request(self, method, url, timeout=None, allow_redirects=True):
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.request(method, url, timeout=timeout, follow_redirects=allow_redirects)
+            except httpx.TimeoutException as e:
+                raise requests.Timeout(f"{url}: {e}") from e
+            except httpx.TooManyRedirects as e:
+                raise requests.TooManyRedirects(f"{url}: {e}") from e
+            except httpx.InvalidURL as e:  # Not an httpx.HTTPError
+                raise requests.exceptions.InvalidURL(f"{url}: {e}") from e
+            except httpx.UnsupportedProtocol as e:
+                raise requests.exceptions.InvalidSchema(f"{url}: {e}") from e
+            except httpx.HTTPError as e:
+                raise requests.ConnectionError(f"{url}: {e}") from e
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                time.sleep(self.backoff_factor * (2 ** attempt))
+                continue
+            return response
+
+    def close(self):
+        self.client.close()
+
+
+def connection_metrics(session):
+    """Return request/connection counts for either transport."""
+    if isinstance(session, Http2Session):
+        return session.metrics.as_dict()
+
+    requests_sent = 0
+    connections = 0
+    # http:// and https:// share one adapter; count each pool manager once
+    for adapter in {id(a): a for a in session.adapters.values()}.values():
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_sent += pool.num_requests
+            connections += pool.num_connections
+    return {'transport': 'http1.1', 'requests': requests_sent, 'connections': connections}
+
+
+def format_connection_metrics(session):
+    metrics = connection_metrics(session)
+    summary = (f"Connection metrics ({metrics['transport']}): {metrics['requests']} requests over "
+               f"{metrics['connections']} connections")
+    if 'tls_handshakes' in metrics:
+        summary += (f", {metrics['tls_handshakes']} TLS handshakes "
+                    f"(connect {metrics['connect_seconds']}s, TLS {metrics['tls_seconds']}s)")
+    return summary
@@ -426,11 +426,14 @@ def _fetch_nrql(headers, base_url, nrql):
     return make_api_request(headers, payload, base_url)
 
 
-def _read_broken_links_urls(script_dir):
+def _read_broken_links_urls(script_dir=None):
     """
     Read broken links URLs from AU and NZ link check results CSV files.
     Only includes URLs with Status >= 400 (broken links) that are actually shown in the AU and NZ tabs.
+    The files are read from script_dir, by default the directory of this script.
     """
+    if script_dir is None:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
     urls = set()
     # Read from the actual broken links CSV files that contain the data shown in AU and NZ tabs
     csv_files = [
@@ -616,43 +619,24 @@ def make_api_request(headers, payload, base_url):
         print(f"❌ Unexpected error: {e}")
         return None
 
-def main():
+def collect_page_views_data(script_dir=None):
     """
-    Main function to process New Relic data and generate HTML
+    Query New Relic for the Page Views tab and return the results as plain data:
+
+        {'top_products': [{'url', 'count'}, ...], 'top_pages': [...],
+         'broken_links_views': [...], 'total_views_30d': int}
+
+    script_dir is where au_broken_links.csv / nz_broken_links.csv are read
+    from (default: this script's directory). Returns None when the New Relic
+    environment variables are not configured. report_generator.py calls this
+    in-process and renders the tab itself.
     """
-    import os
-    
-    # Get the directory where this script is located
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    
     # Get headers and payload dynamically
     headers, payload, base_url = get_dynamic_headers_and_payload()
     
     # Check if environment variables are configured
     if headers is None:
-        fallback_html = '''
-        <div class="card">
-            <h3>📊 Page Views Data</h3>
-            <div class="info-message">
-                <p><strong>New Relic Configuration Required</strong></p>
-                <p>To display page views data, please configure the following environment variables:</p>
-                <ul>
-                    <li><code>NEWRELIC_BASE_URL</code></li>
-                    <li><code>NEWRELIC_ACCOUNT_ID</code></li>
-                    <li><code>NEWRELIC_COOKIE</code></li>
-                </ul>
-                <p>Once configured, regenerate the report to see page views analytics.</p>
-            </div>
-        </div>
-        '''
-        
-        # Write fallback content to file
-        output_file = os.path.join(script_dir, 'page_views_content.html')
-        with open(output_file, 'w', encoding='utf-8', errors='ignore') as f:
-            f.write(fallback_html)
-        
-        print("Generated fallback page views content due to missing New Relic configuration.")
-        return fallback_html
+        return None
     
     print(f"Configured request with {len(headers)} headers")
     print(f"Current date/time: {datetime.now()}")
@@ -786,12 +770,45 @@ def main():
     print(f"\n✅ Aggregated view counts for {len(broken_links_views)} broken link URLs (using live API data)")
     print(f"{'='*60}\n")
 
-    # Limit sizes for rendering - removed for infinite scroll
-    # top_products = top_products[:50]
-    # top_pages = top_pages[:50]
+    # Summary of API call results
+    print("\n📊 API Call Summary:")
+    print(f"   🛍️ Top Products: {len(top_products)} found")
+    print(f"   📄 Top Pages: {len(top_pages)} found")
+    print(f"   🔗 Broken Links Checked: {len(all_urls)} URLs")
+    
+    if len(top_products) == 0 and len(top_pages) == 0:
+        print("\n⚠️ No data retrieved from New Relic API")
+        print("   This is likely due to the SSL module issue preventing HTTPS requests")
+        print("   See TROUBLESHOOTING_PAGE_VIEWS.md for solutions")
+    else:
+        print("\n✅ Successfully retrieved data from New Relic API")
+
+    # Print preview of top 5 products
+    for i, product in enumerate(top_products[:5], 1):
+        print(f"{i}. {product['url']} - {product['count']:,} views")
+    
+    return {
+        'top_products': top_products,
+        'top_pages': top_pages,
+        'broken_links_views': broken_links_views,
+        'total_views_30d': total_views_30d,
+    }
 
-    # Generate combined Page Views HTML
-    page_views_html = build_page_views_container_html(top_products, top_pages, broken_links_views, total_views_30d)
+
+def main():
+    """
+    Main function to process New Relic data and generate HTML
+    """
+    # Get the directory where this script is located
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    data = collect_page_views_data(script_dir)
+    if data is None:
+        print("Generated fallback page views content due to missing New Relic configuration.")
+
+    # Generate combined Page Views HTML with the report's renderer
+    from report_generator import render_page_views_html
+    page_views_html = render_page_views_html(data)
 
     # Save HTML content to file with proper encoding handling
     output_file = os.path.join(script_dir, 'page_views_content.html')
@@ -811,23 +828,6 @@ def main():
     except Exception as e:
         print(f"Warning: could not write legacy file {legacy_output}: {e}")
     
-    # Summary of API call results
-    print("\n📊 API Call Summary:")
-    print(f"   🛍️ Top Products: {len(top_products)} found")
-    print(f"   📄 Top Pages: {len(top_pages)} found")
-    print(f"   🔗 Broken Links Checked: {len(all_urls)} URLs")
-    
-    if len(top_products) == 0 and len(top_pages) == 0:
-        print("\n⚠️ No data retrieved from New Relic API")
-        print("   This is likely due to the SSL module issue preventing HTTPS requests")
-        print("   See TROUBLESHOOTING_PAGE_VIEWS.md for solutions")
-    else:
-        print("\n✅ Successfully retrieved data from New Relic API")
-
-    # Print preview of top 5 products
-    for i, product in enumerate(top_products[:5], 1):
-        print(f"{i}. {product['url']} - {product['count']:,} views")
-    
     return page_views_html
 
 if __name__ == "__main__":
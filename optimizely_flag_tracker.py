@@ -1,11 +1,12 @@
 import requests
-import sqlite3
 import json
 import os
 from datetime import datetime
 
+from db_connection import shared_connection, transaction
+
 def create_optimizely_flags_table(db_path='optimizely_flags.db'):
-    conn = sqlite3.connect(db_path)
+    conn = shared_connection(db_path)
     cur = conn.cursor()
     cur.execute('''
     CREATE TABLE IF NOT EXISTS optimizely_flags (
@@ -17,53 +18,44 @@ def create_optimizely_flags_table(db_path='optimizely_flags.db'):
     )
     ''')
     conn.commit()
-    conn.close()
 
-def get_existing_flag_ids(db_path='optimizely_flags.db'):
-    def get_all_flag_names(db_path='optimizely_flags.db'):
-        conn = sqlite3.connect(db_path)
-        cur = conn.cursor()
-        cur.execute('SELECT flag_name FROM optimizely_flags')
-        rows = cur.fetchall()
-        conn.close()
-        return [row[0] for row in rows]
+def get_all_flag_names(db_path='optimizely_flags.db'):
+    cur = shared_connection(db_path).cursor()
+    cur.execute('SELECT flag_name FROM optimizely_flags')
+    return [row[0] for row in cur.fetchall()]
 
-    def fetch_flag_details(flag_name):
-        url = f"https://api.app.optimizely.com/flags/projects/17801440189/flags/{flag_name}"
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"Failed to fetch details for flag {flag_name}: {response.status_code}")
-                return None
-        except Exception as e:
-            print(f"Error fetching flag details for {flag_name}: {e}")
+def fetch_flag_details(flag_name):
+    url = f"https://api.app.optimizely.com/flags/projects/17801440189/flags/{flag_name}"
+    try:
+        response = requests.get(url)
+        if response.status_code == 200:
+            return response.json()
+        else:
+            print(f"Failed to fetch details for flag {flag_name}: {response.status_code}")
             return None
+    except Exception as e:
+        print(f"Error fetching flag details for {flag_name}: {e}")
+        return None
 
-    def update_flag_details_in_db(flag_name, details, db_path='optimizely_flags.db'):
-        conn = sqlite3.connect(db_path)
-        cur = conn.cursor()
-        updated_time = details.get('updated_time', None)
-        cur.execute('UPDATE optimizely_flags SET updated_time=? WHERE flag_name=?', (updated_time, flag_name))
-        conn.commit()
-        conn.close()
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
+def update_flag_details_in_db(flag_details, db_path='optimizely_flags.db'):
+    """Write updated_time for many flags in one transaction; flag_details maps flag_name -> details."""
+    conn = shared_connection(db_path)
+    with transaction(conn):
+        conn.executemany('UPDATE optimizely_flags SET updated_time=? WHERE flag_name=?',
+                         [(details.get('updated_time', None), flag_name) for flag_name, details in flag_details.items()])
+
+def get_existing_flag_ids(db_path='optimizely_flags.db'):
+    cur = shared_connection(db_path).cursor()
     cur.execute('SELECT flag_id FROM optimizely_flags')
-    rows = cur.fetchall()
-    conn.close()
-    return set(row[0] for row in rows)
+    return set(row[0] for row in cur.fetchall())
 
 def insert_new_flags(flags, db_path='optimizely_flags.db'):
     create_optimizely_flags_table(db_path)
     existing_ids = get_existing_flag_ids(db_path)
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
+    conn = shared_connection(db_path)
     new_flags = [(f['id'], f['name'], datetime.utcnow().isoformat() + 'Z', f.get('updated_time', None)) for f in flags if f['id'] not in existing_ids]
-    cur.executemany('INSERT INTO optimizely_flags (flag_id, flag_name, first_seen, updated_time) VALUES (?, ?, ?, ?)', new_flags)
-    conn.commit()
-    conn.close()
+    with transaction(conn):
+        conn.executemany('INSERT INTO optimizely_flags (flag_id, flag_name, first_seen, updated_time) VALUES (?, ?, ?, ?)', new_flags)
     return new_flags
 
 def load_flags_from_json(json_path):
@@ -72,12 +64,6 @@ def load_flags_from_json(json_path):
     return data['items']
 
 def main():
-        # Fetch and update details for all flags
-        flag_names = get_all_flag_names(db_path)
-        for flag_name in flag_names:
-            details = fetch_flag_details(flag_name)
-            if details:
-                update_flag_details_in_db(flag_name, details, db_path)
     json_path = 'kmart.json'
     db_path = 'optimizely_flags.db'
     flags = load_flags_from_json(json_path)
@@ -89,5 +75,13 @@ def main():
     else:
         print("No new flags found.")
 
+    # Fetch and update details for all flags
+    flag_details = {}
+    for flag_name in get_all_flag_names(db_path):
+        details = fetch_flag_details(flag_name)
+        if details:
+            flag_details[flag_name] = details
+    update_flag_details_in_db(flag_details, db_path)
+
 if __name__ == '__main__':
     main()
@@ -14,10 +14,15 @@ import logging
 from datetime import datetime
 import os
 
+import url_dictionary
+from db_connection import shared_connection, transaction
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+PRODUCT_STORE_BATCH_SIZE = 50  # Products written per transaction by process_csv_file
+
 class ProductAvailabilityManager:
     def __init__(self, db_path: str = "product_availability.db"):
         self.db_path = db_path
@@ -63,7 +68,7 @@ class ProductAvailabilityManager:
     def init_database(self):
         """Initialize the database and create the products-in-links table."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = shared_connection(self.db_path)
             cursor = conn.cursor()
             
             # Create the products-in-links table
@@ -82,14 +87,38 @@ class ProductAvailabilityManager:
                 CREATE INDEX IF NOT EXISTS idx_sku ON "products-in-links" (SKU)
             """)
             
+            # broken_url is stored as an id into the shared urls dictionary instead of inside DETAILS
+            url_dictionary.ensure_url_table(conn)
+            columns = {row[1] for row in cursor.execute('PRAGMA table_info("products-in-links")')}
+            if 'url_id' not in columns:
+                cursor.execute('ALTER TABLE "products-in-links" ADD COLUMN url_id INTEGER REFERENCES urls (id)')
+            self._intern_broken_urls(conn)
+            
             conn.commit()
-            conn.close()
             logger.info(f"Database initialized successfully at {self.db_path}")
             
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
             raise
     
+    def _intern_broken_urls(self, conn: sqlite3.Connection):
+        """Move broken_url out of DETAILS JSON written by older versions into url_id."""
+        rows = conn.execute("""
+            SELECT ID, broken_url FROM (
+                SELECT ID, CASE WHEN json_valid(DETAILS) THEN json_extract(DETAILS, '$.broken_url') END AS broken_url
+                FROM "products-in-links" WHERE url_id IS NULL
+            ) WHERE broken_url IS NOT NULL
+        """).fetchall()
+        rows = [(row_id, url) for row_id, url in rows if isinstance(url, str)]
+        if not rows:
+            return
+        url_ids = url_dictionary.resolve_url_ids(conn, [url for _, url in rows])
+        conn.executemany(
+            """UPDATE "products-in-links" SET url_id = ?, DETAILS = json_remove(DETAILS, '$.broken_url') WHERE ID = ?""",
+            [(url_ids[url], row_id) for row_id, url in rows]
+        )
+        logger.info(f"Moved broken_url of {len(rows)} products into the urls dictionary")
+    
     def extract_product_ids_from_csv(self, csv_path: str) -> List[str]:
         """Extract product IDs from broken links in the CSV file."""
         product_ids = []
@@ -332,42 +361,50 @@ class ProductAvailabilityManager:
     
     def store_product_data(self, sku: str, details: Dict) -> bool:
         """Store product data in the database."""
+        return self.store_products([(sku, details)]) == 1
+    
+    def store_products(self, products: List[Tuple[str, Dict]]) -> int:
+        """Store (sku, details) pairs in one transaction; returns the number stored.
+
+        details['broken_url'] is stored as url_id; get_all_products() puts it back.
+        """
+        if not products:
+            return 0
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            details_json = json.dumps(details, indent=2)
+            conn = shared_connection(self.db_path)
+            rows = []
+            for sku, details in products:
+                details = dict(details)
+                rows.append((sku, details.pop("broken_url", None), json.dumps(details, indent=2)))
             
-            # Insert or update product data
-            cursor.execute("""
-                INSERT OR REPLACE INTO "products-in-links" (SKU, DETAILS, updated_at)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-            """, (sku, details_json))
+            with transaction(conn):
+                url_ids = url_dictionary.resolve_url_ids(conn, [broken_url for _, broken_url, _ in rows])
+                # Insert or update product data
+                conn.executemany("""
+                    INSERT OR REPLACE INTO "products-in-links" (SKU, DETAILS, url_id, updated_at)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                """, [(sku, details_json, url_ids.get(broken_url)) for sku, broken_url, details_json in rows])
             
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"Stored product data for SKU: {sku}")
-            return True
+            logger.info(f"Stored product data for SKUs: {', '.join(sku for sku, _, _ in rows)}")
+            return len(rows)
             
         except Exception as e:
-            logger.error(f"Error storing product data for SKU {sku}: {e}")
-            return False
+            logger.error(f"Error storing product data for SKUs {[sku for sku, _ in products]}: {e}")
+            return 0
     
     def get_all_products(self) -> List[Dict]:
         """Retrieve all products from the database."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = shared_connection(self.db_path).cursor()
             
             cursor.execute("""
-                SELECT ID, SKU, DETAILS, created_at, updated_at 
-                FROM "products-in-links" 
-                ORDER BY updated_at DESC
+                SELECT p.ID, p.SKU, p.DETAILS, p.created_at, p.updated_at, urls.url
+                FROM "products-in-links" AS p
+                LEFT JOIN urls ON urls.id = p.url_id
+                ORDER BY p.updated_at DESC
             """)
             
             rows = cursor.fetchall()
-            conn.close()
             
             products = []
             for row in rows:
@@ -375,6 +412,8 @@ class ProductAvailabilityManager:
                     details = json.loads(row[2])
                 except json.JSONDecodeError:
                     details = {"error": "Invalid JSON data"}
+                if row[5] is not None and isinstance(details, dict):
+                    details["broken_url"] = row[5]
                 
                 products.append({
                     "id": row[0],
@@ -404,6 +443,8 @@ class ProductAvailabilityManager:
             "successful_attributes": 0,
             "stored_products": 0
         }
+        # Fetched products are written PRODUCT_STORE_BATCH_SIZE at a time in one transaction each
+        pending = {}
         
         for i, url in enumerate(broken_links, 1):
             logger.info(f"Processing broken link {i}/{len(broken_links)}: {url}")
@@ -416,7 +457,7 @@ class ProductAvailabilityManager:
                 logger.info(f"Processing product ID: {product_id}")
                 
                 # Check if product already exists in database
-                existing_product = self.get_product_by_sku(product_id)
+                existing_product = product_id in pending or self.get_product_by_sku(product_id)
                 if existing_product:
                     logger.info(f"Product {product_id} already exists in database")
                     continue
@@ -443,9 +484,12 @@ class ProductAvailabilityManager:
                                 "processed_at": datetime.now().isoformat()
                             }
                             
-                            if self.store_product_data(product_id, combined_data):
-                                stats["stored_products"] += 1
+                            pending[product_id] = combined_data
+                            if len(pending) >= PRODUCT_STORE_BATCH_SIZE:
+                                stats["stored_products"] += self.store_products(list(pending.items()))
+                                pending.clear()
         
+        stats["stored_products"] += self.store_products(list(pending.items()))
         logger.info(f"Processing complete. Stats: {stats}")
         return stats
     
@@ -476,15 +520,12 @@ class ProductAvailabilityManager:
     def get_product_by_sku(self, sku: str) -> Optional[Tuple]:
         """Retrieve a product from database by SKU."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = shared_connection(self.db_path).cursor()
             cursor.execute(
                 'SELECT ID, SKU, DETAILS, created_at, updated_at FROM "products-in-links" WHERE SKU = ?',
                 (sku,)
             )
-            result = cursor.fetchone()
-            conn.close()
-            return result
+            return cursor.fetchone()
         except Exception as e:
             logger.error(f"Error retrieving product by SKU {sku}: {e}")
             return None
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Helpers for the targeted recheck mode of the AU/NZ link checkers.
+
+Loads the URLs recorded in the most recent daily broken-links snapshot in
+broken_links.db so that only those URLs need to be revalidated, instead of
+re-crawling the whole site.
+"""
+
+import os
+
+from broken_links_db import connect, latest_snapshot_date, load_snapshot_urls
+
+
+def load_broken_urls(db_path: str, region: str) -> list[str]:
+    """Load the distinct URLs for a region from the latest broken links snapshot."""
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database not found: {db_path}")
+
+    conn = connect(db_path)
+    try:
+        latest = latest_snapshot_date(conn)
+        if latest is None:
+            print(f"⚠️ No broken link snapshots found in {db_path}")
+            return []
+        urls = load_snapshot_urls(conn, latest, region)
+        print(f"Loaded {len(urls)} {region} URLs from the {latest} snapshot for recheck")
+        return urls
+    finally:
+        conn.close()
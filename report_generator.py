@@ -1,60 +1,225 @@
 import pandas as pd
+import numpy as np
 import argparse
+import csv
 import html
 import os
 import sqlite3
-import subprocess
-import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta, datetime
 import plotly.graph_objects as go
 import plotly.express as px
-import networkx as nx
 import json
-from urllib.parse import urlparse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+import broken_links_db
+import retention
+from section_cache import SectionCache, file_fingerprint, sqlite_fingerprint
 
 # Security Note: The HTML is generated by embedding data directly. 
 # While the data (URLs, paths, statuses) is generally from crawling trusted sites or self-generated,
 # for broader applications, using a templating engine (like Jinja2) would be a safer practice 
 # to prevent potential XSS if data sources were less controlled.
 
+def _escape_column(values):
+    """HTML-escape a whole column at once (same output as html.escape(str(v)) per cell).
+
+    Each distinct value is escaped once and broadcast back with a NumPy take, so
+    repetitive columns (Status, Timestamp, Error_Message) cost almost nothing.
+    """
+    codes, uniques = pd.factorize(values.astype(str))
+    escaped = np.array([html.escape(v) for v in uniques], dtype=object)
+    return escaped.take(codes)
+
+def _row_classes(df):
+    """Compute the ok/redirect/error row class for every row from the Status column."""
+    if 'Status' not in df.columns:
+        return np.full(len(df), 'error', dtype=object)
+    status = pd.to_numeric(df['Status'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    status = np.trunc(np.where(np.isfinite(status), status, 0))
+    return np.select([status == 200, (status >= 300) & (status < 400)], ['ok', 'redirect'], default='error').astype(object)
+
 def generate_html_table_from_df(df, table_id):
     """Generates an HTML table string from a pandas DataFrame for use with DataTables."""
     if df.empty:
         return f"<p>No data available for {table_id.replace('Table', '')}.</p>"
 
-    table_html = f'''
+    table_html = [f'''
     <table id="{table_id}" class="display" style="width:100%">
         <thead>
             <tr>{''.join(f'<th>{col}</th>' for col in df.columns)}</tr>
             <tr class="filters">{''.join("<th><input type='text' placeholder='Filter ...' style='width: 90%;' /></th>" for _ in df.columns)}</tr>
         </thead>
         <tbody>
-'''
-    for _, row in df.iterrows():
-        status_val = row.get("Status", "N/A") # Get status, default to N/A if not present
-        try:
-            status = int(float(status_val)) if pd.notna(status_val) else 0
-        except ValueError:
-            status = 0 # Default for non-integer statuses
-
-        cls = "ok" if status == 200 else "redirect" if 300 <= status < 400 else "error"
-        table_html += f"<tr class='{cls}'>"
-        for col, val in row.items():
-            # Ensure HTML special characters in data are escaped to prevent XSS. Pandas to_html does this by default.
-            # Here, we are manually creating cells, so care is needed. For URLs, it's common to allow them as hrefs.
-            # For other text, escaping would be important if it could come from untrusted input.
-            # Given the source of this data, direct embedding is lower risk but not best practice.
-            escaped_val = html.escape(str(val))
-            if col == "URL":
-                table_html += f"<td><a href='{escaped_val}' target='_blank'>{escaped_val}</a></td>"
-            else:
-                table_html += f"<td>{escaped_val}</td>"
-        table_html += "</tr>"
-    table_html += """
+''']
+    # Rows are built column-wise: escape each column once, wrap it in <td>, then
+    # concatenate the columns element-wise and join all rows in a single pass.
+    # Cell values are taken from df.values so dtype upcasting matches iterrows().
+    values = df.values
+    rows = "<tr class='" + _row_classes(df) + "'>"
+    for i, col in enumerate(df.columns):
+        escaped = _escape_column(values[:, i])
+        if col == "URL":
+            rows = rows + "<td><a href='" + escaped + "' target='_blank'>" + escaped + "</a></td>"
+        else:
+            rows = rows + "<td>" + escaped + "</td>"
+    table_html.append("</tr>".join(rows) + "</tr>")
+    table_html.append("""
         </tbody>
     </table>
-"""
-    return table_html
+""")
+    return ''.join(table_html)
+
+# --table-data modes: 'html' inlines every row as <tr> markup; 'json' embeds the rows as a
+# compact JSON block and 'sidecar' writes them to <table_id>.json next to the report. In both
+# JSON modes DataTables builds row nodes with deferRender only for the page being displayed.
+TABLE_DATA_MODES = ('html', 'json', 'sidecar')
+
+# Highlight for product date attributes that are already in the past
+EXPIRED_DATE_STYLE = ' style="background-color: #fee2e2; color: #dc2626; padding: 2px 4px; border-radius: 3px; font-weight: 600;"'
+# Formats tried in order for EndDate and other "...Date" product attributes
+PRODUCT_DATE_FORMATS = ('%Y-%m-%d', '%d %b %Y', '%Y-%m-%dT%H:%M:%S.%fZ')
+PRODUCT_NAME_KEYS = ('ProductName', 'name', 'Name')
+SITE_ARCHITECTURE_NODE_BUDGET = 400  # Tree nodes drawn before remaining children are folded into summary nodes
+
+
+def _loads_json(text):
+    """json.loads through orjson when it is installed; json itself is kept for what orjson rejects (e.g. huge ints)."""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+def _parse_product_detail(detail):
+    """Decode one DETAIL cell: a dict, {} for empty or non-object JSON, or an error dict for invalid JSON."""
+    if pd.isna(detail):
+        return {}
+    try:
+        detail_str = _sanitize_fragment(str(detail))
+        # Handle double-escaped JSON if needed
+        if detail_str.startswith('"') and detail_str.endswith('"'):
+            detail_str = detail_str[1:-1].replace('\\"', '"')
+        try:
+            product_data = _loads_json(detail_str)
+        except ValueError as e:
+            return {
+                "name": "Unknown Product",
+                "error": f"Invalid JSON in DETAIL field: {str(e)}",
+                "raw_detail": detail_str[:200] + "..." if len(detail_str) > 200 else detail_str
+            }
+        return product_data if isinstance(product_data, dict) else {}
+    except Exception as e:
+        print(f"Warning: Failed to parse product detail JSON: {e}")
+        return {}
+
+
+def _product_dates_expired(values):
+    """For each date string, whether it parses with one of PRODUCT_DATE_FORMATS (first match wins) as a date before now.
+
+    Each format is applied to the whole column with pd.to_datetime; only values pandas cannot
+    represent (e.g. year-0001 sentinels) or that match no format go through datetime.strptime.
+    """
+    values = pd.Series(values, dtype=object).reset_index(drop=True)
+    expired = np.zeros(len(values), dtype=bool)
+    unparsed = np.ones(len(values), dtype=bool)
+    now = pd.Timestamp.now()
+    for fmt in PRODUCT_DATE_FORMATS:
+        candidates = values[unparsed]
+        if '%f' in fmt:
+            # strptime's %f takes at most 6 digits; pandas would also accept nanoseconds
+            candidates = candidates[candidates.str.fullmatch(r'.*\.\d{1,6}Z')]
+        if candidates.empty:
+            continue
+        parsed = pd.to_datetime(candidates, format=fmt, errors='coerce')
+        matched = parsed.notna().to_numpy()
+        positions = candidates.index.to_numpy()[matched]
+        expired[positions] = (parsed[matched] < now).to_numpy()
+        unparsed[positions] = False
+    # Every format starts with a (possibly space-padded) number, so anything else can never match
+    maybe_dates = values.str.match(r'\s?\d').fillna(False).to_numpy(dtype=bool)
+    for position in np.flatnonzero(unparsed & maybe_dates):
+        for fmt in PRODUCT_DATE_FORMATS:
+            try:
+                expired[position] = datetime.strptime(values.iat[position], fmt) < datetime.now()
+                break
+            except ValueError:
+                continue
+    return expired
+
+
+def _sanitize_fragment(fragment):
+    """Drop anything that cannot be encoded as UTF-8 (e.g. lone surrogates from undecodable CSV bytes)."""
+    return fragment.encode('utf-8', 'ignore').decode('utf-8')
+
+
+def _write_fragments(f, fragments):
+    if isinstance(fragments, str):
+        f.write(_sanitize_fragment(fragments))
+        return
+    for fragment in fragments:
+        _write_fragments(f, fragment)
+
+
+def write_html_stream(path, fragments):
+    """Write an HTML document piece by piece, sanitizing each fragment as it goes.
+
+    fragments is a string or a (nested) list of strings, written in order. Only one
+    fragment is re-encoded at a time, so peak memory stays near the largest section
+    rather than several copies of the whole page.
+    """
+    with open(path, 'w', encoding='utf-8', errors='ignore') as f:
+        _write_fragments(f, fragments)
+
+
+def _table_source_attr(table_id, table_data):
+    """data-source attribute pointing a table at its sidecar JSON file ('sidecar' mode only)."""
+    return f' data-source="{table_id}.json"' if table_data == 'sidecar' else ''
+
+def _emit_table_data(table_id, rows, table_data, output_dir):
+    """Hand a table's rows to the page as JSON.
+
+    'json' returns a <script type="application/json"> block to place after the table;
+    'sidecar' writes <table_id>.json into output_dir and returns no markup.
+    """
+    payload = json.dumps({'rows': rows}, separators=(',', ':'), ensure_ascii=False)
+    if table_data == 'sidecar':
+        with open(os.path.join(output_dir, f"{table_id}.json"), 'w', encoding='utf-8', errors='ignore') as f:
+            f.write(payload)
+        return ''
+    # A literal '</' inside the JSON would close the script element early
+    payload = payload.replace('</', '<\\/')
+    return f'<script type="application/json" id="{table_id}Data">{payload}</script>'
+
+def generate_json_table_from_df(df, table_id, table_data='json', output_dir='.'):
+    """Generates an empty DataTables table plus its rows as JSON (see TABLE_DATA_MODES)."""
+    if df.empty:
+        return f"<p>No data available for {table_id.replace('Table', '')}.</p>"
+
+    columns = list(df.columns)
+    values = df.values
+    # Same cell text as the HTML table (str() of each value); escaping happens client-side
+    rows = np.column_stack([values[:, i].astype(str) for i in range(len(columns))]).tolist()
+    data_markup = _emit_table_data(table_id, rows, table_data, output_dir)
+    url_column = columns.index('URL') if 'URL' in columns else -1
+    return f'''
+    <table id="{table_id}" class="display" style="width:100%" data-url-column="{url_column}"{_table_source_attr(table_id, table_data)}>
+        <thead>
+            <tr>{''.join(f'<th>{col}</th>' for col in columns)}</tr>
+            <tr class="filters">{''.join("<th><input type='text' placeholder='Filter ...' style='width: 90%;' /></th>" for _ in columns)}</tr>
+        </thead>
+        <tbody></tbody>
+    </table>
+    {data_markup}
+'''
 
 STYLE_DEFINITIONS = """
             :root {
@@ -556,176 +721,182 @@ STYLE_DEFINITIONS = """
             }
 """
 
-def extract_category_hierarchy(df, region):
-    """Extract hierarchical category data from URLs and store in temporary file."""
+# scheme://netloc/path split (same netloc/path as urlparse) applied to the whole URL column at once
+URL_PARTS_PATTERN = r'^(?:[A-Za-z][A-Za-z0-9+.\-]*:)?(?://(?P<domain>[^/?#]*))?(?P<path>[^?#]*)'
+CATEGORY_NAMES = ['home', 'clothing', 'electronics', 'toys', 'beauty', 'garden', 'sports', 'outdoor', 'tech', 'baby', 'kids']
+
+
+def build_url_segment_table(df):
+    """Split every URL into its path segments in one vectorized pass.
+
+    Returns one row per node on each URL's path: level 0 is the domain, level N the Nth path
+    segment. Columns: url_id (position among the non-null URLs), url, level, segment and prefix
+    (the domain/segment/... node the row ends at). The category, navigation and site architecture
+    visualizations all read this table, so it can be built once and passed to each.
+    """
+    urls = df['URL'].dropna().astype(str).reset_index(drop=True) if 'URL' in df.columns else pd.Series(dtype=str)
+    parts = urls.str.extract(URL_PARTS_PATTERN)
+    # Like urlparse, ';params' on the last segment are not part of the path
+    path = parts['path'].fillna('').str.replace(r';[^/]*$', '', regex=True).str.strip('/')
+    full_paths = parts['domain'].fillna('').where(path == '', parts['domain'].fillna('') + '/' + path)
+
+    nodes = full_paths.str.split('/').explode()
+    table = pd.DataFrame({'url_id': nodes.index.to_numpy(), 'segment': nodes.to_numpy(dtype=object)})
+    table['url'] = urls.to_numpy(dtype=object)[table['url_id']]
+    table['level'] = table.groupby('url_id').cumcount()
+    # Each node's prefix ends where its segment ends in domain/path
+    ends = table['segment'].str.len().add(1).groupby(table['url_id']).cumsum().sub(1)
+    table['prefix'] = [full[:end] for full, end in zip(full_paths.to_numpy(dtype=object)[table['url_id']], ends)]
+    return table
+
+
+def _titleize_segments(segments):
+    return segments.str.replace('-', ' ', regex=False).str.replace('_', ' ', regex=False).str.title()
+
+
+def extract_category_hierarchy(df, region, segments=None):
+    """Extract hierarchical category data from URL paths.
+
+    A category is the segment after a '.../category/...' segment, or a known top-level
+    department name; the segment after it is recorded as a subcategory.
+    """
     if df.empty:
         return {}
-    
+    table = build_url_segment_table(df) if segments is None else segments
+
+    by_url = table.groupby('url_id')['segment']
+    next_segment = by_url.shift(-1)
+    lower = table['segment'].str.lower()
+    is_category_marker = lower.str.contains('category|categories')
+    in_path = table['level'] >= 1
+    after_marker = in_path & is_category_marker & next_segment.notna()
+    department = in_path & ~is_category_marker & lower.isin(CATEGORY_NAMES)
+    hit = after_marker | department
+
+    hits = pd.DataFrame({
+        'category': _titleize_segments(next_segment.where(after_marker, table['segment'])[hit]),
+        'subcategory': _titleize_segments(by_url.shift(-2).where(after_marker, next_segment)[hit]),
+        'url': table['url'][hit],
+    })
+
     category_hierarchy = {}
-    
-    for _, row in df.iterrows():
-        try:
-            url = row['URL']
-            parsed = urlparse(url)
-            path = parsed.path.strip('/')
-            
-            if path:
-                segments = path.split('/')
-                # Look for category patterns
-                for i, segment in enumerate(segments):
-                    if 'category' in segment.lower() or 'categories' in segment.lower():
-                        # This is a category segment
-                        if i + 1 < len(segments):
-                            category_name = segments[i + 1].replace('-', ' ').replace('_', ' ').title()
-                            
-                            if category_name not in category_hierarchy:
-                                category_hierarchy[category_name] = {
-                                    'count': 0,
-                                    'subcategories': set(),
-                                    'urls': []
-                                }
-                            
-                            category_hierarchy[category_name]['count'] += 1
-                            category_hierarchy[category_name]['urls'].append(url)
-                            
-                            # Check for subcategories
-                            if i + 2 < len(segments):
-                                subcategory = segments[i + 2].replace('-', ' ').replace('_', ' ').title()
-                                category_hierarchy[category_name]['subcategories'].add(subcategory)
-                    
-                    # Also check for direct category names in path
-                    elif segment.lower() in ['home', 'clothing', 'electronics', 'toys', 'beauty', 'garden', 'sports', 'outdoor', 'tech', 'baby', 'kids']:
-                        category_name = segment.replace('-', ' ').replace('_', ' ').title()
-                        
-                        if category_name not in category_hierarchy:
-                            category_hierarchy[category_name] = {
-                                'count': 0,
-                                'subcategories': set(),
-                                'urls': []
-                            }
-                        
-                        category_hierarchy[category_name]['count'] += 1
-                        category_hierarchy[category_name]['urls'].append(url)
-                        
-                        # Check for subcategories
-                        if i + 1 < len(segments):
-                            subcategory = segments[i + 1].replace('-', ' ').replace('_', ' ').title()
-                            category_hierarchy[category_name]['subcategories'].add(subcategory)
-        except Exception:
-            continue
-    
-    # Convert sets to lists for JSON serialization
-    for category in category_hierarchy:
-        category_hierarchy[category]['subcategories'] = list(category_hierarchy[category]['subcategories'])
-    
-    # Return category hierarchy directly without saving to temp file
+    for category, group in hits.groupby('category', sort=False):
+        category_hierarchy[category] = {
+            'count': len(group),
+            'subcategories': group['subcategory'].dropna().unique().tolist(),
+            'urls': group['url'].tolist()
+        }
     return category_hierarchy
 
-def generate_site_architecture_visualization(df, region):
-    """Generate interactive site architecture visualization using Plotly and NetworkX."""
+def _site_tree_layout(roots, children):
+    """Tidy tree layout in one pass: leaves take consecutive x slots, parents sit over their children, y is -depth."""
+    positions = {}
+    next_slot = 0
+    for root in roots:
+        stack = [(root, 0, False)]
+        while stack:
+            node, depth, children_placed = stack.pop()
+            kids = children.get(node, [])
+            if not kids:
+                positions[node] = (float(next_slot), -depth)
+                next_slot += 1
+            elif children_placed:
+                positions[node] = ((positions[kids[0]][0] + positions[kids[-1]][0]) / 2, -depth)
+            else:
+                stack.append((node, depth, True))
+                stack.extend((kid, depth + 1, False) for kid in reversed(kids))
+    return positions
+
+
+def generate_site_architecture_visualization(df, region, max_nodes=SITE_ARCHITECTURE_NODE_BUDGET, segments=None):
+    """Generate the site architecture tree (domain -> path segments) as a WebGL Plotly figure.
+
+    Every URL path prefix is a node sized by the pages under it. Nodes are kept breadth-first,
+    largest sections first, up to max_nodes; the remaining children of a kept node are folded
+    into a single "+N more" summary node with their page count.
+    """
     if df.empty:
         return "<p>No data available for visualization.</p>"
-    
-    # Extract domain and path information
-    urls = df['URL'].dropna().tolist()
-    
-    # Create a network graph
-    G = nx.DiGraph()
-    
-    # Parse URLs and create hierarchical structure
-    domain_paths = {}
-    for url in urls:
-        try:
-            parsed = urlparse(url)
-            domain = parsed.netloc
-            path = parsed.path.strip('/')
-            
-            if domain not in domain_paths:
-                domain_paths[domain] = set()
-            
-            # Split path into segments
-            if path:
-                segments = path.split('/')
-                # Add hierarchical relationships
-                current_path = ''
-                for i, segment in enumerate(segments):
-                    parent_path = current_path
-                    current_path = '/'.join(segments[:i+1]) if current_path else segment
-                    
-                    if parent_path:
-                        G.add_edge(f"{domain}/{parent_path}", f"{domain}/{current_path}")
-                    else:
-                        G.add_edge(domain, f"{domain}/{current_path}")
-                    
-                    domain_paths[domain].add(current_path)
-            else:
-                G.add_node(domain)
-        except Exception:
-            continue
-    
-    if not G.nodes():
+
+    # Count pages under every domain and domain/path-prefix node, keeping first-seen child order
+    table = build_url_segment_table(df) if segments is None else segments
+    page_counts = table.groupby('prefix', sort=False).size().to_dict()
+    roots = table.loc[table['level'] == 0, 'prefix'].unique().tolist()
+    edges = pd.DataFrame({'parent': table.groupby('url_id')['prefix'].shift(1), 'child': table['prefix']})
+    edges = edges[table['level'] > 0].drop_duplicates('child')
+    children = edges.groupby('parent', sort=False)['child'].agg(list).to_dict()
+
+    if not page_counts:
         return "<p>No valid URLs found for visualization.</p>"
-    
-    # Create layout
-    try:
-        pos = nx.spring_layout(G, k=3, iterations=50)
-    except:
-        pos = {node: (0, 0) for node in G.nodes()}
-    
-    # Extract node and edge information
-    node_x = []
-    node_y = []
-    node_text = []
+
+    # Keep nodes breadth-first (biggest sections first) until the budget is spent
+    kept = set()
+    queue = deque(roots)
+    while queue and len(kept) < max_nodes:
+        node = queue.popleft()
+        kept.add(node)
+        queue.extend(sorted(children.get(node, []), key=lambda child: -page_counts[child]))
+
+    display_children = {}
+    labels = {node: node for node in kept}
+    counts = {node: page_counts[node] for node in kept}
+    summary_nodes = set()
+    for node in kept:
+        shown = [child for child in children.get(node, []) if child in kept]
+        hidden = [child for child in children.get(node, []) if child not in kept]
+        if hidden:
+            summary = f"{node}/…"
+            summary_nodes.add(summary)
+            counts[summary] = sum(page_counts[child] for child in hidden)
+            labels[summary] = f"{node}/ +{len(hidden)} more ({counts[summary]} pages)"
+            shown.append(summary)
+        display_children[node] = shown
+
+    pos = _site_tree_layout([root for root in roots if root in kept], display_children)
+
+    edge_x = []
+    edge_y = []
+    for node, kids in display_children.items():
+        x0, y0 = pos[node]
+        for kid in kids:
+            x1, y1 = pos[kid]
+            edge_x.extend([x0, x1, None])
+            edge_y.extend([y0, y1, None])
+
+    nodes = list(pos)
     node_colors = []
-    
-    for node in G.nodes():
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-        node_text.append(node)
-        # Color nodes based on type (domain vs path)
-        if '/' in node and node.count('/') > 1:
+    for node in nodes:
+        if node in summary_nodes:
+            node_colors.append('#9ca3af')  # Grey for folded subtrees
+        elif pos[node][1] < -1:
             node_colors.append('#ff7f0e')  # Orange for deep paths
-        elif '/' in node:
+        elif pos[node][1] == -1:
             node_colors.append('#2ca02c')  # Green for first-level paths
         else:
             node_colors.append('#1f77b4')  # Blue for domains
-    
-    edge_x = []
-    edge_y = []
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x.extend([x0, x1, None])
-        edge_y.extend([y0, y1, None])
-    
-    # Create Plotly figure
+
     fig = go.Figure()
-    
-    # Add edges
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=edge_x, y=edge_y,
         line=dict(width=1, color='#888'),
         hoverinfo='none',
         mode='lines',
         name='Connections'
     ))
-    
-    # Add nodes
-    fig.add_trace(go.Scatter(
-        x=node_x, y=node_y,
-        mode='markers+text',
+    fig.add_trace(go.Scattergl(
+        x=[pos[node][0] for node in nodes],
+        y=[pos[node][1] for node in nodes],
+        mode='markers',
         hoverinfo='text',
-        text=node_text,
-        textposition="middle center",
+        hovertext=[f"{labels[node]}<br>{counts[node]} pages" for node in nodes],
         marker=dict(
-            size=20,
+            size=[min(24, 6 + 3 * np.log2(counts[node] + 1)) for node in nodes],
             color=node_colors,
-            line=dict(width=2, color='white')
+            line=dict(width=1, color='white')
         ),
         name='Pages'
     ))
-    
+
     fig.update_layout(
         title=dict(text=f'{region} Site Architecture', font=dict(size=16)),
         showlegend=False,
@@ -733,7 +904,7 @@ def generate_site_architecture_visualization(df, region):
         margin=dict(b=20,l=5,r=5,t=40),
         annotations=[
             dict(
-                text=f"Interactive visualization of {region} site structure",
+                text=f"{len(page_counts)} paths, showing {len(kept)} (+{len(summary_nodes)} summary nodes)",
                 showarrow=False,
                 xref="paper", yref="paper",
                 x=0.005, y=-0.002,
@@ -745,33 +916,21 @@ def generate_site_architecture_visualization(df, region):
         yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
         plot_bgcolor='white'
     )
-    
+
     return fig.to_html(include_plotlyjs='cdn', div_id=f'{region.lower()}_architecture')
 
-def generate_navigation_hierarchy_chart(df, region):
+def generate_navigation_hierarchy_chart(df, region, segments=None):
     """Generate a hierarchical chart showing navigation structure."""
     if df.empty:
         return "<p>No data available for navigation hierarchy.</p>"
     
-    # Extract path hierarchy
+    # Count each segment per path level
+    table = build_url_segment_table(df) if segments is None else segments
+    path_table = table[table['level'] >= 1]
+    level_counts = path_table.groupby(['level', 'segment'], sort=False).size().reset_index(name='count')
     path_counts = {}
-    for _, row in df.iterrows():
-        try:
-            url = row['URL']
-            parsed = urlparse(url)
-            path = parsed.path.strip('/')
-            
-            if path:
-                segments = path.split('/')
-                for i, segment in enumerate(segments):
-                    level = i + 1
-                    if level not in path_counts:
-                        path_counts[level] = {}
-                    if segment not in path_counts[level]:
-                        path_counts[level][segment] = 0
-                    path_counts[level][segment] += 1
-        except Exception:
-            continue
+    for level, segment, count in level_counts.sort_values('level', kind='stable').itertuples(index=False):
+        path_counts.setdefault(level, {})[segment] = count
     
     if not path_counts:
         return "<p>No navigation hierarchy found.</p>"
@@ -811,13 +970,13 @@ def generate_navigation_hierarchy_chart(df, region):
     
     return fig.to_html(include_plotlyjs='cdn', div_id=f'{region.lower()}_hierarchy')
 
-def generate_category_hierarchy_visualization(df, region):
+def generate_category_hierarchy_visualization(df, region, segments=None):
     """Generate scattered category visualization with expandable details."""
     if df.empty:
         return "<p>No data available for category visualization.</p>"
     
     # Extract category hierarchy
-    category_data = extract_category_hierarchy(df, region)
+    category_data = extract_category_hierarchy(df, region, segments)
     
     if not category_data:
         return "<p>No categories found in the data.</p>"
@@ -996,246 +1155,65 @@ def generate_category_hierarchy_visualization(df, region):
     return html_content
 
 def _connect_db(db_path: str = 'broken_links.db'):
-    conn = sqlite3.connect(db_path)
-    return conn
-
-def _create_sample_historical_data(conn: sqlite3.Connection, current_data: pd.DataFrame):
-    """Create sample historical data for demonstration purposes if no historical data exists."""
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'broken_links_%'")
-    existing_tables = [row[0] for row in cursor.fetchall()]
-
-    # Only create sample data if we have NO historical tables (complete fallback)
-    if len(existing_tables) == 0:
-        print("Debug: No historical data found, creating minimal sample data for change detection")
-
-        # Create yesterday's data (remove some links, add some different ones)
-        yesterday_date = (date.today() - timedelta(days=1)).strftime('%Y_%m_%d')
-        yesterday_table = f"broken_links_{yesterday_date}"
-
-        # Create table
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {yesterday_table} (
-                Region TEXT,
-                URL TEXT,
-                Status INTEGER,
-                Response_Time REAL,
-                Error_Message TEXT,
-                Timestamp TEXT
-            )
-        """)
-
-        # Sample some current data and modify it
-        if not current_data.empty:
-            # Take 80% of current data as "yesterday's" data
-            sample_size = max(1, int(len(current_data) * 0.8))
-            yesterday_data = current_data.sample(n=sample_size).copy()
-
-            # Add a few sample "removed" links (links that were broken yesterday but fixed today)
-            removed_samples = [
-                ('AU', 'https://example-fixed-1.com.au/page', 404, 1.2, 'Not Found', datetime.now().isoformat()),
-                ('NZ', 'https://example-fixed-2.co.nz/page', 500, 2.1, 'Internal Server Error', datetime.now().isoformat()),
-                ('AU', 'https://example-fixed-3.com.au/product', 403, 0.8, 'Forbidden', datetime.now().isoformat())
-            ]
+    return broken_links_db.connect(db_path)
 
-            for region, url, status, resp_time, error, timestamp in removed_samples:
-                cursor.execute(f"""
-                    INSERT INTO {yesterday_table} (Region, URL, Status, Response_Time, Error_Message, Timestamp)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (region, url, status, resp_time, error, timestamp))
-
-            # Insert the sampled current data as yesterday's data
-            for _, row in yesterday_data.iterrows():
-                cursor.execute(f"""
-                    INSERT INTO {yesterday_table} (Region, URL, Status, Response_Time, Error_Message, Timestamp)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (row['Region'], row['URL'], row['Status'], row.get('Response_Time', 1.0),
-                     row.get('Error_Message', 'Error'), row.get('Timestamp', datetime.now().isoformat())))
-
-        conn.commit()
-        print(f"Debug: Created sample historical data table {yesterday_table}")
-    else:
-        print(f"Debug: Found {len(existing_tables)} existing tables, no sample data needed")
-
-def _ensure_retention(conn: sqlite3.Connection, keep_days: int = 60):
-    cur = conn.cursor()
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'broken_links_%';")
-    tables = [r[0] for r in cur.fetchall()]
-    cutoff = date.today() - timedelta(days=keep_days)
-    for t in tables:
-        try:
-            d_str = t.replace('broken_links_', '')
-            d = datetime.strptime(d_str, '%Y_%m_%d').date()
-        except Exception:
-            continue
-        if d < cutoff:
-            cur.execute(f'DROP TABLE IF EXISTS {t}')
-    conn.commit()
+RETENTION_DAYS = retention.POLICIES['broken_links'].keep_days
+TREND_DAYS = RETENTION_DAYS  # The Changes trend chart covers every retained snapshot
+
+def _ensure_retention(conn: sqlite3.Connection, keep_days: int = RETENTION_DAYS):
+    # Deletes only; reclaiming file space is left to the nightly `python retention.py` step
+    retention.enforce(conn, retention.POLICIES['broken_links'], keep_days, vacuum=False)
 
 def _store_broken_links_today(conn: sqlite3.Connection, df: pd.DataFrame):
     # df expected columns include Region, URL, Status, Response_Time, Error_Message, Timestamp
-    today_str = date.today().strftime('%Y_%m_%d')
-    table = f"broken_links_{today_str}"
-    cur = conn.cursor()
-    cur.execute(f"""
-        CREATE TABLE IF NOT EXISTS {table} (
-            Region TEXT,
-            URL TEXT,
-            Status INTEGER,
-            Response_Time REAL,
-            Error_Message TEXT,
-            Timestamp TEXT
-        )
-    """)
-    # Clear existing records for today to prevent duplicates
-    cur.execute(f"DELETE FROM {table}")
-    # Insert rows
-    records = df[df['Status'] >= 400][['Region','URL','Status','Response_Time','Error_Message','Timestamp']].to_records(index=False)
-    cur.executemany(
-        f"INSERT INTO {table} (Region, URL, Status, Response_Time, Error_Message, Timestamp) VALUES (?,?,?,?,?,?)",
-        list(records)
-    )
-    conn.commit()
+    broken_links_db.store_snapshot(conn, date.today(), df[df['Status'] >= 400])
 
-def _load_broken_set(conn: sqlite3.Connection, target_date: date) -> set[tuple[str, str]]:
-    table = f"broken_links_{target_date.strftime('%Y_%m_%d')}"
-    cur = conn.cursor()
-    try:
-        cur.execute(f"SELECT Region, URL FROM {table}")
-    except sqlite3.OperationalError:
-        return set()
-    return set(cur.fetchall())
-
-def _get_7_day_summary(conn: sqlite3.Connection):
-    """Get broken links summary for the last 7 days."""
-    cursor = conn.cursor()
-    
-    # Get all available tables
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'broken_links_%'")
-    tables = [row[0] for row in cursor.fetchall()]
-    
-    # Extract dates and sort
-    dates = []
-    for table in tables:
-        try:
-            date_str = table.replace('broken_links_', '')
-            year, month, day = map(int, date_str.split('_'))
-            dates.append(date(year, month, day))
-        except ValueError:
-            continue
-    
-    if not dates:
-        return pd.DataFrame(columns=['date', 'au_count', 'nz_count', 'total'])
-    
-    # Sort and get last 7 days
-    dates.sort(reverse=True)
-    last_7_days = dates[:7]
-    
-    # Initialize results
-    results = []
-    
-    for day in last_7_days:
-        table_name = f"broken_links_{day.strftime('%Y_%m_%d')}"
-        try:
-            # Get AU count
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name} WHERE Region = 'AU'")
-            au_count = cursor.fetchone()[0] or 0
-            
-            # Get NZ count
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name} WHERE Region = 'NZ'")
-            nz_count = cursor.fetchone()[0] or 0
-            
-            results.append({
-                'date': day,
-                'au_count': au_count,
-                'nz_count': nz_count,
-                'total': au_count + nz_count
-            })
-        except sqlite3.OperationalError:
-            continue
-    
-    return pd.DataFrame(results).sort_values('date')
+def _get_trend_summary(conn: sqlite3.Connection, days: int = TREND_DAYS):
+    """Get per-day broken link counts for the latest `days` snapshots from the daily_summary rollup."""
+    return broken_links_db.daily_counts(conn, days=days)
 
 def _get_data_for_date(conn: sqlite3.Connection, target_date: date):
     """Get broken links data for a specific date."""
-    table_name = f"broken_links_{target_date.strftime('%Y_%m_%d')}"
-    
-    try:
-        # Get counts by region
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            SELECT 
-                Region,
-                COUNT(*) as count
-            FROM {table_name}
-            GROUP BY Region
-        """)
-        
-        counts = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        # Get detailed data
-        cursor.execute(f"""
-            SELECT 
-                Region,
-                URL,
-                Status,
-                Error_Message
-            FROM {table_name}
-            ORDER BY Region, Status, URL
-        """)
-        
-        details = []
-        for row in cursor.fetchall():
-            details.append({
-                'Region': row[0],
-                'URL': row[1],
-                'Status': row[2],
-                'Error_Message': row[3]
-            })
-        
-        return {
-            'au_count': counts.get('AU', 0),
-            'nz_count': counts.get('NZ', 0),
-            'total': sum(counts.values()),
-            'details': details
-        }
-        
-    except sqlite3.OperationalError:
-        return {
-            'au_count': 0,
-            'nz_count': 0,
-            'total': 0,
-            'details': []
-        }
+    details = broken_links_db.snapshot_details(conn, target_date)
+    au_count = sum(1 for row in details if row['Region'] == 'AU')
+    nz_count = sum(1 for row in details if row['Region'] == 'NZ')
+    return {
+        'au_count': au_count,
+        'nz_count': nz_count,
+        'total': len(details),
+        'details': details
+    }
 
-def _compute_changes(conn: sqlite3.Connection):
-    # Dynamically detect available dates from database tables
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'broken_links_%'")
-    tables = [row[0] for row in cursor.fetchall()]
-    
-    # Extract dates from table names and sort them
-    available_dates = []
-    for table in tables:
-        if table.startswith('broken_links_'):
-            date_str = table.replace('broken_links_', '')
-            try:
-                # Parse date format: YYYY_MM_DD
-                year, month, day = map(int, date_str.split('_'))
-                available_dates.append(date(year, month, day))
-            except (ValueError, TypeError):
-                continue
-    
-    available_dates.sort(reverse=True)  # Most recent first
+CHANGES_PAGE_SIZE = 500  # Rows per window and change type loaded for the Changes tables; the CSV has all of them
+
+CHANGES_WINDOWS = [('yesterday', 'Yesterday'), ('week', 'Last 7 Days')]
+
+
+def _empty_window(past_d=None):
+    return {'date': past_d, 'added': [], 'removed': [], 'added_count': 0, 'removed_count': 0, 'has_data': False}
+
+def _empty_changes():
+    return {
+        'yesterday': _empty_window(),
+        'week': _empty_window(),
+        'today_count': 0,
+        'today_date': None,
+        'available_dates': []
+    }
+
+def _compute_changes(conn: sqlite3.Connection, page_size: int = CHANGES_PAGE_SIZE):
+    """Added/removed (Region, URL) pairs of the latest snapshot versus yesterday and ~7 days earlier.
+
+    The diffs run as anti-joins inside SQLite: each window carries the full
+    added/removed counts and the first page_size rows of each, sorted by
+    region then URL. Use broken_links_db.iter_snapshot_diff() to page further.
+    """
+    # Dates with a stored snapshot, most recent first
+    available_dates = broken_links_db.snapshot_dates(conn)[::-1]
     
     if len(available_dates) == 0:
         # No data available
-        return {
-            'yesterday': {'added': [], 'removed': [], 'has_data': False},
-            'week': {'added': [], 'removed': [], 'has_data': False},
-            'today_count': 0,
-            'available_dates': []
-        }
+        return _empty_changes()
     
     # Use the most recent date as "today"
     today_d = available_dates[0]
@@ -1255,44 +1233,41 @@ def _compute_changes(conn: sqlite3.Connection):
             week_d = d
             break
     
-    today_set = _load_broken_set(conn, today_d)
-    yday_set = _load_broken_set(conn, yday_d) if yday_d else set()
-    week_set = _load_broken_set(conn, week_d) if week_d else set()
-    
-    # Check if we have data to compare
-    has_yesterday_data = len(yday_set) > 0
-    has_week_data = len(week_set) > 0
-    
-    # Added = in today but not in past; Removed = in past but not in today
-    if has_yesterday_data:
-        y_added = sorted(list(today_set - yday_set))
-        y_removed = sorted(list(yday_set - today_set))
-    else:
-        y_added = []
-        y_removed = []
-    
-    if has_week_data:
-        w_added = sorted(list(today_set - week_set))
-        w_removed = sorted(list(week_set - today_set))
-    else:
-        w_added = []
-        w_removed = []
+    def window(past_d):
+        # Added = in today but not in past; Removed = in past but not in today
+        result = _empty_window(past_d)
+        if past_d is None:
+            return result
+        result['has_data'] = True
+        for change in ('added', 'removed'):
+            result[f'{change}_count'] = broken_links_db.count_snapshot_diff(conn, today_d, past_d, change)
+            result[change] = broken_links_db.snapshot_diff(conn, today_d, past_d, change, limit=page_size)
+        return result
     
     return {
-        'yesterday': {
-            'added': y_added,
-            'removed': y_removed,
-            'has_data': has_yesterday_data
-        },
-        'week': {
-            'added': w_added,
-            'removed': w_removed,
-            'has_data': has_week_data
-        },
-        'today_count': len(today_set),
+        'yesterday': window(yday_d),
+        'week': window(week_d),
+        'today_count': broken_links_db.snapshot_size(conn, today_d),
+        'today_date': today_d,
         'available_dates': available_dates
     }
 
+def _write_changes_csv(conn: sqlite3.Connection, changes: dict, path: str = 'changes_all.csv') -> int:
+    """Stream every added/removed row of both windows from SQLite into one CSV: Region, URL, Change, Window."""
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(["Region", "URL", "Change", "Window"])
+        for key, label in CHANGES_WINDOWS:
+            window = changes[key]
+            if not window['has_data']:
+                continue
+            for change in ('added', 'removed'):
+                for reg, url in broken_links_db.iter_snapshot_diff(conn, changes['today_date'], window['date'], change):
+                    writer.writerow([reg, url, change.title(), label])
+                    written += 1
+    return written
+
 OPTIMIZELY_TAB_STYLES = """
             .optly-container {
                 margin-top: 16px;
@@ -1772,8 +1747,8 @@ def _optly_render_tab_content(data, region_key):
     ]
     return ''.join(sections)
 
-def generate_optimizely_section(optimizely_json_paths=None):
-    """Create the Optimizely tab content using the enhanced UI design with AU/NZ tabs."""
+def _resolve_optimizely_paths(optimizely_json_paths=None):
+    """Map each region to the Optimizely JSON file its tab is built from."""
     if isinstance(optimizely_json_paths, dict):
         path_map = {key.upper(): value for key, value in optimizely_json_paths.items() if value}
     else:
@@ -1798,6 +1773,12 @@ def generate_optimizely_section(optimizely_json_paths=None):
                 if candidate and os.path.exists(candidate):
                     path_map['NZ'] = candidate
                     break
+    return path_map
+
+
+def generate_optimizely_section(optimizely_json_paths=None):
+    """Create the Optimizely tab content using the enhanced UI design with AU/NZ tabs."""
+    path_map = _resolve_optimizely_paths(optimizely_json_paths)
 
     # Ensure deterministic order AU then NZ for display
     ordered_regions = []
@@ -1963,29 +1944,23 @@ def generate_optimizely_section(optimizely_json_paths=None):
         </script>
     """
 
-def generate_changes_tab(conn):
-    """Generate HTML content for the Changes tab."""
+def generate_changes_tab(conn, as_fragment=False):
+    """Generate HTML content for the Changes tab.
+
+    With as_fragment=True only the tab's inner content and scripts are returned, for loading
+    into the shell page's #Changes container (which already has Plotly loaded).
+    """
     # Handle case where connection is None (already closed)
     if conn is None:
         # Create a fallback version without real database data
         summary_df = pd.DataFrame(columns=['date', 'au_count', 'nz_count', 'total'])
         available_dates = []
     else:
-        # Get 7-day summary data
-        summary_df = _get_7_day_summary(conn)
+        # Get trend data for the whole retention window
+        summary_df = _get_trend_summary(conn)
 
         # Get available dates for date picker
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'broken_links_%'")
-        available_dates = []
-        for row in cursor.fetchall():
-            try:
-                date_str = row[0].replace('broken_links_', '')
-                year, month, day = map(int, date_str.split('_'))
-                available_dates.append(date(year, month, day).strftime('%Y-%m-%d'))
-            except:
-                continue
-        available_dates.sort()
+        available_dates = [day.strftime('%Y-%m-%d') for day in broken_links_db.snapshot_dates(conn)]
     
     # Initialize plotly_js - use specific version instead of deprecated 'latest'
     plotly_js = "<script src='https://cdn.plot.ly/plotly-2.27.0.min.js'></script>"
@@ -2036,7 +2011,7 @@ def generate_changes_tab(conn):
         # Update layout with enhanced styling
         fig.update_layout(
             title=dict(
-                text='📈 Broken Links Trend (Last 7 Days)',
+                text=f'📈 Broken Links Trend (Last {TREND_DAYS} Days)',
                 font=dict(size=20, color='#1f2937', family='Inter, sans-serif'),
                 x=0.5,
                 y=0.95
@@ -2153,6 +2128,9 @@ def generate_changes_tab(conn):
         </div>
         """
 
+    # A lazily loaded fragment is inserted long after DOMContentLoaded, so it initialises straight away
+    date_init = "initDatePicker();" if as_fragment else "document.addEventListener('DOMContentLoaded', initDatePicker);"
+
     # JavaScript for date picker functionality
     date_js = f"""
     <script>
@@ -2160,14 +2138,15 @@ def generate_changes_tab(conn):
     const availableDates = {json.dumps(available_dates)};
 
     // Set initial date to today
-    document.addEventListener('DOMContentLoaded', function() {{
+    function initDatePicker() {{
         const today = new Date().toISOString().split('T')[0];
         const datePicker = document.getElementById('datePicker');
         if (datePicker) {{
             datePicker.value = today;
             loadDateData();
         }}
-    }});
+    }}
+    {date_init}
 
     function updateDateData() {{
         // Optional: Add any UI feedback when date changes
@@ -2309,29 +2288,98 @@ def generate_changes_tab(conn):
     """
     
     # Combine all components
-    return f"""
-    <div class='tab-content' id='Changes'>
+    body = f"""
         <h2>Broken Links Trend & History</h2>
         {summary_html}
         {graph_html}
         {available_dates_html}
         {date_picker}
-    </div>
+    """
+    if as_fragment:
+        return body + date_js
+    return f"""
+    <div class='tab-content' id='Changes'>{body}</div>
     {plotly_js}
     {date_js}
     """
 
-def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='combined_report.html', product_csv_path='product_export.csv', db_path='broken_links.db', optimizely_json_path='kmart.json'):
-    """Generates a combined HTML report with tabs for AU and NZ link check results."""
+# Shown in the Page Views tab when the New Relic environment variables are missing
+PAGE_VIEWS_CONFIG_REQUIRED_HTML = '''
+        <div class="card">
+            <h3>📊 Page Views Data</h3>
+            <div class="info-message">
+                <p><strong>New Relic Configuration Required</strong></p>
+                <p>To display page views data, please configure the following environment variables:</p>
+                <ul>
+                    <li><code>NEWRELIC_BASE_URL</code></li>
+                    <li><code>NEWRELIC_ACCOUNT_ID</code></li>
+                    <li><code>NEWRELIC_COOKIE</code></li>
+                </ul>
+                <p>Once configured, regenerate the report to see page views analytics.</p>
+            </div>
+        </div>
+        '''
+
+def render_page_views_html(data):
+    """Render newrelic_top_products.collect_page_views_data() output (or None) as the Page Views tab content."""
+    if data is None:
+        return PAGE_VIEWS_CONFIG_REQUIRED_HTML
+    from newrelic_top_products import build_page_views_container_html
+    return build_page_views_container_html(data['top_products'], data['top_pages'],
+                                           data['broken_links_views'], data['total_views_30d'])
+
+def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='combined_report.html', product_csv_path='product_export.csv', db_path='broken_links.db', optimizely_json_path='kmart.json', table_data='html', split_tabs=False, cache_dir=None, force=False):
+    """Generates a combined HTML report with tabs for AU and NZ link check results.
+
+    table_data selects how the AU/NZ and product table rows are shipped (see TABLE_DATA_MODES).
+    split_tabs writes every tab except AU to its own fragment file, fetched when the tab is opened.
+    cache_dir enables the section cache (see section_cache.py): sections whose inputs are unchanged
+    are read back from disk instead of rebuilt. force rebuilds every section and refreshes the cache.
+    """
+    if table_data not in TABLE_DATA_MODES:
+        raise ValueError(f"table_data must be one of {TABLE_DATA_MODES}, got '{table_data}'")
+    output_dir = os.path.dirname(os.path.abspath(output_html_path))
+    fragment_dir_name = f"{os.path.splitext(os.path.basename(output_html_path))[0]}_tabs"
+    if split_tabs:
+        os.makedirs(os.path.join(output_dir, fragment_dir_name), exist_ok=True)
+
+    def render_tab(tab_id, content):
+        """Inline a tab's content (as document fragments), or with split_tabs write it to <report>_tabs/<tab_id>.html and leave a placeholder."""
+        if not split_tabs:
+            return [f'<div id="{tab_id}" class="tab-content">', content, '</div>']
+        fragment_path = f"{fragment_dir_name}/{tab_id}.html"
+        write_html_stream(os.path.join(output_dir, fragment_path), content)
+        return f'<div id="{tab_id}" class="tab-content" data-fragment="{fragment_path}"><p class="tab-loading">Loading...</p></div>'
     # Generate timestamp for cache busting
     from datetime import datetime
     timestamp = int(datetime.now().timestamp())
     cache_buster = f"v={timestamp}"
+
+    section_timings = {}
+    report_start = time.perf_counter()
+    cache = SectionCache(cache_dir, version=file_fingerprint(__file__), force=force) if cache_dir else None
+
+    def cached(section, inputs, build):
+        """Build a section through the section cache; inputs=None (e.g. sidecar output) always rebuilds."""
+        if cache is None:
+            return build()
+        return cache.get_or_build(section, inputs, build)
+
+    # Sidecar tables write <table_id>.json next to the report, which a cached fragment would not restore
+    table_cache_mode = None if table_data == 'sidecar' else table_data
+
+    def timed(name, fn, *args):
+        """Run one report section and record its wall-clock time in section_timings."""
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            section_timings[name] = time.perf_counter() - start
+
+    load_start = time.perf_counter()
     try:
         au_df = pd.read_csv(au_csv_path, encoding='utf-8', encoding_errors='replace')
         au_df['Status'] = pd.to_numeric(au_df['Status'], errors='coerce').fillna(0).astype(int)
-        # Extract category hierarchy for AU
-        extract_category_hierarchy(au_df, 'AU')
     except FileNotFoundError:
         print(f"Warning: AU results file not found at {au_csv_path}. AU tab will be empty.")
         au_df = pd.DataFrame(columns=['URL', 'Status', 'Response_Time', 'Error_Message'])
@@ -2342,8 +2390,6 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
     try:
         nz_df = pd.read_csv(nz_csv_path, encoding='utf-8', encoding_errors='replace')
         nz_df['Status'] = pd.to_numeric(nz_df['Status'], errors='coerce').fillna(0).astype(int)
-        # Extract category hierarchy for NZ
-        extract_category_hierarchy(nz_df, 'NZ')
     except FileNotFoundError:
         print(f"Warning: NZ results file not found at {nz_csv_path}. NZ tab will be empty.")
         nz_df = pd.DataFrame(columns=['URL', 'Status', 'Response_Time', 'Error_Message'])
@@ -2386,82 +2432,73 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
     au_error_df = au_df[au_df['Status'] >= 400].copy()
     nz_error_df = nz_df[nz_df['Status'] >= 400].copy()
 
-    # Persist today's broken links to SQLite and enforce retention
-    changes = {
-        'yesterday': {'added': [], 'removed': [], 'has_data': False},
-        'week': {'added': [], 'removed': [], 'has_data': False},
-        'today_count': 0,
-        'available_dates': []
-    }
-    try:
-        conn = _connect_db(db_path)
-        _ensure_retention(conn, keep_days=60)
-        # Merge for storage to avoid two passes
-        merged_err_df = pd.concat([au_error_df, nz_error_df], ignore_index=True)
-
-        # Create sample historical data if needed for demonstration (fallback only)
-        _create_sample_historical_data(conn, merged_err_df)
-        print(f"Debug: Merged error dataframe has {len(merged_err_df)} rows")
-        
-        # Ensure required columns exist
-        for col in ['Timestamp','Region','URL','Status','Response_Time','Error_Message']:
-            if col not in merged_err_df.columns:
-                merged_err_df[col] = ''
+    section_timings['load_csv'] = time.perf_counter() - load_start
+
+    # Persist today's broken links to SQLite, enforce retention and build the Changes tab
+    def build_changes_section():
+        conn = None
+        changes = _empty_changes()
+        try:
+            conn = _connect_db(db_path)
+            _ensure_retention(conn)
+            # Merge for storage to avoid two passes
+            merged_err_df = pd.concat([au_error_df, nz_error_df], ignore_index=True)
+            print(f"Debug: Merged error dataframe has {len(merged_err_df)} rows")
         
-        # Add current timestamp if missing
-        if 'Timestamp' not in merged_err_df.columns or merged_err_df['Timestamp'].isna().all():
-            merged_err_df['Timestamp'] = datetime.now().isoformat()
+            # Ensure required columns exist
+            for col in ['Timestamp','Region','URL','Status','Response_Time','Error_Message']:
+                if col not in merged_err_df.columns:
+                    merged_err_df[col] = ''
         
-        _store_broken_links_today(conn, merged_err_df)
-        print(f"Debug: Stored {len(merged_err_df)} broken links to database")
+            # Add current timestamp if missing
+            if 'Timestamp' not in merged_err_df.columns or merged_err_df['Timestamp'].isna().all():
+                merged_err_df['Timestamp'] = datetime.now().isoformat()
         
-        changes = _compute_changes(conn)
-        print(f"Debug: Changes computed - Yesterday: {len(changes['yesterday']['added'])} added, {len(changes['yesterday']['removed'])} removed")
-        print(f"Debug: Changes computed - Week: {len(changes['week']['added'])} added, {len(changes['week']['removed'])} removed")
+            _store_broken_links_today(conn, merged_err_df)
+            print(f"Debug: Stored {len(merged_err_df)} broken links to database")
         
-        # Build a single combined CSV: Region, URL, Change, Window
-        combined_rows = []
-        for reg, url in changes['yesterday']['added']:
-            combined_rows.append({"Region": reg, "URL": url, "Change": "Added", "Window": "Yesterday"})
-        for reg, url in changes['yesterday']['removed']:
-            combined_rows.append({"Region": reg, "URL": url, "Change": "Removed", "Window": "Yesterday"})
-        for reg, url in changes['week']['added']:
-            combined_rows.append({"Region": reg, "URL": url, "Change": "Added", "Window": "Last 7 Days"})
-        for reg, url in changes['week']['removed']:
-            combined_rows.append({"Region": reg, "URL": url, "Change": "Removed", "Window": "Last 7 Days"})
+            changes = _compute_changes(conn)
+            print(f"Debug: Changes computed - Yesterday: {changes['yesterday']['added_count']} added, {changes['yesterday']['removed_count']} removed")
+            print(f"Debug: Changes computed - Week: {changes['week']['added_count']} added, {changes['week']['removed_count']} removed")
         
-        try:
-            pd.DataFrame(combined_rows, columns=["Region","URL","Change","Window"]).to_csv('changes_all.csv', index=False)
-            print(f"Debug: Wrote {len(combined_rows)} changes to changes_all.csv")
-        except Exception as e:
-            print(f"Failed to write combined changes CSV: {e}")
+            # Build a single combined CSV: Region, URL, Change, Window
+            try:
+                written = _write_changes_csv(conn, changes)
+                print(f"Debug: Wrote {written} changes to changes_all.csv")
+            except Exception as e:
+                print(f"Failed to write combined changes CSV: {e}")
         
-        # Generate changes tab content BEFORE closing connection
-        changes_html = generate_changes_tab(conn)
+            # Generate changes tab content BEFORE closing connection
+            changes_inputs = [sqlite_fingerprint(conn), broken_links_db.data_revision(conn),
+                              file_fingerprint(au_csv_path), file_fingerprint(nz_csv_path),
+                              date.today().isoformat(), split_tabs]
+            changes_html = cached('changes', changes_inputs, lambda: generate_changes_tab(conn, as_fragment=split_tabs))
             
-    except Exception as e:
-        print(f"Error in database operations: {e}")
-        import traceback
-        traceback.print_exc()
-        # Initialize empty changes if database operations fail
-        changes = {
-            'yesterday': {'added': [], 'removed': [], 'has_data': False},
-            'week': {'added': [], 'removed': [], 'has_data': False},
-            'today_count': 0,
-            'available_dates': []
-        }
-        # Generate fallback changes tab
-        changes_html = generate_changes_tab(None)
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+        except Exception as e:
+            print(f"Error in database operations: {e}")
+            import traceback
+            traceback.print_exc()
+            # Initialize empty changes if database operations fail
+            changes = _empty_changes()
+            # Generate fallback changes tab
+            changes_html = generate_changes_tab(None, as_fragment=split_tabs)
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        return changes, changes_html
 
     # Generate HTML tables using the filtered error dataframes
-    # Drop 'Region' for individual table view; errors='ignore' handles cases where 'Region' might not exist (e.g., empty df)
-    au_table_html = generate_html_table_from_df(au_error_df.drop(columns=['Region'], errors='ignore'), 'auLinkTable')
-    nz_table_html = generate_html_table_from_df(nz_error_df.drop(columns=['Region'], errors='ignore'), 'nzLinkTable')
+    def build_link_table(error_df, table_id, csv_path):
+        # Drop 'Region' for individual table view; errors='ignore' handles cases where 'Region' might not exist (e.g., empty df)
+        table_df = error_df.drop(columns=['Region'], errors='ignore')
+        if table_data == 'html':
+            build = lambda: generate_html_table_from_df(table_df, table_id)
+        else:
+            build = lambda: generate_json_table_from_df(table_df, table_id, table_data, output_dir)
+        inputs = None if table_cache_mode is None else [file_fingerprint(csv_path), table_cache_mode]
+        return cached(table_id, inputs, build)
 
     # Generate product table HTML inline (replacing missing product_availability_ui module)
     def generate_product_availability_html(csv_path):
@@ -2486,7 +2523,8 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
             
             # Count total products
             total_products = len(df)
-            
+            table_tag = '<table class="product-table">' if table_data == 'html' else f'<table id="productTable" class="product-table"{_table_source_attr("productTable", table_data)}>'
+
             # Generate HTML with proper wrapper structure
             html_content = f'''
         <div class="summary-container">
@@ -2497,7 +2535,7 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
             <div class="card">
                 <h3>Product Availability</h3>
                 <div class="table-container">
-                    <table class="product-table">
+                    {table_tag}
                         <thead>
                             <tr>
                                 <th>SKU</th>
@@ -2508,227 +2546,182 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
                         </thead>
                         <tbody>
             '''
-            
-            for idx, row in df.iterrows():
-                sku = str(row.get('SKU', '')) if pd.notna(row.get('SKU', '')) else ''
-                
-                # Parse JSON from DETAIL column
-                product_data = {}
-                try:
-                    if pd.notna(row.get('DETAIL', '')):
-                        detail_str = str(row['DETAIL'])
-                        # Sanitize string to ensure valid UTF-8
-                        detail_str = detail_str.encode('utf-8', 'ignore').decode('utf-8')
-                        # Handle double-escaped JSON if needed
-                        if detail_str.startswith('"') and detail_str.endswith('"'):
-                            detail_str = detail_str[1:-1].replace('\\"', '"')
-
-                        # Try to parse JSON, but handle gracefully if it fails
-                        try:
-                            product_data = json.loads(detail_str)
-                            if not isinstance(product_data, dict):
-                                product_data = {}
-                        except (json.JSONDecodeError, ValueError) as e:
-                            # If JSON parsing fails, create a basic structure with the error info
-                            product_data = {
-                                "name": "Unknown Product",
-                                "error": f"Invalid JSON in DETAIL field: {str(e)}",
-                                "raw_detail": detail_str[:200] + "..." if len(detail_str) > 200 else detail_str
-                            }
-                except (Exception, UnicodeDecodeError) as e:
-                    print(f"Warning: Failed to parse product detail JSON: {e}")
-                    product_data = {}
-                
-                # Extract product name from JSON - check multiple possible keys
-                product_name = product_data.get('ProductName', 
-                              product_data.get('name', 
-                              product_data.get('Name', 'Unknown Product')))
-                
-                # Determine if product is discontinued based on status or EndDate
-                is_discontinued = False
-                
-                # Check status field first
-                status = str(row.get('ID', '')).upper() if pd.notna(row.get('ID', '')) else ''
-                if 'DISCONTINUED' in status:
-                    is_discontinued = True
-                
-                # Also check EndDate in product data
-                end_date = product_data.get('EndDate', '')
-                if not end_date:
-                    # Check nested attributes
-                    end_date = product_data.get('attributes', {}).get('EndDate', '') if isinstance(product_data.get('attributes'), dict) else ''
-                
-                if end_date and str(end_date).strip():
-                    try:
-                        from datetime import datetime
-                        # Try different date formats
-                        for date_format in ['%Y-%m-%d', '%d %b %Y', '%Y-%m-%dT%H:%M:%S.%fZ']:
-                            try:
-                                end_date_obj = datetime.strptime(str(end_date), date_format)
-                                if end_date_obj < datetime.now():
-                                    is_discontinued = True
-                                break
-                            except:
-                                continue
-                    except:
-                        pass
-                
-                # Product type badge
-                product_type_class = 'discontinued' if is_discontinued else ''
-                product_type_text = 'DISCONTINUED' if is_discontinued else 'ACTIVE'
-                
-                # Main product row
-                html_content += f'<tr class="product-row" onclick="toggleProductDetails(\'product_{idx}\')">'
-                html_content += f'<td><strong>{html.escape(sku)}</strong></td>'
-                html_content += f'<td>{html.escape(product_name)}</td>'
-                html_content += f'<td><span class="product-type-badge {product_type_class}">{product_type_text}</span></td>'
-                html_content += f'<td><span class="toggle-icon" id="product_{idx}_toggle">▼</span></td>'
-                html_content += '</tr>'
-                
-                # Details row (hidden by default)
-                html_content += f'<tr id="product_{idx}_details" class="product-details-row" style="display: none;">'
-                html_content += '<td colspan="4">'
-                html_content += '<div class="product-details-content">'
-                html_content += f'<h4>Product Details (SKU: {html.escape(sku)})</h4>'
-                html_content += '<div class="attributes-section">'
-                html_content += '<div class="attributes-container">'
-                
-                # Generate attributes from JSON data - handle both flat and nested structure
-                attributes = {}
-                
-                # First, add all top-level attributes from product_data
-                for key, value in product_data.items():
-                    if key not in ['ProductName', 'name', 'Name'] and value is not None and str(value).strip():
-                        attributes[key] = value
-                
-                # Then add nested attributes if they exist
-                if 'attributes' in product_data and isinstance(product_data['attributes'], dict):
+
+            def text_column(name):
+                if name not in df.columns:
+                    return pd.Series('', index=df.index)
+                return df[name].astype(str).where(df[name].notna(), '')
+
+            skus = text_column('SKU').tolist()
+            # Parse every DETAIL cell once up front
+            details_column = df['DETAIL'] if 'DETAIL' in df.columns else pd.Series('', index=df.index)
+            products = [_parse_product_detail(detail) for detail in details_column]
+            product_names = [p.get('ProductName', p.get('name', p.get('Name', 'Unknown Product'))) for p in products]
+
+            # Generate attributes from JSON data - top-level fields plus the nested 'attributes' dict
+            product_attributes = []
+            for product_data in products:
+                attributes = {key: value for key, value in product_data.items()
+                              if key not in PRODUCT_NAME_KEYS and value is not None and str(value).strip()}
+                if isinstance(product_data.get('attributes'), dict):
                     attributes.update(product_data['attributes'])
-                
+                product_attributes.append(attributes)
+
+            # Discontinued if the status says so or the EndDate (top-level or nested) has passed
+            discontinued = text_column('ID').str.upper().str.contains('DISCONTINUED', regex=False).to_numpy(dtype=bool, copy=True)
+            end_dates = []
+            for product_data in products:
+                end_date = product_data.get('EndDate', '')
+                if not end_date and isinstance(product_data.get('attributes'), dict):
+                    end_date = product_data['attributes'].get('EndDate', '')
+                end_dates.append(str(end_date) if end_date and str(end_date).strip() else '')
+            with_end_date = np.flatnonzero([bool(end_date) for end_date in end_dates])
+            discontinued[with_end_date] |= _product_dates_expired([end_dates[i] for i in with_end_date])
+
+            # (name, value, expired) for each non-empty attribute; all "...Date" values are parsed in one pass.
+            # Invalid UTF-8 is dropped when the section is written (write_html_stream), not per value.
+            attribute_items = [
+                [[str(name), str(value), False] for name, value in attributes.items() if value is not None and str(value).strip()]
+                for attributes in product_attributes
+            ]
+            date_items = [item for items in attribute_items for item in items if 'Date' in item[0] and item[1].strip()]
+            for item, expired in zip(date_items, _product_dates_expired([item[1] for item in date_items])):
+                item[2] = bool(expired)
+
+            # Attribute names and many values (brand, size, dates) repeat across SKUs; escape each once
+            escaped = {}
+
+            def escape(text):
+                if text not in escaped:
+                    escaped[text] = html.escape(text)
+                return escaped[text]
+
+            def render_details(product_data, attributes, items):
                 if attributes:
-                    for attr_name, attr_value in attributes.items():
-                        if attr_value is not None and str(attr_value).strip():
-                            value_str = str(attr_value)
-                            # Sanitize value string to ensure valid UTF-8
-                            value_str = value_str.encode('utf-8', 'ignore').decode('utf-8')
-
-                            # Special handling for date fields
-                            date_style = ''
-                            if 'Date' in attr_name and value_str.strip():
-                                try:
-                                    for date_format in ['%Y-%m-%d', '%d %b %Y', '%Y-%m-%dT%H:%M:%S.%fZ']:
-                                        try:
-                                            date_obj = datetime.strptime(value_str, date_format)
-                                            if date_obj < datetime.now():
-                                                date_style = ' style="background-color: #fee2e2; color: #dc2626; padding: 2px 4px; border-radius: 3px; font-weight: 600;"'
-                                            break
-                                        except:
-                                            continue
-                                except:
-                                    pass
-
-                            # Sanitize attribute name as well
-                            safe_attr_name = str(attr_name).encode('utf-8', 'ignore').decode('utf-8')
-
-                            html_content += '<div class="attribute-item">'
-                            html_content += f'<span class="attr-name"><strong>{html.escape(safe_attr_name)}:</strong></span> '
-                            html_content += f'<span class="attr-value"{date_style}>{html.escape(value_str)}</span>'
-                            html_content += '</div>'
-                else:
-                    # Handle case where product_data contains error info instead of attributes
-                    if 'error' in product_data:
-                        html_content += f'<div class="no-attributes" style="color: #dc2626; font-weight: 600;">⚠️ {html.escape(product_data["error"])}</div>'
-                        # If structured API error fields are present, surface them
-                        stage = product_data.get('stage')
-                        status = product_data.get('status')
-                        reason = product_data.get('reason')
-                        snippet = product_data.get('response_snippet')
-                        extra_rows = []
-                        if stage:
-                            extra_rows.append(f"Stage: {html.escape(str(stage))}")
-                        if status is not None:
-                            extra_rows.append(f"Status: {html.escape(str(status))}")
-                        if reason:
-                            extra_rows.append(f"Reason: {html.escape(str(reason))}")
-                        if snippet:
-                            # Truncate long snippets for UI
-                            snip = snippet if len(snippet) <= 300 else snippet[:300] + '...'
-                            extra_rows.append(f"Response: {html.escape(snip)}")
-                        if extra_rows:
-                            html_content += '<div class="no-attributes" style="font-size: 12px; margin-top: 8px; white-space: pre-wrap;">' + '<br>'.join(extra_rows) + '</div>'
-                        if 'raw_detail' in product_data:
-                            html_content += f'<div class="no-attributes" style="font-size: 12px; margin-top: 8px;">Raw data: {html.escape(product_data["raw_detail"])}</div>'
-                    else:
-                        html_content += '<div class="no-attributes">No additional attributes available</div>'
-                
-                html_content += '</div></div></div></td></tr>'
-            
-            html_content += '''
+                    return ''.join(
+                        '<div class="attribute-item">'
+                        f'<span class="attr-name"><strong>{escape(name)}:</strong></span> '
+                        f'<span class="attr-value"{EXPIRED_DATE_STYLE if expired else ""}>{escape(value)}</span>'
+                        '</div>'
+                        for name, value, expired in items
+                    )
+                # Handle case where product_data contains error info instead of attributes
+                if 'error' in product_data:
+                    details_html = f'<div class="no-attributes" style="color: #dc2626; font-weight: 600;">⚠️ {html.escape(product_data["error"])}</div>'
+                    # If structured API error fields are present, surface them
+                    stage = product_data.get('stage')
+                    status = product_data.get('status')
+                    reason = product_data.get('reason')
+                    snippet = product_data.get('response_snippet')
+                    extra_rows = []
+                    if stage:
+                        extra_rows.append(f"Stage: {html.escape(str(stage))}")
+                    if status is not None:
+                        extra_rows.append(f"Status: {html.escape(str(status))}")
+                    if reason:
+                        extra_rows.append(f"Reason: {html.escape(str(reason))}")
+                    if snippet:
+                        # Truncate long snippets for UI
+                        snip = snippet if len(snippet) <= 300 else snippet[:300] + '...'
+                        extra_rows.append(f"Response: {html.escape(snip)}")
+                    if extra_rows:
+                        details_html += '<div class="no-attributes" style="font-size: 12px; margin-top: 8px; white-space: pre-wrap;">' + '<br>'.join(extra_rows) + '</div>'
+                    if 'raw_detail' in product_data:
+                        details_html += f'<div class="no-attributes" style="font-size: 12px; margin-top: 8px;">Raw data: {html.escape(product_data["raw_detail"])}</div>'
+                    return details_html
+                return '<div class="no-attributes">No additional attributes available</div>'
+
+            if table_data != 'html':
+                # JSON modes: [sku, name, discontinued, details]; details are attribute
+                # triples rendered client-side on expand, or pre-rendered error notes
+                product_rows = [
+                    [sku, name, int(is_discontinued),
+                     items if attributes else render_details(product_data, attributes, items)]
+                    for sku, name, is_discontinued, product_data, attributes, items
+                    in zip(skus, product_names, discontinued, products, product_attributes, attribute_items)
+                ]
+                html_content += '''
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+        </div>'''
+                return html_content + _emit_table_data('productTable', product_rows, table_data, output_dir)
+
+            badges = np.where(discontinued, '<span class="product-type-badge discontinued">DISCONTINUED</span>',
+                              '<span class="product-type-badge ">ACTIVE</span>')
+            rows_html = []
+            for idx, sku, name, badge, product_data, attributes, items in zip(
+                    df.index, skus, product_names, badges, products, product_attributes, attribute_items):
+                safe_sku = html.escape(sku)
+                rows_html.append(
+                    # Main product row
+                    f'<tr class="product-row" onclick="toggleProductDetails(\'product_{idx}\')">'
+                    f'<td><strong>{safe_sku}</strong></td>'
+                    f'<td>{html.escape(str(name))}</td>'
+                    f'<td>{badge}</td>'
+                    f'<td><span class="toggle-icon" id="product_{idx}_toggle">▼</span></td>'
+                    '</tr>'
+                    # Details row (hidden by default)
+                    f'<tr id="product_{idx}_details" class="product-details-row" style="display: none;">'
+                    '<td colspan="4">'
+                    '<div class="product-details-content">'
+                    f'<h4>Product Details (SKU: {safe_sku})</h4>'
+                    '<div class="attributes-section">'
+                    '<div class="attributes-container">'
+                    f'{render_details(product_data, attributes, items)}'
+                    '</div></div></div></td></tr>'
+                )
+
+            return html_content + ''.join(rows_html) + '''
                         </tbody>
                     </table>
                 </div>
             </div>
         </div>'''
-            return html_content
         except Exception as e:
             return f"<p>Error loading product data: {str(e)}</p>"
-    
-    product_table_html = generate_product_availability_html(product_csv_path)
 
-    # Generate Page Views data by calling the newrelic_top_products.py script
+    # Generate Page Views data by querying New Relic in-process (Top Products, Top Pages, Broken Links Views)
     def generate_page_views_data():
-        """Call the newrelic_top_products.py script to generate Page Views data (Top Products, Top Pages, Broken Links Views)"""
+        """Collect the Page Views data with newrelic_top_products and render the tab content."""
         try:
-            # Run the newrelic_top_products.py script
-            # Run the script in binary mode to avoid UnicodeDecodeError when decoding stdout/stderr
-            # We'll decode manually with a tolerant strategy only if needed for logging
-            result = subprocess.run(
-                [sys.executable, 'newrelic_top_products.py'],
-                capture_output=True,
-                text=False,  # capture raw bytes to prevent decoding errors
-                env=os.environ.copy()
-            )
-            
-            if result.returncode == 0:
+            from newrelic_top_products import collect_page_views_data
+            data = collect_page_views_data()
+            if data is not None:
                 print("Page Views data generated successfully")
-                # Check for Page Views content file in current directory
-                page_views_file = 'page_views_content.html'
-                try:
-                    # Use more robust encoding handling
-                    with open(page_views_file, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                        # Sanitize the content to ensure it's valid UTF-8
-                        content = content.encode('utf-8', 'ignore').decode('utf-8')
-                        return content
-                except (FileNotFoundError, UnicodeDecodeError) as e:
-                    print(f"Error reading {page_views_file}: {e}")
-                    # Fallback to legacy file if new file missing
-                    legacy_file = 'top_products_content.html'
-                    try:
-                        with open(legacy_file, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            # Sanitize the content to ensure it's valid UTF-8
-                            content = content.encode('utf-8', 'ignore').decode('utf-8')
-                            return content
-                    except (FileNotFoundError, UnicodeDecodeError) as e:
-                        print(f"Error reading {legacy_file}: {e}")
-                        return "<p>Page Views content file not found or contains encoding errors.</p>"
-            else:
-                # Decode stderr safely for reporting
-                err_bytes = result.stderr or b""
-                error_msg = err_bytes.decode('utf-8', errors='ignore') or "Unknown error"
-                print(f"Error running newrelic_top_products.py: {error_msg}")
-                # Sanitize error message for safe HTML inclusion
-                safe_error = html.escape(error_msg)
-                return f"<p>Error generating Page Views data: {safe_error}</p>"
+            return render_page_views_html(data)
         except Exception as e:
-            print(f"Exception running newrelic_top_products.py: {str(e)}")
+            print(f"Exception generating Page Views data: {str(e)}")
             # Sanitize error message for safe HTML inclusion
             safe_error = html.escape(str(e))
             return f"<p>Error generating Page Views data: {safe_error}</p>"
-    
-    page_views_html = generate_page_views_data()
-    optimizely_html = generate_optimizely_section(optimizely_json_path)
+
+    # Expired-attribute styling depends on today's date, so the product section is re-rendered daily.
+    # Page Views is live New Relic data and is never cached.
+    product_inputs = None if table_cache_mode is None else [
+        file_fingerprint(product_csv_path), file_fingerprint(os.path.join('temp', 'product_export.csv')),
+        table_cache_mode, date.today().isoformat()]
+    optimizely_inputs = [file_fingerprint(path) for _, path in sorted(_resolve_optimizely_paths(optimizely_json_path).items())]
+
+    # Build the independent sections concurrently; total time is bounded by the slowest one.
+    # Page Views (network-bound New Relic queries) is submitted first and awaited last.
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        page_views_future = executor.submit(timed, 'page_views', generate_page_views_data)
+        changes_future = executor.submit(timed, 'changes', build_changes_section)
+        au_table_future = executor.submit(timed, 'au_table', build_link_table, au_error_df, 'auLinkTable', au_csv_path)
+        nz_table_future = executor.submit(timed, 'nz_table', build_link_table, nz_error_df, 'nzLinkTable', nz_csv_path)
+        product_future = executor.submit(timed, 'product_availability', cached, 'product_availability', product_inputs,
+                                         lambda: generate_product_availability_html(product_csv_path))
+        optimizely_future = executor.submit(timed, 'optimizely', cached, 'optimizely', optimizely_inputs,
+                                            lambda: generate_optimizely_section(optimizely_json_path))
+
+        au_table_html = au_table_future.result()
+        nz_table_html = nz_table_future.result()
+        changes, changes_html = changes_future.result()
+        product_table_html = product_future.result()
+        optimizely_html = optimizely_future.result()
+        page_views_html = page_views_future.result()
 
     # Build Changes tab HTML
     def render_changes_section(title: str, items: list[tuple[str,str]], change_type: str):
@@ -2760,13 +2753,13 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
     if changes['yesterday']['has_data']:
         yesterday_content = f"""
                     <div class="changes-summary">
-                        <div class="change-count added">➕ Added: {len(changes['yesterday']['added'])}</div>
-                        <div class="change-count removed">➖ Removed: {len(changes['yesterday']['removed'])}</div>
+                        <div class="change-count added">➕ Added: {changes['yesterday']['added_count']}</div>
+                        <div class="change-count removed">➖ Removed: {changes['yesterday']['removed_count']}</div>
                         <a class=\"download-tab-button\" download href=\"changes_all.csv?{cache_buster}\">Download All Changes (CSV)</a>
                     </div>
                     <div class="collapsible-section">
                         <div class="collapsible-header" onclick="toggleSection('yesterday-added-section')">
-                            <span>Added Links ({len(changes['yesterday']['added'])})</span>
+                            <span>Added Links ({changes['yesterday']['added_count']})</span>
                             <span class="toggle-icon" id="yesterday-added-toggle">▼</span>
                         </div>
                         <div class="collapsible-content" id="yesterday-added-section">
@@ -2775,7 +2768,7 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
                     </div>
                     <div class="collapsible-section">
                         <div class="collapsible-header" onclick="toggleSection('yesterday-removed-section')">
-                            <span>Removed Links ({len(changes['yesterday']['removed'])})</span>
+                            <span>Removed Links ({changes['yesterday']['removed_count']})</span>
                             <span class="toggle-icon" id="yesterday-removed-toggle">▼</span>
                         </div>
                         <div class="collapsible-content" id="yesterday-removed-section">
@@ -2800,14 +2793,14 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
     if changes['week']['has_data']:
         week_content = f"""
                     <div class="changes-summary">
-                        <div class="change-count added">➕ Added: {len(changes['week']['added'])}</div>
-                        <div class="change-count removed">➖ Removed: {len(changes['week']['removed'])}</div>
+                        <div class="change-count added">➕ Added: {changes['week']['added_count']}</div>
+                        <div class="change-count removed">➖ Removed: {changes['week']['removed_count']}</div>
                         <a class=\"download-tab-button\" download href=\"changes_all.csv?{cache_buster}\">Download All Changes (CSV)</a>
                     </div>
                     
                     <div class="collapsible-section">
                         <div class="collapsible-header" onclick="toggleSection('week-added-section')">
-                            <span>➕ Added Links ({len(changes['week']['added'])})</span>
+                            <span>➕ Added Links ({changes['week']['added_count']})</span>
                             <span class="toggle-icon" id="week-added-toggle">▼</span>
                         </div>
                         <div class="collapsible-content" id="week-added-section">
@@ -2817,7 +2810,7 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
                     
                     <div class="collapsible-section">
                         <div class="collapsible-header" onclick="toggleSection('week-removed-section')">
-                            <span>➖ Removed Links ({len(changes['week']['removed'])})</span>
+                            <span>➖ Removed Links ({changes['week']['removed_count']})</span>
                             <span class="toggle-icon" id="week-removed-toggle">▼</span>
                         </div>
                         <div class="collapsible-content" id="week-removed-section">
@@ -2838,7 +2831,38 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
                     </div>
         """
 
-    html_content = f"""
+    nz_tab_html = [f"""
+                <div class="summary-container">
+                    <span class="summary-item">🔍 Total Links Checked (NZ): {total_links_nz}</span>
+                    <span class="summary-item">❌ Broken Links (NZ): {broken_links_nz}</span>
+                    <span class="summary-item">✅ Valid Links (NZ): {total_links_nz - broken_links_nz}</span>
+                    <span class="summary-item"><a href="nz_link_check_results.csv?{cache_buster}" download class="download-tab-button">Download NZ Full CSV</a></span>
+                </div>
+                """, nz_table_html, """
+            """]
+    screenshots_tab_html = """
+                <div class="summary-container">
+                    <span class="summary-item">📸 Website Screenshots</span>
+                    <span class="summary-item">🗄️ Database Storage</span>
+                    <span class="summary-item">📊 Visual Comparison</span>
+                    <span class="summary-item">📅 Historical Tracking</span>
+                </div>
+                <div style="background: #f8fafc; padding: 20px; border-radius: 12px; border: 1px solid #e2e8f0; margin: 20px 0;">
+                    <h3 style="margin: 0 0 16px 0; color: #1e293b;">🖼️ Website Screenshots - Database Driven</h3>
+                    <p style="margin: 0 0 16px 0; color: #64748b; font-size: 14px;">
+                        Visual monitoring with persistent storage and date comparison. Screenshots are stored in SQLite database for historical tracking and comparison between different dates.
+                    </p>
+                    <div style="background: white; border: 1px solid #e2e8f0; border-radius: 8px; padding: 16px;">
+                        <iframe src="screenshots/screenshots.html" width="100%" height="800px" style="border: none; border-radius: 6px;" title="Website Screenshots - Database Comparison">
+                            <p>Your browser doesn't support iframes. <a href="screenshots/screenshots.html" target="_blank">View screenshots comparison directly</a></p>
+                        </iframe>
+                    </div>
+                </div>
+            """
+
+    # The page is a list of fragments streamed to disk one by one (see write_html_stream), so the
+    # large sections are never concatenated into one document-sized string.
+    document = [f"""
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -2882,11 +2906,17 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
                     tablinks[i].className = tablinks[i].className.replace(\" active\", \"\");
                 }}
                 
+                // Update active tab
+                if (evt && evt.currentTarget) {{
+                    evt.currentTarget.className += \" active\";
+                }}
+
                 // Show the selected tab content
                 var tabContent = document.getElementById(reportName);
-                if (tabContent) {{
-                    tabContent.style.display = \"block\";
-                    
+                if (!tabContent) return;
+                tabContent.style.display = \"block\";
+
+                loadTabFragment(tabContent).then(function() {{
                     // If it's the Changes tab, make sure all collapsible sections are expanded
                     if (reportName === 'Changes') {{
                         // Trigger any necessary initialization for the Changes tab
@@ -2894,22 +2924,38 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
                             initializeChangesTab();
                         }}
                     }}
-                }}
-                
-                // Update active tab
-                if (evt && evt.currentTarget) {{
-                    evt.currentTarget.className += \" active\";
-                }}
-                
-                // Initialize Page Views infinite scroll when Page Views tab becomes active
-                if (reportName === 'Page_Views') {{
-                    // Small delay to ensure DOM is updated
-                    setTimeout(function() {{
-                        if (typeof initializeInfiniteScroll === 'function') {{
-                            initializeInfiniteScroll('PV_Top_Products');
+
+                    // Initialize Page Views infinite scroll when Page Views tab becomes active
+                    if (reportName === 'Page_Views') {{
+                        // Small delay to ensure DOM is updated
+                        setTimeout(function() {{
+                            if (typeof initializeInfiniteScroll === 'function') {{
+                                initializeInfiniteScroll('PV_Top_Products');
+                            }}
+                        }}, 100);
+                    }}
+                }});
+            }}
+
+            // Tabs written with --split-tabs are empty placeholders with a data-fragment URL.
+            // The fragment is fetched the first time the tab is opened; jQuery's html() runs
+            // its inline scripts, then any DataTables it contains are initialised.
+            var tabFragments = {{}};
+            function loadTabFragment(tabContent) {{
+                var source = tabContent.getAttribute('data-fragment');
+                if (!source) return $.Deferred().resolve().promise();
+                if (!tabFragments[source]) {{
+                    tabFragments[source] = $.get(source + '?{cache_buster}').then(function(fragment) {{
+                        $(tabContent).html(fragment);
+                        if (typeof window.initReportTables === 'function') {{
+                            window.initReportTables();
                         }}
-                    }}, 100);
+                    }}, function() {{
+                        delete tabFragments[source];
+                        tabContent.innerHTML = '<p>Failed to load this tab. Please refresh the page.</p>';
+                    }});
                 }}
+                return tabFragments[source];
             }}
 
             // Initialize the page
@@ -2965,52 +3011,24 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
                     <span class="summary-item">✅ Valid Links (AU): {total_links_au - broken_links_au}</span>
                     <span class="summary-item"><a href="au_link_check_results.csv?{cache_buster}" download class="download-tab-button">Download AU Full CSV</a></span>
                 </div>
-                {au_table_html}
-            </div>
-
-            <div id="NZ_Report" class="tab-content">
-                <div class="summary-container">
-                    <span class="summary-item">🔍 Total Links Checked (NZ): {total_links_nz}</span>
-                    <span class="summary-item">❌ Broken Links (NZ): {broken_links_nz}</span>
-                    <span class="summary-item">✅ Valid Links (NZ): {total_links_nz - broken_links_nz}</span>
-                    <span class="summary-item"><a href="nz_link_check_results.csv?{cache_buster}" download class="download-tab-button">Download NZ Full CSV</a></span>
-                </div>
-                {nz_table_html}
-            </div>
-
-            {changes_html}
-
-            <div id="Product_Availability" class="tab-content">
-                {product_table_html}
-            </div>
-
-            <div id="Page_Views" class="tab-content">
-                {page_views_html}
+                """,
+        au_table_html,
+        """
             </div>
 
-            <div id="Optimizely" class="tab-content">
-                {optimizely_html}
-            </div>
-
-            <div id="Screenshots" class="tab-content">
-                <div class="summary-container">
-                    <span class="summary-item">📸 Website Screenshots</span>
-                    <span class="summary-item">🗄️ Database Storage</span>
-                    <span class="summary-item">📊 Visual Comparison</span>
-                    <span class="summary-item">📅 Historical Tracking</span>
-                </div>
-                <div style="background: #f8fafc; padding: 20px; border-radius: 12px; border: 1px solid #e2e8f0; margin: 20px 0;">
-                    <h3 style="margin: 0 0 16px 0; color: #1e293b;">🖼️ Website Screenshots - Database Driven</h3>
-                    <p style="margin: 0 0 16px 0; color: #64748b; font-size: 14px;">
-                        Visual monitoring with persistent storage and date comparison. Screenshots are stored in SQLite database for historical tracking and comparison between different dates.
-                    </p>
-                    <div style="background: white; border: 1px solid #e2e8f0; border-radius: 8px; padding: 16px;">
-                        <iframe src="screenshots/screenshots.html" width="100%" height="800px" style="border: none; border-radius: 6px;" title="Website Screenshots - Database Comparison">
-                            <p>Your browser doesn't support iframes. <a href="screenshots/screenshots.html" target="_blank">View screenshots comparison directly</a></p>
-                        </iframe>
-                    </div>
-                </div>
-            </div>
+            """,
+        render_tab('NZ_Report', nz_tab_html),
+        "\n\n            ",
+        render_tab('Changes', changes_html) if split_tabs else changes_html,
+        "\n\n            ",
+        render_tab('Product_Availability', product_table_html),
+        "\n\n            ",
+        render_tab('Page_Views', page_views_html),
+        "\n\n            ",
+        render_tab('Optimizely', optimizely_html),
+        "\n\n            ",
+        render_tab('Screenshots', screenshots_tab_html),
+        f"""
 
             <!-- Categories tab content disabled -->
         </div>
@@ -3171,58 +3189,145 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
                 // Add cache-busting to any dynamically loaded content
                 var timestamp = new Date().getTime();
 
-                // Initialize DataTables
-                ['#auLinkTable', '#nzLinkTable'].forEach(function(tableId) {{
-                    if (!$(tableId).length) return; // If table doesn't exist, skip
+                // Tables generated with --table-data json/sidecar carry their rows as JSON
+                // (inline <script type="application/json"> or a data-source file) instead of
+                // <tr> markup; deferRender builds row nodes only for the page being drawn.
+                function escapeHtml(value) {{
+                    return String(value).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;')
+                        .replace(/"/g, '&quot;').replace(/'/g, '&#x27;');
+                }}
 
-                    var table = $(tableId).DataTable({{
-                        pageLength: 100,
-                        orderCellsTop: true,
-                        fixedHeader: true,
-                        initComplete: function () {{
-                            var api = this.api();
-                            // Check for the correct number of filterable columns (Timestamp, URL, Status, Response_Time, Error_Message)
-                            var filterHeaderCells = $(tableId + ' thead tr.filters th');
-                            if (filterHeaderCells.length !== 5) {{
-                                console.error('Expected 5 filterable columns for ' + tableId + ', found ' + filterHeaderCells.length + '. Skipping filter setup.');
-                                return;
-                            }}
+                function jsonTableOptions(tableId) {{
+                    var table = $(tableId);
+                    var inline = document.getElementById(table.attr('id') + 'Data');
+                    var source = table.attr('data-source');
+                    if (!inline && !source) return {{}};
+                    var options = {{ deferRender: true }};
+                    if (inline) {{
+                        options.data = JSON.parse(inline.textContent).rows;
+                    }} else {{
+                        options.ajax = {{ url: source + '?' + timestamp, dataSrc: 'rows' }};
+                    }}
+                    return options;
+                }}
 
-                            api.columns().eq(0).each(function (colIdx) {{
-                                // Get the input element for the current column's filter
-                                var inputElement = $(filterHeaderCells[colIdx]).find('input');
-
-                                $(inputElement)
-                                    .off('keyup change') // Remove previous event handlers to prevent duplicates
-                                    .on('keyup change', function (e) {{
-                                        e.stopPropagation();
-                                        // Perform search, treating input as literal string (regex: false, smart: false)
-                                        var searchValue = this.value;
-                                        api.column(colIdx).search(searchValue, false, false).draw();
-
-                                        // Restore cursor position if the element is still focused
-                                        if (document.activeElement === this) {{
-                                            var cursorPos = this.selectionStart;
-                                            this.focus();
-                                            this.setSelectionRange(cursorPos, cursorPos);
-                                        }}
-                                    }});
-                            }});
-                        }},
-                        rowCallback: function(row, data, index){{
-                             var statusCell = data[2]; // Status is now at index 2 (Timestamp, URL, Status, ...)
-                             var status = parseInt(statusCell) || 0;
-                             $(row).removeClass('ok error redirect');
-                            if (status >= 400) {{
-                                $(row).addClass('error');
-                            }} else if (status >= 300) {{
-                                $(row).addClass('redirect');
-                            }} else if (status === 200) {{
-                                $(row).addClass('ok');
-                            }}
+                function linkColumnDefs(tableId) {{
+                    var urlColumn = parseInt($(tableId).attr('data-url-column'), 10);
+                    return [{{
+                        targets: '_all',
+                        render: function(data, type, row, meta) {{
+                            if (type !== 'display') return data;
+                            var escaped = escapeHtml(data);
+                            return meta.col === urlColumn ? "<a href='" + escaped + "' target='_blank'>" + escaped + "</a>" : escaped;
+                        }}
+                    }}];
+                }}
+
+                // Initialize DataTables for the report tables currently in the DOM. Called again
+                // after a lazily loaded tab fragment (see loadTabFragment) is inserted.
+                window.initReportTables = function() {{
+                    ['#auLinkTable', '#nzLinkTable'].forEach(function(tableId) {{
+                        // Skip missing tables and tables already initialised by an earlier call
+                        if (!$(tableId).length || $.fn.dataTable.isDataTable(tableId)) return;
+
+                        var dataOptions = jsonTableOptions(tableId);
+                        if (dataOptions.deferRender) {{
+                            dataOptions.columnDefs = linkColumnDefs(tableId);
                         }}
+
+                        var table = $(tableId).DataTable($.extend(dataOptions, {{
+                            pageLength: 100,
+                            orderCellsTop: true,
+                            fixedHeader: true,
+                            initComplete: function () {{
+                                var api = this.api();
+                                // Check for the correct number of filterable columns (Timestamp, URL, Status, Response_Time, Error_Message)
+                                var filterHeaderCells = $(tableId + ' thead tr.filters th');
+                                if (filterHeaderCells.length !== 5) {{
+                                    console.error('Expected 5 filterable columns for ' + tableId + ', found ' + filterHeaderCells.length + '. Skipping filter setup.');
+                                    return;
+                                }}
+
+                                api.columns().eq(0).each(function (colIdx) {{
+                                    // Get the input element for the current column's filter
+                                    var inputElement = $(filterHeaderCells[colIdx]).find('input');
+
+                                    $(inputElement)
+                                        .off('keyup change') // Remove previous event handlers to prevent duplicates
+                                        .on('keyup change', function (e) {{
+                                            e.stopPropagation();
+                                            // Perform search, treating input as literal string (regex: false, smart: false)
+                                            var searchValue = this.value;
+                                            api.column(colIdx).search(searchValue, false, false).draw();
+
+                                            // Restore cursor position if the element is still focused
+                                            if (document.activeElement === this) {{
+                                                var cursorPos = this.selectionStart;
+                                                this.focus();
+                                                this.setSelectionRange(cursorPos, cursorPos);
+                                            }}
+                                        }});
+                                }});
+                            }},
+                            rowCallback: function(row, data, index){{
+                                 var statusCell = data[2]; // Status is now at index 2 (Timestamp, URL, Status, ...)
+                                 var status = parseInt(statusCell) || 0;
+                                 $(row).removeClass('ok error redirect');
+                                if (status >= 400) {{
+                                    $(row).addClass('error');
+                                }} else if (status >= 300) {{
+                                    $(row).addClass('redirect');
+                                }} else if (status === 200) {{
+                                    $(row).addClass('ok');
+                                }}
+                            }}
+                        }}));
                     }});
-                }});
+
+                    // Product Availability table in JSON mode: rows are [sku, name, discontinued, details]
+                    // and the details child row is only rendered when a product is expanded
+                    if ($('#productTable').length && !$.fn.dataTable.isDataTable('#productTable')) {{
+                        var expiredDateStyle = {json.dumps(EXPIRED_DATE_STYLE)};
+                        var renderProductDetails = function(data) {{
+                            var details = data[3];
+                            var body = typeof details === 'string' ? details : details.map(function(item) {{
+                                return '<div class="attribute-item"><span class="attr-name"><strong>' + escapeHtml(item[0]) + ':</strong></span> ' +
+                                    '<span class="attr-value"' + (item[2] ? expiredDateStyle : '') + '>' + escapeHtml(item[1]) + '</span></div>';
+                            }}).join('');
+                            return '<div class="product-details-content"><h4>Product Details (SKU: ' + escapeHtml(data[0]) + ')</h4>' +
+                                '<div class="attributes-section"><div class="attributes-container">' + body + '</div></div></div>';
+                        }};
+                        var productTable = $('#productTable').DataTable($.extend(jsonTableOptions('#productTable'), {{
+                            pageLength: 100,
+                            columnDefs: [
+                                {{ targets: 0, render: function(data, type) {{ return type === 'display' ? '<strong>' + escapeHtml(data) + '</strong>' : data; }} }},
+                                {{ targets: 1, render: function(data, type) {{ return type === 'display' ? escapeHtml(data) : data; }} }},
+                                {{ targets: 2, render: function(data, type) {{
+                                    var label = data ? 'DISCONTINUED' : 'ACTIVE';
+                                    return type === 'display' ? '<span class="product-type-badge ' + (data ? 'discontinued' : '') + '">' + label + '</span>' : label;
+                                }} }},
+                                {{ targets: 3, orderable: false, searchable: false, render: function(data, type) {{
+                                    return type === 'display' ? '<span class="toggle-icon">▼</span>' : '';
+                                }} }}
+                            ],
+                            createdRow: function(row) {{
+                                $(row).addClass('product-row');
+                            }}
+                        }}));
+                        $('#productTable tbody').on('click', 'tr.product-row', function() {{
+                            var row = productTable.row(this);
+                            var toggleIcon = $(this).find('.toggle-icon');
+                            if (row.child.isShown()) {{
+                                row.child.hide();
+                                toggleIcon.text('▼').removeClass('rotated');
+                            }} else {{
+                                row.child(renderProductDetails(row.data()), 'product-details-row').show();
+                                toggleIcon.text('▲').addClass('rotated');
+                            }}
+                        }});
+                    }}
+                }};
+                window.initReportTables();
 
                 // Initialize DataTables for changes tables
                 var changesTables = [
@@ -3345,15 +3450,18 @@ def generate_combined_html_report(au_csv_path, nz_csv_path, output_html_path='co
         </script>
     </body>
     </html>
-    """
+    """]
 
-    # Sanitize the final HTML content to ensure valid UTF-8
-    html_content = html_content.encode('utf-8', 'ignore').decode('utf-8')
-    
-    with open(output_html_path, 'w', encoding='utf-8', errors='ignore') as f:
-        f.write(html_content)
+    write_html_stream(output_html_path, document)
     print(f"✅ Combined HTML report saved to {output_html_path}")
 
+    total_seconds = time.perf_counter() - report_start
+    timings = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in sorted(section_timings.items(), key=lambda item: -item[1]))
+    print(f"⏱️ Section timings: {timings} | wall-clock {total_seconds:.2f}s (sum of sections {sum(section_timings.values()):.2f}s)")
+    if cache is not None:
+        print(f"♻️ Section cache ({cache.cache_dir}): reused {', '.join(sorted(cache.hits)) or 'none'}; "
+              f"rebuilt {', '.join(sorted(cache.misses)) or 'none'}")
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Generate a combined HTML report for AU and NZ link checks.')
     parser.add_argument('--au-csv', default='au_link_check_results.csv', help='Path to the AU link check results CSV file.')
@@ -3361,6 +3469,17 @@ if __name__ == '__main__':
     parser.add_argument('--product-csv', default='product_export.csv', help='Path to the product data CSV file.')
     parser.add_argument('--optimizely-json', default='kmart.json', help='Path to the Optimizely JSON data file.')
     parser.add_argument('--output-html', default='combined_report.html', help='Path to save the combined HTML report.')
+    parser.add_argument('--table-data', default='html', choices=TABLE_DATA_MODES,
+                        help="How table rows are shipped: inline <tr> markup (html), an embedded JSON block (json) "
+                             "or <table_id>.json files next to the report (sidecar). JSON modes render rows with DataTables deferRender.")
+    parser.add_argument('--split-tabs', action='store_true',
+                        help="Write a lightweight shell page with the AU tab inline and every other tab as a fragment in "
+                             "<report>_tabs/, fetched when the tab is first opened (must be served over HTTP).")
+    parser.add_argument('--cache-dir', default='.report_cache',
+                        help="Directory for cached section fragments; unchanged sections are reused from here. Pass '' to disable.")
+    parser.add_argument('--force', action='store_true', help='Rebuild every section, ignoring (and refreshing) the section cache.')
     args = parser.parse_args()
 
-    generate_combined_html_report(args.au_csv, args.nz_csv, args.output_html, args.product_csv, optimizely_json_path=args.optimizely_json)
+    generate_combined_html_report(args.au_csv, args.nz_csv, args.output_html, args.product_csv,
+                                  optimizely_json_path=args.optimizely_json, table_data=args.table_data,
+                                  split_tabs=args.split_tabs, cache_dir=args.cache_dir or None, force=args.force)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Retention for every SQLite store, with file-space reclamation.
+
+Each store has a RetentionPolicy: the tables and date columns to prune and
+how many days to keep (None keeps everything and only reclaims free pages).
+Old rows are deleted one calendar day at a time, each day in its own short
+transaction across all of the store's tables, so readers are never blocked
+for long and related tables (broken_links / daily_summary / snapshot_runs)
+stay consistent.
+
+Deleting rows only puts pages on SQLite's freelist; the file never shrinks.
+After pruning, databases are switched to auto_vacuum=INCREMENTAL (a one-time
+VACUUM for files created before db_connection set it) and
+PRAGMA incremental_vacuum returns the free pages to the filesystem, so the
+files copied between workflow runs stop growing.
+
+Usage:
+  python retention.py                            # every store that exists
+  python retention.py --store broken_links --keep-days 60
+"""
+
+import argparse
+import os
+import sqlite3
+from datetime import date, timedelta
+from typing import NamedTuple, Optional
+
+import db_connection
+
+AUTO_VACUUM_INCREMENTAL = 2  # PRAGMA auto_vacuum value
+
+
+class RetentionPolicy(NamedTuple):
+    db_path: str
+    keep_days: Optional[int]
+    tables: tuple = ()        # (table, date column) pairs pruned together, day by day
+    url_refs: tuple = ()      # (table, column) pairs referencing urls.id; unreferenced urls are pruned
+
+
+class RetentionResult(NamedTuple):
+    deleted: dict             # table -> rows deleted
+    freed_bytes: int
+
+
+POLICIES = {
+    'broken_links': RetentionPolicy('broken_links.db', 60,
+                                    (('broken_links', 'run_date'), ('daily_summary', 'run_date'),
+                                     ('snapshot_runs', 'run_date')),
+                                    (('broken_links', 'url_id'),)),
+    'screenshots': RetentionPolicy('screenshots.db', 30, (('screenshots', 'date'),)),
+    'page_views': RetentionPolicy('page_views_daily.db', None),
+    'products': RetentionPolicy('product_availability.db', None),
+    'optimizely_flags': RetentionPolicy('optimizely_flags.db', None),
+}
+
+
+def _existing_tables(conn: sqlite3.Connection, tables):
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return [(table, column) for table, column in tables if table in names]
+
+
+def _next_batch_bound(conn: sqlite3.Connection, tables, cutoff: str):
+    """Upper bound (exclusive) of the oldest remaining day below cutoff, or None when nothing is left."""
+    oldest = None
+    for table, column in tables:
+        value = conn.execute(f'SELECT MIN("{column}") FROM "{table}" WHERE "{column}" < ?', (cutoff,)).fetchone()[0]
+        if value is not None and (oldest is None or str(value) < oldest):
+            oldest = str(value)
+    if oldest is None:
+        return None
+    try:
+        return min((date.fromisoformat(oldest[:10]) + timedelta(days=1)).isoformat(), cutoff)
+    except ValueError:
+        return cutoff  # Not an ISO date: delete everything below cutoff in one batch
+
+
+def delete_before(conn: sqlite3.Connection, policy: RetentionPolicy, cutoff) -> dict:
+    """Delete the policy's rows dated before cutoff, one day per transaction; returns rows deleted per table."""
+    tables = _existing_tables(conn, policy.tables)
+    cutoff = cutoff.isoformat() if isinstance(cutoff, date) else str(cutoff)
+    deleted = {table: 0 for table, _ in tables}
+    while True:
+        bound = _next_batch_bound(conn, tables, cutoff)
+        if bound is None:
+            break
+        with db_connection.transaction(conn):
+            for table, column in tables:
+                deleted[table] += conn.execute(f'DELETE FROM "{table}" WHERE "{column}" < ?', (bound,)).rowcount
+    if any(deleted.values()):
+        deleted['urls'] = _prune_urls(conn, policy)
+    return deleted
+
+
+def _prune_urls(conn: sqlite3.Connection, policy: RetentionPolicy) -> int:
+    refs = _existing_tables(conn, policy.url_refs)
+    if not refs or not _existing_tables(conn, (('urls', 'id'),)):
+        return 0
+    unreferenced = " AND ".join(f'NOT EXISTS (SELECT 1 FROM "{table}" WHERE "{table}"."{column}" = urls.id)'
+                                for table, column in refs)
+    with db_connection.transaction(conn):
+        return conn.execute(f"DELETE FROM urls WHERE {unreferenced}").rowcount
+
+
+def reclaim_space(conn: sqlite3.Connection) -> int:
+    """Return free pages to the filesystem; returns the bytes released.
+
+    Databases not yet in auto_vacuum=INCREMENTAL mode are converted with one full VACUUM.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")  # Required once for the mode change to take effect
+    elif conn.execute("PRAGMA freelist_count").fetchone()[0]:
+        # executescript() steps the pragma to completion; execute() would free a single page
+        conn.executescript("PRAGMA incremental_vacuum;")
+    # In WAL mode the file is only truncated when the freed pages are checkpointed
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    return (page_count - conn.execute("PRAGMA page_count").fetchone()[0]) * page_size
+
+
+def enforce(conn: sqlite3.Connection, policy: RetentionPolicy, keep_days: Optional[int] = None,
+            vacuum: bool = True) -> RetentionResult:
+    """Apply a policy on an open connection. keep_days overrides policy.keep_days."""
+    keep_days = policy.keep_days if keep_days is None else keep_days
+    deleted = {}
+    if keep_days is not None and policy.tables:
+        deleted = delete_before(conn, policy, date.today() - timedelta(days=keep_days))
+    freed = reclaim_space(conn) if vacuum else 0
+    return RetentionResult(deleted, freed)
+
+
+def enforce_store(name: str, db_path: Optional[str] = None, keep_days: Optional[int] = None,
+                  vacuum: bool = True) -> Optional[RetentionResult]:
+    """Apply POLICIES[name] to its database file (or db_path); None when the file does not exist."""
+    policy = POLICIES[name]
+    db_path = db_path or policy.db_path
+    if not os.path.exists(db_path):
+        return None
+    conn = db_connection.connect(db_path)
+    try:
+        return enforce(conn, policy, keep_days, vacuum)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply retention policies and reclaim free space in the SQLite stores")
+    parser.add_argument('--store', action='append', choices=sorted(POLICIES), default=None,
+                        help="Store to process (repeatable; default: all)")
+    parser.add_argument('--db', default=None, help="Database path override (with a single --store)")
+    parser.add_argument('--keep-days', type=int, default=None, help="Override the policy's retention window")
+    parser.add_argument('--no-vacuum', action='store_true', help="Delete old rows but do not reclaim file space")
+    args = parser.parse_args()
+    if args.db and len(args.store or []) != 1:
+        parser.error("--db requires exactly one --store")
+
+    for name in args.store or POLICIES:
+        result = enforce_store(name, args.db, args.keep_days, vacuum=not args.no_vacuum)
+        if result is None:
+            print(f"⏭️ {name}: {args.db or POLICIES[name].db_path} not found; skipping")
+            continue
+        removed = ", ".join(f"{table} {count}" for table, count in result.deleted.items()) or "no rows deleted"
+        print(f"🧹 {name}: {removed}; reclaimed {result.freed_bytes / 1024 / 1024:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+robots.txt support for the AU/NZ link checkers.
+
+RobotsCache fetches robots.txt once per host (through the crawler's own
+session, so the same User-Agent and transport are used), caches the parsed
+rules, and answers allowed() before a URL is enqueued. Any Crawl-delay or
+Request-rate for our user agent is pushed into the shared RateLimiter so
+requests to that host are spaced accordingly.
+
+urllib.robotparser only does literal prefix matching with the first rule
+that matches, so WildcardRobotFileParser re-evaluates its parsed rules the
+way Google does: '*' matches any run of characters, a trailing '$' anchors
+the end of the URL, and the longest matching Allow/Disallow path wins
+(Allow on a tie).
+"""
+
+import logging
+import re
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+ROBOTS_TTL = 24 * 60 * 60  # Seconds before a host's robots.txt is refetched
+ROBOTS_TIMEOUT = 10
+
+
+def _rule_pattern(path):
+    """Compile a robots.txt rule path with '*' and trailing '$' wildcards into a prefix regex."""
+    anchored = path.endswith('$')
+    if anchored:
+        path = path[:-1]
+    pattern = '.*'.join(re.escape(part) for part in path.split('*'))
+    return re.compile(pattern + (r'\Z' if anchored else ''), re.DOTALL)
+
+
+class WildcardRobotFileParser(RobotFileParser):
+    """RobotFileParser whose can_fetch() supports '*'/'$' wildcards and longest-match precedence."""
+
+    def __init__(self, url=''):
+        super().__init__(url)
+        self._patterns = {}
+
+    def _matcher(self, rule_path):
+        # RuleLine stores paths percent-quoted ('*' as %2A); compare both sides unquoted
+        if rule_path not in self._patterns:
+            self._patterns[rule_path] = _rule_pattern(unquote(rule_path))
+        return self._patterns[rule_path]
+
+    def _entry_for(self, useragent):
+        for entry in self.entries:
+            if entry.applies_to(useragent):
+                return entry
+        return self.default_entry
+
+    def can_fetch(self, useragent, url):
+        if self.disallow_all:
+            return False
+        if self.allow_all:
+            return True
+        if not self.last_checked:
+            return False
+        entry = self._entry_for(useragent)
+        if entry is None:
+            return True
+        parts = urlsplit(url)
+        target = unquote(parts.path or '/') + (f"?{unquote(parts.query)}" if parts.query else '')
+        best_length, allowed = -1, True
+        for rule in entry.rulelines:
+            if not rule.path:
+                continue  # An empty Disallow allows everything
+            length = len(unquote(rule.path))
+            if self._matcher(rule.path).match(target) and (
+                    length > best_length or (length == best_length and rule.allowance)):
+                best_length, allowed = length, rule.allowance
+        return allowed
+
+
+class RobotsCache:
+    def __init__(self, session, user_agent, rate_limiter=None, ttl=ROBOTS_TTL, timeout=ROBOTS_TIMEOUT):
+        self.session = session
+        self.user_agent = user_agent
+        self.rate_limiter = rate_limiter
+        self.ttl = ttl
+        self.timeout = timeout
+        self._rules = {}  # "scheme://netloc" -> (WildcardRobotFileParser, fetched_at)
+        self._lock = threading.Lock()
+        self._host_locks = {}
+        self.disallowed = 0
+
+    def _host_lock(self, origin):
+        with self._lock:
+            return self._host_locks.setdefault(origin, threading.Lock())
+
+    def _fetch(self, origin):
+        parser = WildcardRobotFileParser(f"{origin}/robots.txt")
+        try:
+            response = self.session.get(parser.url, timeout=self.timeout, allow_redirects=True)
+            if response.status_code in (401, 403):
+                parser.disallow_all = True
+            elif response.status_code >= 400:
+                parser.allow_all = True
+            else:
+                parser.parse(response.text.splitlines())
+        except requests.RequestException as e:
+            # Unreachable robots.txt is treated as "no rules" rather than blocking the crawl
+            logging.warning(f"Could not fetch {parser.url}: {e}; assuming all URLs are allowed")
+            parser.allow_all = True
+        parser.modified()
+        return parser
+
+    def rules_for(self, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        cached = self._rules.get(origin)
+        if cached and time.time() - cached[1] < self.ttl:
+            return cached[0]
+        with self._host_lock(origin):
+            cached = self._rules.get(origin)
+            if cached and time.time() - cached[1] < self.ttl:
+                return cached[0]
+            parser = self._fetch(origin)
+            self._rules[origin] = (parser, time.time())
+            delay = self._delay_from(parser)
+            if delay and self.rate_limiter is not None:
+                self.rate_limiter.set_host_delay(parts.netloc, delay)
+            logging.info(f"Loaded robots.txt for {origin}" + (f" (crawl delay {delay}s)" if delay else ""))
+            return parser
+
+    def _delay_from(self, parser):
+        delay = parser.crawl_delay(self.user_agent)
+        if delay:
+            return float(delay)
+        rate = parser.request_rate(self.user_agent)
+        if rate and rate.requests:
+            return rate.seconds / rate.requests
+        return None
+
+    def allowed(self, url) -> bool:
+        if self.rules_for(url).can_fetch(self.user_agent, url):
+            return True
+        with self._lock:
+            self.disallowed += 1
+        return False
+
+    def crawl_delay(self, url):
+        return self._delay_from(self.rules_for(url))
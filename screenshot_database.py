@@ -4,12 +4,14 @@ Screenshot Database Manager
 Handles storage and retrieval of screenshots with date-based comparison functionality
 """
 
-import sqlite3
 import os
 import json
 from datetime import datetime, date, timedelta
 from pathlib import Path
 
+import retention
+from db_connection import shared_connection, transaction
+
 class ScreenshotDatabase:
     def __init__(self, db_path='screenshots.db'):
         self.db_path = db_path
@@ -17,7 +19,7 @@ class ScreenshotDatabase:
 
     def init_database(self):
         """Initialize the database schema"""
-        conn = sqlite3.connect(self.db_path)
+        conn = shared_connection(self.db_path)
         cursor = conn.cursor()
 
         # Create screenshots table
@@ -41,7 +43,6 @@ class ScreenshotDatabase:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_date_page ON screenshots(date, page_name)')
 
         conn.commit()
-        conn.close()
         print(f"✅ Screenshot database initialized: {self.db_path}")
 
     def store_screenshot(self, page_name, url, filename, image_data, metadata=None, screenshot_date=None):
@@ -49,17 +50,17 @@ class ScreenshotDatabase:
         if screenshot_date is None:
             screenshot_date = date.today().strftime('%Y-%m-%d')
 
-        conn = sqlite3.connect(self.db_path)
+        conn = shared_connection(self.db_path)
         cursor = conn.cursor()
 
         try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO screenshots
-                (date, page_name, url, filename, image_data, metadata)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (screenshot_date, page_name, url, filename, image_data, json.dumps(metadata) if metadata else None))
+            with transaction(conn):
+                cursor.execute('''
+                    INSERT OR REPLACE INTO screenshots
+                    (date, page_name, url, filename, image_data, metadata)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (screenshot_date, page_name, url, filename, image_data, json.dumps(metadata) if metadata else None))
 
-            conn.commit()
             print(f"✅ Stored screenshot: {page_name} for {screenshot_date}")
             return True
 
@@ -67,137 +68,108 @@ class ScreenshotDatabase:
             print(f"❌ Error storing screenshot {page_name}: {str(e)}")
             return False
 
-        finally:
-            conn.close()
-
     def get_screenshot_by_date_and_page(self, screenshot_date, page_name):
         """Get a specific screenshot by date and page name"""
-        conn = sqlite3.connect(self.db_path)
+        conn = shared_connection(self.db_path)
         cursor = conn.cursor()
 
-        try:
-            cursor.execute('''
-                SELECT id, page_name, url, filename, image_data, metadata, created_at
-                FROM screenshots
-                WHERE date = ? AND page_name = ?
-            ''', (screenshot_date, page_name))
-
-            row = cursor.fetchone()
-            if row:
-                return {
-                    'id': row[0],
-                    'page_name': row[1],
-                    'url': row[2],
-                    'filename': row[3],
-                    'image_data': row[4],
-                    'metadata': json.loads(row[5]) if row[5] else None,
-                    'created_at': row[6]
-                }
-            return None
-
-        finally:
-            conn.close()
+        cursor.execute('''
+            SELECT id, page_name, url, filename, image_data, metadata, created_at
+            FROM screenshots
+            WHERE date = ? AND page_name = ?
+        ''', (screenshot_date, page_name))
+
+        row = cursor.fetchone()
+        if row:
+            return {
+                'id': row[0],
+                'page_name': row[1],
+                'url': row[2],
+                'filename': row[3],
+                'image_data': row[4],
+                'metadata': json.loads(row[5]) if row[5] else None,
+                'created_at': row[6]
+            }
+        return None
 
     def get_all_screenshots_for_date(self, screenshot_date):
         """Get all screenshots for a specific date"""
-        conn = sqlite3.connect(self.db_path)
+        conn = shared_connection(self.db_path)
         cursor = conn.cursor()
 
-        try:
-            cursor.execute('''
-                SELECT page_name, url, filename, image_data, metadata, created_at
-                FROM screenshots
-                WHERE date = ?
-                ORDER BY page_name
-            ''', (screenshot_date,))
-
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    'page_name': row[0],
-                    'url': row[1],
-                    'filename': row[2],
-                    'image_data': row[3],
-                    'metadata': json.loads(row[4]) if row[4] else None,
-                    'created_at': row[5]
-                })
-
-            return results
-
-        finally:
-            conn.close()
+        cursor.execute('''
+            SELECT page_name, url, filename, image_data, metadata, created_at
+            FROM screenshots
+            WHERE date = ?
+            ORDER BY page_name
+        ''', (screenshot_date,))
+
+        results = []
+        for row in cursor.fetchall():
+            results.append({
+                'page_name': row[0],
+                'url': row[1],
+                'filename': row[2],
+                'image_data': row[3],
+                'metadata': json.loads(row[4]) if row[4] else None,
+                'created_at': row[5]
+            })
+
+        return results
 
     def get_available_dates(self):
         """Get all dates that have screenshots"""
-        conn = sqlite3.connect(self.db_path)
+        conn = shared_connection(self.db_path)
         cursor = conn.cursor()
 
-        try:
-            cursor.execute('''
-                SELECT DISTINCT date
-                FROM screenshots
-                ORDER BY date DESC
-            ''')
-
-            dates = [row[0] for row in cursor.fetchall()]
-            return dates
+        cursor.execute('''
+            SELECT DISTINCT date
+            FROM screenshots
+            ORDER BY date DESC
+        ''')
 
-        finally:
-            conn.close()
+        dates = [row[0] for row in cursor.fetchall()]
+        return dates
 
     def get_date_range(self):
         """Get the date range of available screenshots"""
-        conn = sqlite3.connect(self.db_path)
+        conn = shared_connection(self.db_path)
         cursor = conn.cursor()
 
-        try:
-            cursor.execute('''
-                SELECT MIN(date), MAX(date)
-                FROM screenshots
-            ''')
-
-            row = cursor.fetchone()
-            if row and row[0] and row[1]:
-                return row[0], row[1]
-            return None, None
+        cursor.execute('''
+            SELECT MIN(date), MAX(date)
+            FROM screenshots
+        ''')
 
-        finally:
-            conn.close()
+        row = cursor.fetchone()
+        if row and row[0] and row[1]:
+            return row[0], row[1]
+        return None, None
 
     def delete_screenshots_for_date(self, screenshot_date):
         """Delete all screenshots for a specific date"""
-        conn = sqlite3.connect(self.db_path)
+        conn = shared_connection(self.db_path)
         cursor = conn.cursor()
 
-        try:
+        with transaction(conn):
             cursor.execute('DELETE FROM screenshots WHERE date = ?', (screenshot_date,))
             deleted_count = cursor.rowcount
-            conn.commit()
-            print(f"🗑️ Deleted {deleted_count} screenshots for {screenshot_date}")
-            return deleted_count
-
-        finally:
-            conn.close()
+        print(f"🗑️ Deleted {deleted_count} screenshots for {screenshot_date}")
+        return deleted_count
 
     def cleanup_old_screenshots(self, keep_days=30):
         """Clean up screenshots older than specified days"""
         cutoff_date = (date.today() - timedelta(days=keep_days)).strftime('%Y-%m-%d')
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute('DELETE FROM screenshots WHERE date < ?', (cutoff_date,))
-            deleted_count = cursor.rowcount
-            conn.commit()
-
-            if deleted_count > 0:
-                print(f"🧹 Cleaned up {deleted_count} old screenshots (before {cutoff_date})")
+        # Batched day-by-day deletes and incremental vacuum, shared with the other stores
+        result = retention.enforce(shared_connection(self.db_path), retention.POLICIES['screenshots'], keep_days)
+        deleted_count = result.deleted.get('screenshots', 0)
 
-            return deleted_count
+        if deleted_count > 0:
+            print(f"🧹 Cleaned up {deleted_count} old screenshots (before {cutoff_date}), "
+                  f"reclaimed {result.freed_bytes / 1024 / 1024:.1f} MiB")
 
-        finally:
-            conn.close()
+        return deleted_count
 
 def save_screenshot_to_db(screenshot_db, page_name, url, filename, image_path, metadata=None):
     """Helper function to save a screenshot file to database"""
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark generate_html_table_from_df() on a synthetic crawl result set.
+
+Builds N rows shaped like au_link_check_results.csv (URL, Status,
+Response_Time, Error_Message, Timestamp), renders them with the current
+vectorized implementation and with the previous iterrows() implementation,
+checks the output is byte-identical and prints both timings.
+
+Usage:
+  python scripts/benchmark_html_table.py [--rows 100000] [--skip-legacy]
+"""
+import argparse
+import html
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, '..')))
+
+from report_generator import generate_html_table_from_df  # noqa: E402
+
+
+def legacy_generate_html_table_from_df(df, table_id):
+    """The previous row-by-row renderer, kept here as the reference output."""
+    if df.empty:
+        return f"<p>No data available for {table_id.replace('Table', '')}.</p>"
+
+    table_html = f'''
+    <table id="{table_id}" class="display" style="width:100%">
+        <thead>
+            <tr>{''.join(f'<th>{col}</th>' for col in df.columns)}</tr>
+            <tr class="filters">{''.join("<th><input type='text' placeholder='Filter ...' style='width: 90%;' /></th>" for _ in df.columns)}</tr>
+        </thead>
+        <tbody>
+'''
+    for _, row in df.iterrows():
+        status_val = row.get("Status", "N/A")
+        try:
+            status = int(float(status_val)) if pd.notna(status_val) else 0
+        except ValueError:
+            status = 0
+
+        cls = "ok" if status == 200 else "redirect" if 300 <= status < 400 else "error"
+        table_html += f"<tr class='{cls}'>"
+        for col, val in row.items():
+            escaped_val = html.escape(str(val))
+            if col == "URL":
+                table_html += f"<td><a href='{escaped_val}' target='_blank'>{escaped_val}</a></td>"
+            else:
+                table_html += f"<td>{escaped_val}</td>"
+        table_html += "</tr>"
+    table_html += """
+        </tbody>
+    </table>
+"""
+    return table_html
+
+
+def synthetic_results(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    statuses = rng.choice([200, 301, 302, 404, 500, 'Error'], size=rows, p=[0.6, 0.1, 0.05, 0.15, 0.05, 0.05])
+    errors = np.where(statuses == 'Error', "Connection error: <timeout> & 'reset'", '')
+    return pd.DataFrame({
+        'URL': [f"https://www.kmart.com.au/product/item-{i}/?q=a&b=\"{i % 7}\"" for i in range(rows)],
+        'Status': statuses,
+        'Response_Time': rng.random(rows).round(3),
+        'Error_Message': errors,
+        'Timestamp': '2025-08-23 14:00:00',
+    })
+
+
+def timed(fn, df):
+    start = time.perf_counter()
+    output = fn(df, 'auTable')
+    return output, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the HTML results table renderer.')
+    parser.add_argument('--rows', type=int, default=100_000, help='Number of synthetic result rows')
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the current implementation')
+    args = parser.parse_args()
+
+    df = synthetic_results(args.rows)
+    print(f"Rendering {len(df)} rows...")
+
+    current_html, current_seconds = timed(generate_html_table_from_df, df)
+    print(f"⚡ Vectorized: {current_seconds:.2f}s ({len(current_html) / 1e6:.1f} MB of HTML)")
+
+    if not args.skip_legacy:
+        legacy_html, legacy_seconds = timed(legacy_generate_html_table_from_df, df)
+        print(f"🐢 iterrows(): {legacy_seconds:.2f}s")
+        if current_html != legacy_html:
+            print("❌ Output differs from the iterrows() implementation")
+            sys.exit(1)
+        print(f"✅ Byte-identical output, {legacy_seconds / current_seconds:.1f}x faster")
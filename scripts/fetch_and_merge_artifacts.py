@@ -1,72 +1,191 @@
+#!/usr/bin/env python3
+"""
+Merge crawler CSV artifacts into the broken_links history in broken_links.db.
+
+Each CSV (au_broken_links.csv / nz_broken_links.csv, or a directory of them)
+is streamed in chunks. Rows with an HTTP status >= 400 are upserted into the
+broken_links table through broken_links_db.merge_rows(), keyed by
+(date, region, url), so re-running on the same artifacts adds nothing new.
+The date is --date or the date of the file's first Timestamp. The region
+comes from the au_/nz_ file name prefix, or from the URL's host otherwise.
+
+Usage:
+  python scripts/fetch_and_merge_artifacts.py --csv au_broken_links.csv nz_broken_links.csv
+  python scripts/fetch_and_merge_artifacts.py --csv temp-data-links/ --db broken_links.db
+"""
+
+import argparse
+import glob
 import os
-import sqlite3
+import sys
+import time
+from datetime import date
+
 import pandas as pd
-from datetime import datetime, timedelta
-import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import broken_links_db  # noqa: E402
+import retention  # noqa: E402
+from url_dictionary import url_region  # noqa: E402
 
 # SQLite database configuration
 DB_PATH = "broken_links.db"
 TEMP_DATA_DIR = "temp-data-links"
+CHUNK_ROWS = 50000  # CSV rows parsed and written per executemany batch
+RETENTION_DAYS = retention.POLICIES['broken_links'].keep_days
+CSV_COLUMNS = ('Timestamp', 'URL', 'Status', 'Response_Time', 'Error_Message', 'Error')
+TEXT_COLUMNS = {'Timestamp': object, 'URL': object, 'Error_Message': object, 'Error': object}
 
-# Function to load CSV files from a directory and merge into the database
-def load_csv_to_db(csv_files, db_path):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # Ensure the table exists
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS broken_links (
-            Timestamp TEXT,
-            URL TEXT,
-            Status INTEGER,
-            Path TEXT,
-            Visible TEXT
-        )
-        """
-    )
-
-    # Load each CSV file into the database
-    for csv_file in csv_files:
-        print(f"Loading {csv_file} into database...")
-        df = pd.read_csv(csv_file)
-        df.to_sql("broken_links", conn, if_exists="append", index=False)
-
-    conn.commit()
-    conn.close()
 
-# Function to enforce 60-day data retention
-def enforce_retention(db_path):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+def expand_csv_paths(paths):
+    """CSV files named directly, plus every *.csv inside named directories (sorted)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(glob.escape(path), '*.csv'))))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"⚠️ Skipping {path}: not found")
+    return files
+
+
+def region_from_filename(path):
+    name = os.path.basename(path).lower()
+    for region in ('au', 'nz'):
+        if name.startswith(f"{region}_") or name.startswith(f"{region}-"):
+            return region.upper()
+    return None
+
+
+def _column(chunk, *names):
+    for name in names:
+        if name in chunk.columns:
+            return chunk[name]
+    return pd.Series(None, index=chunk.index, dtype=object)
+
+
+def _nullable(series):
+    return series.astype(object).where(series.notna(), None)
+
 
-    # Calculate the cutoff date
-    cutoff_date = (datetime.now() - timedelta(days=60)).strftime("%Y-%m-%d %H:%M:%S")
+def iter_csv_batches(csv_path, run_date=None, chunk_rows=CHUNK_ROWS, stats=None):
+    """Yield lists of broken_links_db.merge_rows() tuples for the broken rows of one CSV."""
+    region = region_from_filename(csv_path)
+    day = run_date
+    # Only the stored columns are parsed; Status and Response_Time keep numeric dtypes
+    reader = pd.read_csv(csv_path, chunksize=chunk_rows, usecols=lambda column: column in CSV_COLUMNS,
+                         dtype=TEXT_COLUMNS, encoding='utf-8', encoding_errors='replace')
+    for chunk in reader:
+        if stats is not None:
+            stats['read'] += len(chunk)
+        if day is None:
+            first_timestamp = pd.to_datetime(_column(chunk, 'Timestamp').dropna().head(1), errors='coerce')
+            day = first_timestamp.iloc[0].date() if len(first_timestamp) and pd.notna(first_timestamp.iloc[0]) else date.today()
+
+        status = pd.to_numeric(_column(chunk, 'Status'), errors='coerce')
+        urls = _column(chunk, 'URL')
+        broken = (status >= 400) & urls.notna()
+        if not broken.any():
+            continue
+        chunk, status, urls = chunk[broken], status[broken].astype(int), urls[broken]
+        regions = pd.Series(region, index=chunk.index) if region else urls.map(url_region)
+        has_region = regions.notna()
+        if stats is not None:
+            stats['no_region'] += int((~has_region).sum())
+
+        rows = list(zip(
+            [day] * int(has_region.sum()),
+            regions[has_region].tolist(),
+            urls[has_region].tolist(),
+            status[has_region].tolist(),
+            _nullable(pd.to_numeric(_column(chunk, 'Response_Time'), errors='coerce')[has_region]).tolist(),
+            _nullable(_column(chunk, 'Error_Message', 'Error')[has_region]).tolist(),
+            _nullable(_column(chunk, 'Timestamp')[has_region]).tolist(),
+        ))
+        if rows:
+            yield rows
+
+
+# Function to load CSV files into the database
+def load_csv_to_db(csv_paths, db_path, run_date=None, chunk_rows=CHUNK_ROWS):
+    """Stream every CSV into broken_links in one transaction; returns (rows merged, rows read, seconds).
+
+    Rows from consecutive files are pooled so each executemany() gets up to chunk_rows rows.
+    """
+    files = expand_csv_paths(csv_paths)
+    stats = {'read': 0, 'no_region': 0}
+
+    def batches():
+        pending = []
+        for csv_file in files:
+            print(f"Loading {csv_file} into database...")
+            for rows in iter_csv_batches(csv_file, run_date, chunk_rows, stats):
+                pending.extend(rows)
+                if len(pending) >= chunk_rows:
+                    yield pending
+                    pending = []
+        if pending:
+            yield pending
+
+    start = time.perf_counter()
+    conn = broken_links_db.connect(db_path)
+    try:
+        merged = broken_links_db.merge_rows(conn, batches())
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - start
+    rate = stats['read'] / elapsed if elapsed > 0 else 0
+    print(f"📥 Merged {merged:,} broken rows from {stats['read']:,} CSV rows in {len(files)} files "
+          f"in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+    if stats['no_region']:
+        print(f"⚠️ Skipped {stats['no_region']:,} rows with no AU/NZ region (name files au_*.csv / nz_*.csv)")
+    return merged, stats['read'], elapsed
+
+
+# Function to enforce 60-day data retention
+def enforce_retention(db_path, keep_days=RETENTION_DAYS):
+    """Apply the broken_links retention policy (retention.py); returns the broken_links rows deleted."""
+    result = retention.enforce_store('broken_links', db_path, keep_days)
+    return result.deleted.get('broken_links', 0) if result else 0
 
-    # Delete old records
-    cursor.execute("DELETE FROM broken_links WHERE Timestamp < ?", (cutoff_date,))
-    conn.commit()
-    conn.close()
 
 # Function to query changes data grouped by date
-def fetch_changes_data(db_path):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT date, COUNT(*) FROM broken_links GROUP BY date")
-    data = cursor.fetchall()
-    conn.close()
-    return data
+def fetch_changes_data(db_path, days=RETENTION_DAYS):
+    """(date, AU count, NZ count) per stored day, from the daily_summary rollup."""
+    conn = broken_links_db.connect(db_path)
+    try:
+        counts = broken_links_db.daily_counts(conn, days=days)
+    finally:
+        conn.close()
+    return [(row.date.isoformat(), int(row.au_count), int(row.nz_count)) for row in counts.itertuples(index=False)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge crawler CSV artifacts into broken_links.db")
+    parser.add_argument('--csv', nargs='+', default=[TEMP_DATA_DIR],
+                        help=f"CSV files or directories of CSVs to merge (default: {TEMP_DATA_DIR})")
+    parser.add_argument('--db', default=DB_PATH, help=f"SQLite database path (default: {DB_PATH})")
+    parser.add_argument('--date', type=date.fromisoformat, default=None,
+                        help="Snapshot date (YYYY-MM-DD) for every file; default: each file's first Timestamp")
+    parser.add_argument('--retention-days', type=int, default=RETENTION_DAYS,
+                        help=f"Delete snapshots older than this many days after merging (default: {RETENTION_DAYS}; 0 keeps all)")
+    args = parser.parse_args()
 
-if __name__ == "__main__":
     print("Loading past data into the database...")
-    load_csv_to_db(TEMP_DATA_DIR, DB_PATH)
+    load_csv_to_db(args.csv, args.db, run_date=args.date)
 
-    print("Enforcing 60-day data retention policy...")
-    enforce_retention(DB_PATH)
+    if args.retention_days > 0:
+        print(f"Enforcing {args.retention_days}-day data retention policy...")
+        deleted = enforce_retention(args.db, args.retention_days)
+        print(f"Deleted {deleted} rows older than the retention window")
 
     print("✅ Database updated successfully!")
 
-    # Example usage
-    db_path = "broken_links.db"
-    changes_data = fetch_changes_data(db_path)
-    print("Changes Data:", changes_data)
\ No newline at end of file
+    changes_data = fetch_changes_data(args.db)
+    print("Changes Data (date, AU, NZ):", changes_data)
+
+
+if __name__ == "__main__":
+    main()
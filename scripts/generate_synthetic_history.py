@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic broken-link history for benchmarking the SQLite queries.
+
+Writes DAYS daily snapshots ending today, with about LINKS broken links per
+region per day, into a broken_links.db-shaped database. Each day a CHURN
+fraction of yesterday's broken links is fixed and replaced by new ones, so
+the Changes tab diffs, trend chart and retention have realistic work to do.
+A link keeps the same status (404/410/403/500/503/request error) on every
+day it is broken. Rows go through broken_links_db.merge_rows(): batched
+executemany in one transaction, with daily_summary refreshed per day.
+
+The report never generates history itself; run this explicitly, against a
+scratch database rather than the real broken_links.db.
+
+Usage:
+  python scripts/generate_synthetic_history.py --days 60 --links 150000
+  python scripts/generate_synthetic_history.py --db bench.db --days 365 --links 20000 --churn 0.02 --seed 7
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, '..')))
+
+import broken_links_db  # noqa: E402
+
+DB_PATH = 'synthetic_broken_links.db'
+BATCH_ROWS = 50000
+REGION_BASE_URLS = {'AU': 'https://www.kmart.com.au', 'NZ': 'https://www.kmart.co.nz'}
+URL_SECTIONS = ('product', 'category', 'brand', 'campaign')
+# (status, error message, share of broken links); status 0 is a request error with no HTTP response
+STATUS_MIX = (
+    (404, 'Not Found', 0.70),
+    (410, 'Gone', 0.08),
+    (403, 'Forbidden', 0.07),
+    (500, 'Internal Server Error', 0.08),
+    (503, 'Service Unavailable', 0.04),
+    (0, 'Request error', 0.03),
+)
+
+
+def _status_lookup(ids: np.ndarray):
+    """Stable status index per link id, following STATUS_MIX shares."""
+    bounds = np.cumsum([share for _, _, share in STATUS_MIX])
+    bucket = (ids * 2654435761 % 10000) / 10000.0  # Multiplicative hash: the same id always lands in the same bucket
+    return np.minimum(np.searchsorted(bounds, bucket, side='right'), len(STATUS_MIX) - 1)
+
+
+def _url(base: str, link_id: int) -> str:
+    return f"{base}/{URL_SECTIONS[link_id % len(URL_SECTIONS)]}/synthetic-{link_id}"
+
+
+def iter_history(days: int, links: int, churn: float, seed: int, end_date: date, batch_rows: int = BATCH_ROWS):
+    """Yield batches of broken_links_db.merge_rows() tuples, oldest day first."""
+    rng = np.random.default_rng(seed)
+    active = {region: np.arange(links, dtype=np.int64) for region in REGION_BASE_URLS}
+    next_id = links
+    batch = []
+    for offset in range(days - 1, -1, -1):
+        day = end_date - timedelta(days=offset)
+        timestamp = f"{day.isoformat()} 02:00:00"
+        for region, base in REGION_BASE_URLS.items():
+            ids = active[region]
+            if offset != days - 1:
+                fixed = rng.random(len(ids)) < churn
+                added = np.arange(next_id, next_id + int(fixed.sum()), dtype=np.int64)
+                next_id += len(added)
+                ids = active[region] = np.concatenate([ids[~fixed], added])
+            response_times = np.round(rng.gamma(2.0, 0.4, len(ids)), 3)
+            for link_id, status_index, response_time in zip(ids.tolist(), _status_lookup(ids).tolist(),
+                                                             response_times.tolist()):
+                status, message, _ = STATUS_MIX[status_index]
+                batch.append((day, region, _url(base, link_id), status, response_time, message, timestamp))
+                if len(batch) >= batch_rows:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic broken-link history for benchmarking")
+    parser.add_argument('--db', default=DB_PATH, help=f"Target database (default: {DB_PATH})")
+    parser.add_argument('--days', type=int, default=60, help="Number of daily snapshots ending today (default: 60)")
+    parser.add_argument('--links', type=int, default=10000, help="Broken links per region per day (default: 10000)")
+    parser.add_argument('--churn', type=float, default=0.05,
+                        help="Fraction of broken links fixed and replaced each day (default: 0.05)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument('--end-date', type=date.fromisoformat, default=None, help="Last snapshot date (default: today)")
+    args = parser.parse_args()
+    if os.path.basename(args.db) == 'broken_links.db':
+        parser.error("refusing to write synthetic data into broken_links.db; pass a scratch --db")
+
+    start = time.perf_counter()
+    conn = broken_links_db.connect(args.db)
+    try:
+        rows = broken_links_db.merge_rows(
+            conn, iter_history(args.days, args.links, args.churn, args.seed, args.end_date or date.today()))
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(args.db) / 1024 / 1024
+    print(f"🧪 Wrote {rows:,} synthetic broken links ({args.days} days x {len(REGION_BASE_URLS)} regions x "
+          f"~{args.links:,}) to {args.db} in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s, {size_mb:.1f} MiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of rendered report sections.
+
+report_generator.py keys each section of the combined report by a hash of
+everything it is built from (input file contents, database state, render
+options and the generator's own source) and stores the rendered HTML
+fragment under the cache directory. When the report is regenerated after
+only one input changed, the other sections are read back instead of
+being rebuilt.
+
+Usage:
+  cache = SectionCache('.report_cache', version=file_fingerprint('report_generator.py'))
+  table_html = cache.get_or_build('au_table', [file_fingerprint(au_csv), 'html'], build_au_table)
+"""
+
+import glob
+import hashlib
+import os
+import sqlite3
+import threading
+
+CACHE_DIR = '.report_cache'
+
+
+def file_fingerprint(path):
+    """Content hash of a file (or a 'missing' marker) for use in a section's inputs."""
+    if not path or not os.path.isfile(path):
+        return f"missing:{path}"
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return f"{path}:{digest.hexdigest()}"
+
+
+def sqlite_fingerprint(conn: sqlite3.Connection):
+    """Cheap logical fingerprint of a database: each table's name, row count and highest rowid.
+
+    It notices appended, deleted and dropped rows without hashing the whole
+    file, but not rows updated in place (WITHOUT ROWID tables only contribute
+    their count). Stores that upsert, like broken_links.db, must add their own
+    write counter (broken_links_db.data_revision()) to the section inputs.
+    """
+    parts = []
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")]
+    for name in tables:
+        quoted = '"' + name.replace('"', '""') + '"'
+        try:
+            count, max_rowid = conn.execute(f"SELECT COUNT(*), MAX(rowid) FROM {quoted}").fetchone()
+        except sqlite3.OperationalError:  # WITHOUT ROWID tables
+            count, max_rowid = conn.execute(f"SELECT COUNT(*) FROM {quoted}").fetchone()[0], None
+        parts.append(f"{name}:{count}:{max_rowid}")
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+class SectionCache:
+    """Rendered HTML fragments stored as <cache_dir>/<section>.<key>.html.
+
+    Only the newest entry per section is kept. With force=True every section
+    is rebuilt and the cache refreshed. Safe to use from the report's worker
+    threads since each section writes its own files.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, version='', force=False):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.force = force
+        self.hits = []
+        self.misses = []
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, section, inputs):
+        payload = '\x1f'.join([self.version, section] + [str(value) for value in inputs])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:20]
+
+    def _path(self, section, key):
+        return os.path.join(self.cache_dir, f"{section}.{key}.html")
+
+    def get_or_build(self, section, inputs, build):
+        """Return the cached HTML for section if its inputs are unchanged, otherwise build() and store it.
+
+        Pass inputs=None for a section that cannot be cached (e.g. one that writes
+        side files); it is always rebuilt.
+        """
+        if inputs is None:
+            return build()
+        path = self._path(section, self.key(section, inputs))
+        if not self.force and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                with self._lock:
+                    self.hits.append(section)
+                return content
+            except OSError as e:
+                print(f"⚠️ Could not read cached {section} section ({e}); rebuilding")
+
+        content = build()
+        with self._lock:
+            self.misses.append(section)
+        try:
+            for stale in glob.glob(os.path.join(glob.escape(self.cache_dir), f"{glob.escape(section)}.*.html")):
+                if stale != path:
+                    os.remove(stale)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8', errors='ignore') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not cache {section} section: {e}")
+        return content
@@ -3,15 +3,23 @@
 Store daily New Relic PageView data in SQLite DB.
 
 This script stores the JSON response from NRQL queries into a persistent SQLite DB,
-with a table for daily data.
+with a table for daily data. URL strings in the responses are stored as
+{"$url": id} references into the shared urls dictionary (url_dictionary.py);
+load_daily_data() restores them.
 """
-import sqlite3
 import json
 import os
 from datetime import datetime
 
+import url_dictionary
+from db_connection import shared_connection, transaction
+
+DB_PATH = 'page_views_daily.db'
+URL_REF_KEY = '$url'
+
 def create_db():
-    conn = sqlite3.connect('page_views_daily.db')
+    conn = shared_connection(DB_PATH)
+    url_dictionary.ensure_url_table(conn)
     cur = conn.cursor()
     cur.execute('''
     CREATE TABLE IF NOT EXISTS daily_page_views (
@@ -23,22 +31,77 @@ def create_db():
     )
     ''')
     conn.commit()
-    conn.close()
+    return conn
+
+def _collect(value, match, found):
+    """Append every value nested in a JSON structure for which match() is true (without descending into it)."""
+    if match(value):
+        found.append(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect(item, match, found)
+    elif isinstance(value, list):
+        for item in value:
+            _collect(item, match, found)
+    return found
+
+def _is_url(value):
+    return isinstance(value, str) and value.startswith(('http://', 'https://'))
+
+def _is_url_ref(value):
+    return isinstance(value, dict) and len(value) == 1 and isinstance(value.get(URL_REF_KEY), int)
+
+def _intern_urls(value, url_ids):
+    if _is_url(value):
+        return {URL_REF_KEY: url_ids[value]}
+    if isinstance(value, dict):
+        return {key: _intern_urls(item, url_ids) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_intern_urls(item, url_ids) for item in value]
+    return value
+
+def _restore_urls(value, urls):
+    if _is_url_ref(value):
+        return urls.get(value[URL_REF_KEY])
+    if isinstance(value, dict):
+        return {key: _restore_urls(item, urls) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_restore_urls(item, urls) for item in value]
+    return value
+
+def intern_urls(conn, payload):
+    """Replace every URL string in a JSON payload with a {"$url": id} reference, resolving ids in one batch."""
+    url_ids = url_dictionary.resolve_url_ids(conn, _collect(payload, _is_url, []))
+    return _intern_urls(payload, url_ids)
+
+def restore_urls(conn, payload):
+    """Inverse of intern_urls(); payloads stored before URLs were interned are returned unchanged."""
+    refs = [ref[URL_REF_KEY] for ref in _collect(payload, _is_url_ref, [])]
+    return _restore_urls(payload, url_dictionary.lookup_urls(conn, refs)) if refs else payload
 
 def store_daily_data(date, products_json, pages_json):
     # Ensure the database and table exist
-    create_db()
-    
-    conn = sqlite3.connect('page_views_daily.db')
-    cur = conn.cursor()
+    conn = create_db()
+
     generated_at = datetime.utcnow().isoformat() + 'Z'
-    cur.execute('''
-    INSERT OR REPLACE INTO daily_page_views (date, products_json, pages_json, generated_at)
-    VALUES (?, ?, ?, ?)
-    ''', (date, json.dumps(products_json), json.dumps(pages_json), generated_at))
-    conn.commit()
-    conn.close()
+    with transaction(conn):
+        products_payload = intern_urls(conn, products_json)
+        pages_payload = intern_urls(conn, pages_json)
+        conn.execute('''
+        INSERT OR REPLACE INTO daily_page_views (date, products_json, pages_json, generated_at)
+        VALUES (?, ?, ?, ?)
+        ''', (date, json.dumps(products_payload), json.dumps(pages_payload), generated_at))
     print(f"Stored data for {date}")
 
+def load_daily_data(date):
+    """Return (products_json, pages_json) stored for date with URLs restored, or None."""
+    if not os.path.exists(DB_PATH):
+        return None
+    conn = create_db()
+    row = conn.execute('SELECT products_json, pages_json FROM daily_page_views WHERE date = ?', (date,)).fetchone()
+    if row is None:
+        return None
+    return tuple(restore_urls(conn, json.loads(blob)) if blob else None for blob in row)
+
 if __name__ == '__main__':
-    create_db()
\ No newline at end of file
+    create_db()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Bulk URL checking API shared by the crawlers and the other pipeline stages.
+
+check_urls() validates an arbitrary list of URLs with the same session,
+retry and rate-limit settings as the AU/NZ crawlers, and streams a
+CheckResult(url, status, elapsed, error) for each URL as soon as it
+completes.
+
+Usage:
+  from url_checker import check_urls
+  for url, status, elapsed, error in check_urls(urls, concurrency=50, method='HEAD'):
+      ...
+
+  python url_checker.py urls.txt --concurrency 50 --method HEAD --output results.csv
+"""
+
+import argparse
+import csv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterable, Iterator, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from http_transport import (build_session, Http2Session,
+                            MAX_CONNECTIONS, REQUEST_TIMEOUT, MAX_RETRIES, RATE_LIMIT)
+
+DEFAULT_CONCURRENCY = 20
+DEFAULT_USER_AGENT = 'kmart-linkchecker/1.0 (+https://www.kmart.com.au/)'
+HEAD_FALLBACK_STATUS_CODES = {405, 501}  # Servers that reject HEAD are retried with GET
+
+
+class CheckResult(NamedTuple):
+    url: str
+    status: Optional[int]
+    elapsed: float
+    error: Optional[str]
+
+
+class RateLimiter:
+    """Request pacing shared by all worker threads.
+
+    pause() is the crawler's fixed per-request sleep. wait() additionally
+    spaces requests to hosts with a minimum interval, e.g. a robots.txt
+    Crawl-delay registered through set_host_delay().
+    """
+
+    def __init__(self, delay: float = RATE_LIMIT):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._host_delays = {}
+        self._next_slot = {}
+
+    def set_host_delay(self, host: str, seconds: float):
+        with self._lock:
+            self._host_delays[host] = seconds
+
+    def wait(self, url: str):
+        if not self._host_delays:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            interval = self._host_delays.get(host)
+            if not interval:
+                return
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def pause(self, url: str = None):
+        if self.delay > 0:
+            time.sleep(self.delay)
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def default_session():
+    """Lazily build a shared HTTP/1.1 session with the crawler's pool and retry settings."""
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = build_session(DEFAULT_USER_AGENT, MAX_CONNECTIONS, MAX_RETRIES)
+        return _default_session
+
+
+def check_url(url, session=None, method='GET', timeout=REQUEST_TIMEOUT, rate_limiter=None) -> CheckResult:
+    """Check a single URL and return its final status code after redirects."""
+    session = session or default_session()
+    if rate_limiter is not None:
+        rate_limiter.wait(url)
+    start = time.perf_counter()
+    try:
+        if method.upper() == 'HEAD':
+            response = session.head(url, timeout=timeout, allow_redirects=True)
+            if response.status_code in HEAD_FALLBACK_STATUS_CODES:
+                response = session.get(url, timeout=timeout, allow_redirects=True)
+        else:
+            response = session.get(url, timeout=timeout, allow_redirects=True)
+        return CheckResult(url, response.status_code, time.perf_counter() - start, None)
+    except requests.RequestException as e:
+        return CheckResult(url, None, time.perf_counter() - start, str(e))
+    finally:
+        if rate_limiter is not None:
+            rate_limiter.pause(url)
+
+
+def _check_url_guarded(url, session, method, timeout, rate_limiter) -> CheckResult:
+    """check_url() for the worker pool: an unexpected exception becomes an error row for that URL."""
+    start = time.perf_counter()
+    try:
+        return check_url(url, session, method, timeout, rate_limiter)
+    except Exception as e:
+        return CheckResult(url, None, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+
+
+def check_urls(urls: Iterable[str], concurrency: int = DEFAULT_CONCURRENCY, method: str = 'GET',
+               session=None, timeout: float = REQUEST_TIMEOUT, rate_limiter=None) -> Iterator[CheckResult]:
+    """Check many URLs concurrently, yielding results in completion order.
+
+    Duplicate URLs are checked once. At most a few batches of futures are kept
+    in flight, so very long URL lists (or generators) are consumed lazily. A URL
+    whose check raises yields an error result instead of ending the iteration.
+    """
+    session = session or default_session()
+    rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+    max_in_flight = max(1, concurrency) * 4
+    seen = set()
+    pending = set()
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        for url in urls:
+            if not url or url in seen:
+                continue
+            seen.add(url)
+            pending.add(executor.submit(_check_url_guarded, url, session, method, timeout, rate_limiter))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check a list of URLs (one per line) and write a CSV of results.')
+    parser.add_argument('url_file', help='Text file with one URL per line')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Number of worker threads')
+    parser.add_argument('--method', default='GET', choices=['GET', 'HEAD'], help='HTTP method used for checks')
+    parser.add_argument('--http2', action='store_true', help='Use the HTTP/2 transport (requires httpx[http2])')
+    parser.add_argument('--output', default='url_check_results.csv', help='CSV file for the results')
+    args = parser.parse_args()
+
+    with open(args.url_file, 'r', encoding='utf-8') as f:
+        url_list = [line.strip() for line in f if line.strip()]
+
+    check_session = Http2Session(DEFAULT_USER_AGENT, MAX_CONNECTIONS, MAX_RETRIES) if args.http2 else None
+    start_time = time.time()
+    broken = 0
+    with open(args.output, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.writer(out)
+        writer.writerow(['URL', 'Status', 'Elapsed', 'Error'])
+        for result in check_urls(url_list, concurrency=args.concurrency, method=args.method, session=check_session):
+            writer.writerow([result.url, result.status, f"{result.elapsed:.3f}", result.error or ''])
+            if result.status is None or result.status >= 400:
+                broken += 1
+    print(f"✅ Checked {len(url_list)} URLs in {time.time() - start_time:.2f}s ({broken} broken); saved to {args.output}")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Shared URL dictionary for the SQLite stores.
+
+Each database that records URLs (broken_links.db, product_availability.db,
+page_views_daily.db) keeps one urls table mapping every distinct URL to an
+integer id. Fact tables store the id instead of repeating the URL string on
+every row, which keeps the databases small and makes joins on URLs integer
+comparisons.
+
+Usage:
+  ensure_url_table(conn)
+  ids = resolve_url_ids(conn, df['URL'])   # {url: id}, inserting new URLs in batches
+  urls = lookup_urls(conn, ids.values())   # {id: url}
+"""
+
+import hashlib
+import sqlite3
+from urllib.parse import urlsplit
+
+URLS_TABLE = 'urls'
+BATCH_SIZE = 500  # Stays under SQLite's bound-parameter limit for IN (...) lookups
+REGION_HOST_SUFFIXES = {'AU': '.com.au', 'NZ': '.co.nz'}
+
+URLS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    region TEXT,
+    path_hash INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_urls_path_hash ON urls (path_hash);
+"""
+
+
+def url_region(url: str):
+    """'AU' or 'NZ' from the URL's host, or None for other sites."""
+    try:
+        host = (urlsplit(url).hostname or '').lower()
+    except ValueError:
+        return None
+    for region, suffix in REGION_HOST_SUFFIXES.items():
+        if host.endswith(suffix):
+            return region
+    return None
+
+
+def url_path_hash(url: str) -> int:
+    """64-bit hash of host + path (query and fragment ignored), to group variants of one page."""
+    try:
+        parts = urlsplit(url)
+        key = f"{parts.netloc.lower()}{parts.path}"
+    except ValueError:
+        key = url
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8', 'replace'), digest_size=8).digest(), 'big', signed=True)
+
+
+def ensure_url_table(conn: sqlite3.Connection):
+    """Create the urls table and register url_region()/url_path_hash() as SQL functions on conn.
+
+    The SQL functions let migrations fill the dictionary with one INSERT ... SELECT.
+    """
+    conn.create_function('url_region', 1, url_region, deterministic=True)
+    conn.create_function('url_path_hash', 1, url_path_hash, deterministic=True)
+    conn.executescript(URLS_SCHEMA)
+
+
+def _select_ids(conn: sqlite3.Connection, urls: list, found: dict):
+    for start in range(0, len(urls), BATCH_SIZE):
+        batch = urls[start:start + BATCH_SIZE]
+        placeholders = ','.join('?' * len(batch))
+        found.update(conn.execute(f"SELECT url, id FROM urls WHERE url IN ({placeholders})", batch).fetchall())
+
+
+def resolve_url_ids(conn: sqlite3.Connection, urls) -> dict[str, int]:
+    """Map each distinct URL to its id, inserting URLs not yet in the dictionary.
+
+    Lookups and inserts are batched. Runs in the caller's transaction and does not commit.
+    """
+    distinct = list(dict.fromkeys(url for url in urls if isinstance(url, str)))
+    ids = {}
+    _select_ids(conn, distinct, ids)
+    missing = [url for url in distinct if url not in ids]
+    if missing:
+        conn.executemany("INSERT OR IGNORE INTO urls (url, region, path_hash) VALUES (?, ?, ?)",
+                         ((url, url_region(url), url_path_hash(url)) for url in missing))
+        _select_ids(conn, missing, ids)
+    return ids
+
+
+def lookup_urls(conn: sqlite3.Connection, ids) -> dict[int, str]:
+    """Map url ids back to URL strings, in batches."""
+    distinct = list(dict.fromkeys(url_id for url_id in ids if url_id is not None))
+    urls = {}
+    for start in range(0, len(distinct), BATCH_SIZE):
+        batch = distinct[start:start + BATCH_SIZE]
+        placeholders = ','.join('?' * len(batch))
+        urls.update(conn.execute(f"SELECT id, url FROM urls WHERE id IN ({placeholders})", batch).fetchall())
+    return urls